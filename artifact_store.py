@@ -0,0 +1,323 @@
+"""
+Compressed, chunked artifact storage for Parameter Bug Hunter Pro
+"""
+
+import os
+import re
+import json
+import zlib
+import heapq
+import struct
+import bisect
+import threading
+from array import array
+from pathlib import Path
+
+
+_AUTHORITY_END = re.compile(r"[/?#]")
+_PATH_END = re.compile(r"[?#]")
+
+
+class Segment:
+    """One immutable, sorted segment file
+
+    Layout: chunks of up to ``CHUNK_RECORDS`` sorted records, then a sparse
+    index of each chunk's first and last key, then a fixed footer pointing
+    at it. Every chunk carries its own host and path dictionaries (records
+    are sorted, so a chunk only uses a few hosts) plus three separately
+    compressed columns: host ids, path ids and the remaining text (query
+    string, or the whole record when it is not a URL). A range scan
+    therefore inflates only the chunks it reads. Segments written before
+    per-chunk dictionaries (``PBHSEG01``) keep one dictionary for the whole
+    file and are still readable; compaction rewrites them.
+
+    The file is opened when the segment is, and read with ``pread``, so a
+    reader holding a segment keeps reading it even after compaction has
+    unlinked the file.
+    """
+
+    MAGIC = b"PBHSEG02"
+    LEGACY_MAGIC = b"PBHSEG01"
+    FOOTER = struct.Struct("<QQQQ8s")
+    CHUNK_RECORDS = 8192
+    COLUMN_HEADER = struct.Struct("<IIIII")
+    LEGACY_COLUMN_HEADER = struct.Struct("<III")
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._fd = os.open(self.path, os.O_RDONLY)
+        try:
+            size = os.fstat(self._fd).st_size
+            footer = self._read(size - self.FOOTER.size, self.FOOTER.size)
+            dict_offset, dict_length, index_offset, index_length, magic = self.FOOTER.unpack(footer)
+            if magic not in (self.MAGIC, self.LEGACY_MAGIC):
+                raise ValueError(f"{self.path} is not an artifact segment")
+            self.index = json.loads(zlib.decompress(self._read(index_offset, index_length)))
+        except Exception:
+            self.close()
+            raise
+        self.legacy = magic == self.LEGACY_MAGIC
+        self._dict_location = (dict_offset, dict_length)
+        self._dictionary = None
+        self.first_keys = [entry['first'] for entry in self.index]
+
+    def __len__(self):
+        return sum(entry['count'] for entry in self.index)
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        fd, self._fd = getattr(self, '_fd', None), None
+        if fd is not None:
+            os.close(fd)
+
+    def _read(self, offset, length):
+        return os.pread(self._fd, length, offset)
+
+    @staticmethod
+    def split(record):
+        """Split a record into (host, path, rest) for the dictionary columns"""
+        scheme, sep, remainder = record.partition('://')
+        if not sep:
+            return '', '', record
+        authority = _AUTHORITY_END.search(remainder)
+        if authority is None:
+            return record, '', ''
+        host = record[:len(scheme) + 3 + authority.start()]
+        remainder = remainder[authority.start():]
+        query = _PATH_END.search(remainder)
+        cut = query.start() if query else len(remainder)
+        return host, remainder[:cut], remainder[cut:]
+
+    @classmethod
+    def write(cls, path, records):
+        """Write already sorted, unique records as a new segment"""
+        index = []
+        tmp_path = Path(str(path) + ".tmp")
+
+        with open(tmp_path, 'wb') as f:
+            chunk = []
+
+            def flush():
+                hosts, paths = {}, {}
+                host_ids, path_ids, rests = array('I'), array('I'), []
+                for record in chunk:
+                    host, record_path, rest = cls.split(record)
+                    host_ids.append(hosts.setdefault(host, len(hosts)))
+                    path_ids.append(paths.setdefault(record_path, len(paths)))
+                    rests.append(rest)
+                columns = [zlib.compress("\n".join(hosts).encode(), 6),
+                           zlib.compress("\n".join(paths).encode(), 6),
+                           zlib.compress(host_ids.tobytes(), 6),
+                           zlib.compress(path_ids.tobytes(), 6),
+                           zlib.compress("\n".join(rests).encode(), 6)]
+                offset = f.tell()
+                f.write(cls.COLUMN_HEADER.pack(*(len(c) for c in columns)))
+                for column in columns:
+                    f.write(column)
+                index.append({'first': chunk[0], 'last': chunk[-1], 'offset': offset,
+                              'length': f.tell() - offset, 'count': len(chunk)})
+
+            for record in records:
+                chunk.append(record)
+                if len(chunk) >= cls.CHUNK_RECORDS:
+                    flush()
+                    chunk = []
+            if chunk:
+                flush()
+
+            index_offset = f.tell()
+            f.write(zlib.compress(json.dumps(index).encode(), 6))
+            f.write(cls.FOOTER.pack(0, 0, index_offset, f.tell() - index_offset, cls.MAGIC))
+        os.replace(tmp_path, path)
+        return cls(path)
+
+    def _legacy_dictionaries(self):
+        if self._dictionary is None:
+            data = json.loads(zlib.decompress(self._read(*self._dict_location)))
+            self._dictionary = (data['hosts'], data['paths'])
+        return self._dictionary
+
+    def _read_chunk(self, entry):
+        data = memoryview(self._read(entry['offset'], entry['length']))
+        header = self.LEGACY_COLUMN_HEADER if self.legacy else self.COLUMN_HEADER
+        sizes = header.unpack(data[:header.size])
+        columns, position = [], header.size
+        for size in sizes:
+            columns.append(zlib.decompress(data[position:position + size]))
+            position += size
+        if self.legacy:
+            hosts, paths = self._legacy_dictionaries()
+        else:
+            hosts, paths = (column.decode().split("\n") for column in columns[:2])
+            columns = columns[2:]
+        host_ids, path_ids = array('I'), array('I')
+        host_ids.frombytes(columns[0])
+        path_ids.frombytes(columns[1])
+        rests = columns[2].decode().split("\n")
+        for host_id, path_id, rest in zip(host_ids, path_ids, rests):
+            yield hosts[host_id] + paths[path_id] + rest
+
+    def scan(self, start=None, end=None):
+        """Yield records in ``[start, end)`` order, decompressing only the
+        chunks whose key range overlaps"""
+        first = 0
+        if start is not None:
+            first = max(0, bisect.bisect_right(self.first_keys, start) - 1)
+        for entry in self.index[first:]:
+            if end is not None and entry['first'] >= end:
+                break
+            if start is not None and entry['last'] < start:
+                continue
+            for record in self._read_chunk(entry):
+                if start is not None and record < start:
+                    continue
+                if end is not None and record >= end:
+                    return
+                yield record
+
+
+class ArtifactStore:
+    """Append-only, sorted and compressed store for one project artifact
+
+    ``append()`` writes each batch as a new segment. Readers merge all
+    segments on the fly (deduplicating), and ``compact()`` folds segments
+    into one, optionally on a background thread once too many accumulate.
+    """
+
+    SUFFIX = ".pbh"
+
+    def __init__(self, path, max_segments=8):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_segments = max_segments
+        self._lock = threading.Lock()
+        self._compactor = None
+
+    def segments(self):
+        """Open every current segment
+
+        A compaction finishing between the listing and the opens unlinks
+        files listed here; its merged segment is then listed on the retry.
+        Opened segments stay readable whatever compaction does next.
+        """
+        while True:
+            opened = []
+            try:
+                for p in sorted(self.path.glob("seg_*.dat")):
+                    opened.append(Segment(p))
+                return opened
+            except FileNotFoundError:
+                for segment in opened:
+                    segment.close()
+
+    def _next_segment_path(self):
+        numbers = [int(p.stem.split('_')[1]) for p in self.path.glob("seg_*.dat")]
+        return self.path / f"seg_{max(numbers, default=0) + 1:08d}.dat"
+
+    def exists(self):
+        return any(self.path.glob("seg_*.dat"))
+
+    def append(self, records, background_compact=True):
+        """Store a batch of records as a new segment, returns its size"""
+        records = sorted({r for r in records if r and '\n' not in r})
+        if not records:
+            return 0
+        with self._lock:
+            Segment.write(self._next_segment_path(), records).close()
+        if background_compact and len(list(self.path.glob("seg_*.dat"))) > self.max_segments:
+            self.compact_in_background()
+        return len(records)
+
+    def scan(self, start=None, end=None):
+        """Stream unique records in sorted order, optionally a key range"""
+        previous = None
+        segments = self.segments()
+        try:
+            for record in heapq.merge(*(segment.scan(start, end) for segment in segments)):
+                if record != previous:
+                    yield record
+                    previous = record
+        finally:
+            for segment in segments:
+                segment.close()
+
+    def scan_prefix(self, prefix):
+        """Stream records starting with ``prefix`` (e.g. one host's URLs)"""
+        return self.scan(prefix, prefix + "\U0010ffff")
+
+    def __iter__(self):
+        return self.scan()
+
+    def compact(self):
+        """Merge every current segment into one"""
+        with self._lock:
+            old = sorted(self.path.glob("seg_*.dat"))
+            if len(old) < 2:
+                return
+            merged = self._next_segment_path()
+            segments = [Segment(p) for p in old]
+            previous = None
+
+            def unique():
+                nonlocal previous
+                for record in heapq.merge(*(segment.scan() for segment in segments)):
+                    if record != previous:
+                        yield record
+                        previous = record
+
+            try:
+                Segment.write(merged, unique()).close()
+            finally:
+                for segment in segments:
+                    segment.close()
+            # Readers that already opened these keep their handles
+            for p in old:
+                p.unlink()
+
+    def compact_in_background(self):
+        if self._compactor and self._compactor.is_alive():
+            return self._compactor
+        self._compactor = threading.Thread(target=self.compact, daemon=True)
+        self._compactor.start()
+        return self._compactor
+
+    def wait(self):
+        """Wait for a running background compaction"""
+        if self._compactor:
+            self._compactor.join()
+
+    def export_text(self, path):
+        """Write the artifact out as a plain text file"""
+        count = 0
+        with open(path, 'w') as f:
+            for record in self.scan():
+                f.write(f"{record}\n")
+                count += 1
+        return count
+
+
+def artifact_exists(path):
+    """Check for an artifact in either store or legacy text form"""
+    path = Path(path)
+    store_path = path.with_suffix(ArtifactStore.SUFFIX)
+    return (store_path.is_dir() and ArtifactStore(store_path).exists()) or path.exists()
+
+
+def artifact_records(path):
+    """Stream an artifact, preferring the store over a legacy text file
+
+    ``path`` is the text file location (e.g. ``reconnaissance/urls.txt``);
+    the store lives next to it as ``urls.pbh/``.
+    """
+    path = Path(path)
+    store_path = path.with_suffix(ArtifactStore.SUFFIX)
+    if store_path.is_dir() and ArtifactStore(store_path).exists():
+        yield from ArtifactStore(store_path).scan()
+    elif path.exists():
+        with open(path, 'r') as f:
+            for line in f:
+                line = line.rstrip('\n')
+                if line:
+                    yield line
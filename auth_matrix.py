@@ -0,0 +1,178 @@
+"""
+Multi-session authorization testing for Parameter Bug Hunter Pro
+"""
+
+import re
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit, parse_qsl
+
+from response_diff import ResponseDiff
+
+
+class AuthMatrix:
+    """Replay endpoints under every session profile and compare the results
+
+    Sessions are given highest privilege first; the first one is the
+    reference. Each endpoint is requested under the reference twice (so the
+    diff can learn its volatile parts) and once under every other session,
+    all through one pooled client, and the responses are compared with
+    ``ResponseDiff``. A lower-privileged session that gets the reference
+    content, identical once volatile parts are masked, on an endpoint the
+    unauthenticated profile can't see is reported, as is an unauthenticated
+    profile that sees what a logged-in lower role is refused. Pages that
+    differ only by whose data they show (a username in a shared layout)
+    are not the same content. URLs are reduced to one per endpoint template
+    (numeric/UUID/hex path segments and query values collapsed) before
+    anything is sent.
+    """
+
+    ID_SEGMENT = re.compile(
+        r"^(?:\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+        r"|[0-9a-fA-F]{12,}|[A-Za-z0-9_-]{24,})$"
+    )
+    ANONYMOUS = 'anonymous'
+
+    def __init__(self, client, sessions, anonymous=True):
+        self.client = client
+        self.sessions = self.validate(sessions)
+        if anonymous and not any(s.get('name') == self.ANONYMOUS for s in self.sessions):
+            self.sessions.append({'name': self.ANONYMOUS})
+        if len(self.sessions) < 2:
+            raise ValueError("Need at least two session profiles")
+        # Replays must be stateless: never keep cookies a response sets
+        self.client.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        self.stats = {'urls': 0, 'endpoints': 0, 'requests': 0, 'errors': 0, 'findings': 0}
+
+    @staticmethod
+    def validate(sessions):
+        """Copies of the session profiles, ``ValueError`` on a malformed one"""
+        if not isinstance(sessions, (list, tuple)):
+            raise ValueError("Sessions must be a list of profiles")
+        profiles, names = [], set()
+        for position, session in enumerate(sessions, 1):
+            if not isinstance(session, dict):
+                raise ValueError(f"Session {position} is not a mapping")
+            name = session.get('name')
+            if not isinstance(name, str) or not name.strip():
+                raise ValueError(f"Session {position} has no name")
+            if name in names:
+                raise ValueError(f"Duplicate session name: {name}")
+            if not isinstance(session.get('headers') or {}, dict):
+                raise ValueError(f"Session {name}: headers must be a mapping")
+            if not isinstance(session.get('cookies') or '', (str, dict)):
+                raise ValueError(f"Session {name}: cookies must be a string or a mapping")
+            names.add(name)
+            profiles.append(dict(session))
+        return profiles
+
+    @classmethod
+    def template(cls, url):
+        """Endpoint template of a URL, e.g. ``host/users/{id}?fields&id``"""
+        parts = urlsplit(url)
+        path = '/'.join('{id}' if cls.ID_SEGMENT.match(segment) else segment
+                        for segment in parts.path.split('/'))
+        names = sorted({name for name, _ in parse_qsl(parts.query, keep_blank_values=True)})
+        return f"{parts.netloc.lower()}{path}" + (f"?{'&'.join(names)}" if names else "")
+
+    def unique(self, urls):
+        """First URL seen for every endpoint template"""
+        seen = set()
+        for url in urls:
+            url = url.strip()
+            if not url.startswith('http'):
+                continue
+            self.stats['urls'] += 1
+            key = self.template(url)
+            if key not in seen:
+                seen.add(key)
+                self.stats['endpoints'] += 1
+                yield url
+
+    @staticmethod
+    def headers_for(session):
+        headers = dict(session.get('headers') or {})
+        cookies = session.get('cookies')
+        if isinstance(cookies, dict):
+            cookies = '; '.join(f"{name}={value}" for name, value in cookies.items())
+        if cookies:
+            headers['Cookie'] = cookies
+        return headers
+
+    def analyze(self, url, responses):
+        """Matrix row and findings for one endpoint"""
+        names = [session['name'] for session in self.sessions]
+        row = {'url': url, 'template': self.template(url), 'statuses': {}, 'similarity': {},
+               'verdict': 'consistent', 'findings': []}
+        for index, name in enumerate(names):
+            response = responses.get(index)
+            row['statuses'][name] = response.status_code if response is not None else None
+
+        reference = [r for r in (responses.get(0), responses.get('calibration')) if r is not None]
+        if not reference:
+            row['verdict'] = 'error'
+            return row
+        diff = ResponseDiff().calibrate(reference)
+        same, refused = {}, {}
+        for index, name in enumerate(names[1:], 1):
+            response = responses.get(index)
+            if response is None:
+                continue
+            result = diff.compare(response)
+            row['similarity'][name] = result['similarity']
+            same[name] = 200 <= response.status_code < 300 and result['identical']
+            refused[name] = not 200 <= response.status_code < 300 or result['changed']
+
+        if not 200 <= reference[0].status_code < 300:
+            row['verdict'] = 'reference denied'
+            return row
+
+        anonymous = same.get(self.ANONYMOUS) if self.ANONYMOUS in names else None
+        if anonymous:
+            refused = [name for name in names[1:] if name != self.ANONYMOUS and refused.get(name)]
+            if refused:
+                row['findings'].append({
+                    'session': self.ANONYMOUS, 'type': "Unauthenticated Access",
+                    'detail': f"unauthenticated request gets the {names[0]} response that "
+                              f"{', '.join(refused)} {'is' if len(refused) == 1 else 'are'} refused",
+                })
+            row['verdict'] = 'public'
+        else:
+            for name in names[1:]:
+                if name != self.ANONYMOUS and same.get(name):
+                    row['findings'].append({
+                        'session': name, 'type': "Broken Access Control",
+                        'detail': f"{name} gets the same response as {names[0]}",
+                    })
+        if row['findings']:
+            row['verdict'] = 'vulnerable'
+            self.stats['findings'] += len(row['findings'])
+        return row
+
+    def run(self, urls):
+        """Replay every unique endpoint under every session, yields matrix rows"""
+        expected = len(self.sessions) + 1
+        headers = [self.headers_for(session) for session in self.sessions]
+        pending = {}
+
+        def jobs():
+            # All sessions of one endpoint are queued together, so endpoints
+            # complete (and are released) in roughly the order they started
+            for url in self.unique(urls):
+                pending[url] = {}
+                for index in range(len(self.sessions)):
+                    yield url, index
+                yield url, 'calibration'
+
+        def send(job):
+            url, index = job
+            return self.client.get(url, headers=headers[0 if index == 'calibration' else index])
+
+        for (url, index), response in self.client.map(jobs(), send=send):
+            self.stats['requests'] += 1
+            if response is None:
+                self.stats['errors'] += 1
+            responses = pending[url]
+            responses[index] = response
+            if len(responses) == expected:
+                del pending[url]
+                yield self.analyze(url, responses)
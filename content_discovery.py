@@ -0,0 +1,120 @@
+"""
+Content and API endpoint discovery for Parameter Bug Hunter Pro
+"""
+
+import secrets
+import threading
+from collections import Counter
+from urllib.parse import urlparse
+
+
+class ContentDiscovery:
+    """Wordlist-driven path discovery with soft-404 calibration
+
+    Before a host is scanned, a few random paths are requested and their
+    response fingerprints (status, words, lines, normalised redirect) become
+    that host's "not found" clusters. Hits are filtered by cluster instead of
+    by status code, and any fingerprint that keeps repeating during the scan
+    is treated as a wildcard cluster as well.
+    """
+
+    # Random-path shapes used for calibration, ``{r}`` is a random token
+    CALIBRATION_PATHS = ['{r}', '{r}/', '{r}.php', '.{r}', 'api/{r}', '{r}.json']
+
+    # Same defaults as ffuf's matcher
+    MATCH_STATUSES = {200, 201, 202, 203, 204, 301, 302, 307, 308, 401, 403, 405, 500}
+
+    def __init__(self, client, auto_cluster_threshold=25):
+        self.client = client
+        self.auto_cluster_threshold = auto_cluster_threshold
+        self.requests_sent = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(response, path):
+        """Fingerprint a response, ignoring reflections of the requested path"""
+        body = response.text
+        if path:
+            body = body.replace(path, '')
+        location = response.headers.get('Location', '')
+        if path and location:
+            location = location.replace(path, '{path}')
+        return (response.status_code, len(body.split()), body.count('\n'), location)
+
+    @staticmethod
+    def join(base, path):
+        return base.rstrip('/') + '/' + path.lstrip('/')
+
+    def calibrate(self, base):
+        """Learn a host's wildcard / soft-404 fingerprints from random paths"""
+        clusters = set()
+        for template in self.CALIBRATION_PATHS:
+            path = template.format(r=secrets.token_hex(8))
+            self.requests_sent += 1
+            response = self.client.get(self.join(base, path))
+            if response is not None:
+                clusters.add(self.fingerprint(response, path))
+        return clusters
+
+    def scan(self, bases, paths, on_hit=None):
+        """Discover paths on every base URL
+
+        ``paths`` is iterated once and streamed to all hosts, interleaved so
+        no single host receives the whole burst. Returns the hits that
+        survive both calibration and repeated-fingerprint filtering.
+        """
+        bases = [base.rstrip('/') for base in bases]
+        calibration = {base: self.calibrate(base) for base in bases}
+        seen = Counter()
+        hits = []
+
+        def jobs():
+            for path in paths:
+                path = path.strip()
+                if path and not path.startswith('#'):
+                    for base in bases:
+                        yield base, path
+
+        def send(job):
+            base, path = job
+            with self._lock:
+                self.requests_sent += 1
+            return self.client.get(self.join(base, path))
+
+        for (base, path), response in self.client.map(jobs(), send=send):
+            if response is None or response.status_code not in self.MATCH_STATUSES:
+                continue
+            fp = self.fingerprint(response, path)
+            if fp in calibration[base]:
+                continue
+
+            with self._lock:
+                seen[(base, fp)] += 1
+                if seen[(base, fp)] > self.auto_cluster_threshold:
+                    continue
+
+            hit = {
+                'url': self.join(base, path),
+                'status': response.status_code,
+                'words': fp[1],
+                'lines': fp[2],
+                'length': len(response.content),
+                'fingerprint': fp,
+                'base': base,
+            }
+            hits.append(hit)
+            if on_hit:
+                on_hit(hit)
+
+        # Drop clusters that turned out to be wildcards mid-scan
+        return [hit for hit in hits
+                if seen[(hit['base'], hit['fingerprint'])] <= self.auto_cluster_threshold]
+
+    @staticmethod
+    def store_targets(db, hits, discovered_at):
+        """Insert hits into the ``targets`` table"""
+        db.executemany(
+            "INSERT OR IGNORE INTO targets (url, domain, discovered_at) VALUES (?, ?, ?)",
+            ((hit['url'], urlparse(hit['url']).hostname, discovered_at) for hit in hits)
+        )
+        db.commit()
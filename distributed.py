@@ -0,0 +1,400 @@
+"""
+Coordinator/worker distributed scanning for Parameter Bug Hunter Pro
+"""
+
+import os
+import json
+import time
+import socket
+import sqlite3
+import secrets
+import threading
+import socketserver
+from collections import OrderedDict
+from datetime import datetime
+
+from utils import Utils
+
+
+class JobQueue:
+    """Durable job queue with leases, stored in a SQLite file
+
+    Every operation opens its own connection and claims jobs inside
+    ``BEGIN IMMEDIATE``, so any number of worker processes (or hosts sharing
+    the filesystem) can lease from the same file. Leases that are not
+    renewed by a heartbeat expire and the job goes back to ``pending``.
+    """
+
+    def __init__(self, path, max_attempts=3):
+        self.path = str(path)
+        self.max_attempts = max_attempts
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY,
+                    kind TEXT,
+                    payload TEXT,
+                    status TEXT DEFAULT 'pending',
+                    worker TEXT,
+                    lease_expires REAL,
+                    attempts INTEGER DEFAULT 0,
+                    result TEXT,
+                    error TEXT,
+                    merged BOOLEAN DEFAULT 0,
+                    created_at TIMESTAMP,
+                    updated_at TIMESTAMP
+                )
+            ''')
+            db.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id)')
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.execute("PRAGMA busy_timeout=30000")
+        return _Transaction(db)
+
+    def enqueue(self, kind, payloads):
+        """Add one job per payload, returns the number of jobs added"""
+        now = datetime.now().isoformat()
+        rows = [(kind, json.dumps(payload), now, now) for payload in payloads]
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            db.executemany(
+                "INSERT INTO jobs (kind, payload, created_at, updated_at) VALUES (?, ?, ?, ?)", rows
+            )
+        return len(rows)
+
+    def requeue_expired(self, db=None):
+        """Return jobs whose lease ran out to the pending state
+
+        A job that has already been leased ``max_attempts`` times is marked
+        failed instead: it most likely crashes the worker running it.
+        """
+        if db is None:
+            with self._connect() as db:
+                db.execute("BEGIN IMMEDIATE")
+                return self.requeue_expired(db)
+        now = time.time()
+        db.execute(
+            "UPDATE jobs SET status = 'failed', worker = NULL, lease_expires = NULL, "
+            "error = COALESCE(error, 'lease expired'), updated_at = ? "
+            "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+            (datetime.now().isoformat(), now, self.max_attempts)
+        )
+        return db.execute(
+            "UPDATE jobs SET status = 'pending', worker = NULL, lease_expires = NULL "
+            "WHERE status = 'leased' AND lease_expires < ?", (now,)
+        ).rowcount
+
+    def lease(self, worker, lease_seconds=60):
+        """Claim the oldest pending job, or ``None`` when there is none"""
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            self.requeue_expired(db)
+            row = db.execute(
+                "SELECT id, kind, payload FROM jobs WHERE status = 'pending' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE jobs SET status = 'leased', worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (worker, time.time() + lease_seconds, datetime.now().isoformat(), row[0])
+            )
+        return {'id': row[0], 'kind': row[1], 'payload': json.loads(row[2])}
+
+    def heartbeat(self, job_id, worker, lease_seconds=60):
+        """Extend a lease; ``False`` means the job was lost to another worker"""
+        with self._connect() as db:
+            return db.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                (time.time() + lease_seconds, job_id, worker)
+            ).rowcount == 1
+
+    def complete(self, job_id, worker, result):
+        """Store a job's result if the worker still holds the lease"""
+        with self._connect() as db:
+            return db.execute(
+                "UPDATE jobs SET status = 'done', result = ?, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (json.dumps(result), datetime.now().isoformat(), job_id, worker)
+            ).rowcount == 1
+
+    def fail(self, job_id, worker, error):
+        """Record a failure, requeueing until ``max_attempts`` is reached"""
+        with self._connect() as db:
+            return db.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts < ? THEN 'pending' ELSE 'failed' END, "
+                "worker = NULL, lease_expires = NULL, error = ?, updated_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (self.max_attempts, str(error), datetime.now().isoformat(), job_id, worker)
+            ).rowcount == 1
+
+    def unmerged_results(self):
+        """Finished jobs whose results have not been merged yet"""
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT id, kind, result FROM jobs WHERE status = 'done' AND merged = 0 ORDER BY id"
+            ).fetchall()
+        return [(job_id, kind, json.loads(result)) for job_id, kind, result in rows]
+
+    def mark_merged(self, job_ids):
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            db.executemany("UPDATE jobs SET merged = 1 WHERE id = ?", [(i,) for i in job_ids])
+
+    def counts(self):
+        """Job counts by status"""
+        with self._connect() as db:
+            return dict(db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+
+class _Transaction:
+    """Context manager that commits (or rolls back) and closes a connection"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        return self.db
+
+    def __exit__(self, exc_type, *exc):
+        if self.db.in_transaction:
+            self.db.execute("ROLLBACK" if exc_type else "COMMIT")
+        self.db.close()
+
+
+def run_job(job, config):
+    """Execute one job and return its JSON-serialisable result"""
+    from http_client import HttpClient
+    from reflection_scanner import ReflectionScanner
+    from timing_oracle import TimingOracle
+
+    payload = job['payload']
+    if job['kind'] == 'extract':
+        return {'pairs': sorted(Utils.extract_parameters(payload['urls']))}
+    if job['kind'] == 'reflection':
+        return ReflectionScanner(HttpClient(config)).scan(payload['targets'])
+    if job['kind'] == 'timing':
+        return {'findings': TimingOracle(HttpClient(config)).scan(payload['targets'])}
+    raise ValueError(f"Unknown job kind: {job['kind']}")
+
+
+class Worker:
+    """Lease jobs, keep them alive with heartbeats and report results"""
+
+    def __init__(self, queue, config, worker_id=None, lease_seconds=60, poll_interval=2):
+        self.queue = queue
+        self.config = config
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.processed = 0
+
+    def _heartbeat(self, job_id, stop):
+        while not stop.wait(self.lease_seconds / 3):
+            if not self.queue.heartbeat(job_id, self.worker_id, self.lease_seconds):
+                return
+
+    def run(self, exit_when_idle=True, max_jobs=None):
+        """Process jobs until the queue is drained (or forever)"""
+        while max_jobs is None or self.processed < max_jobs:
+            job = self.queue.lease(self.worker_id, self.lease_seconds)
+            if job is None:
+                if exit_when_idle:
+                    break
+                time.sleep(self.poll_interval)
+                continue
+
+            stop = threading.Event()
+            beat = threading.Thread(target=self._heartbeat, args=(job['id'], stop), daemon=True)
+            beat.start()
+            try:
+                result = run_job(job, self.config)
+                self.queue.complete(job['id'], self.worker_id, result)
+            except Exception as e:
+                self.queue.fail(job['id'], self.worker_id, f"{type(e).__name__}: {e}")
+            finally:
+                stop.set()
+                beat.join()
+            self.processed += 1
+        return self.processed
+
+
+class Coordinator:
+    """Split a project into jobs and merge worker results into results.db"""
+
+    def __init__(self, project_path, queue=None):
+        self.project_path = project_path
+        self.queue = queue or JobQueue(project_path / "queue.db")
+
+    def enqueue_extraction(self, urls, chunk_size=5000):
+        """One ``extract`` job per chunk of URLs"""
+        chunk, jobs = [], 0
+        for url in urls:
+            chunk.append(url)
+            if len(chunk) >= chunk_size:
+                jobs += self.queue.enqueue('extract', [{'urls': chunk}])
+                chunk = []
+        if chunk:
+            jobs += self.queue.enqueue('extract', [{'urls': chunk}])
+        return jobs
+
+    def enqueue_tests(self, kind, targets, params_per_job=200):
+        """Split ``{endpoint: [params]}`` into test jobs of bounded size"""
+        payloads, current, size = [], {}, 0
+        for endpoint, params in targets.items():
+            current[endpoint] = params
+            size += len(params)
+            if size >= params_per_job:
+                payloads.append({'targets': current})
+                current, size = {}, 0
+        if current:
+            payloads.append({'targets': current})
+        return self.queue.enqueue(kind, payloads)
+
+    def merge(self, db):
+        """Merge finished results into the project database in one transaction
+
+        Inserts skip rows that are already there, so a batch merged into
+        results.db but not yet marked merged in the queue (a crash between
+        the two commits) is harmless to merge again.
+        """
+        results = self.queue.unmerged_results()
+        if not results:
+            return 0
+
+        now = datetime.now().isoformat()
+        cursor = db.cursor()
+        for _, kind, result in results:
+            if kind == 'extract':
+                cursor.executemany(
+                    "INSERT INTO parameters (url, parameter, discovered_at) SELECT ?, ?, ? "
+                    "WHERE NOT EXISTS (SELECT 1 FROM parameters WHERE url = ? AND parameter = ?)",
+                    ((endpoint, param, now, endpoint, param) for endpoint, param in result['pairs'])
+                )
+                continue
+
+            for finding in result['findings']:
+                if kind == 'reflection':
+                    vuln_type, severity, poc = f"Reflected XSS ({finding['context']})", "High", finding['url']
+                else:
+                    vuln_type, severity, poc = f"Time-based Blind SQLi ({finding['dbms']})", "Critical", finding['poc']
+                cursor.execute(
+                    "INSERT INTO vulnerabilities (parameter_id, vulnerability_type, severity, poc, verified, discovered_at) "
+                    "SELECT (SELECT id FROM parameters WHERE url = ? AND parameter = ?), ?, ?, ?, 0, ? "
+                    "WHERE NOT EXISTS (SELECT 1 FROM vulnerabilities WHERE vulnerability_type = ? AND poc IS ?)",
+                    (finding['endpoint'], finding['parameter'], vuln_type, severity, poc, now, vuln_type, poc)
+                )
+        db.commit()
+        self.queue.mark_merged([job_id for job_id, _, _ in results])
+        return len(results)
+
+
+class QueueServer(socketserver.ThreadingTCPServer):
+    """Expose a ``JobQueue`` to workers on other hosts over TCP
+
+    One JSON request per line: ``{"token", "id", "method", "args"}``. Only
+    the worker-side methods are callable. Replies to recent request ids are
+    remembered, so a client that lost a reply and resends the same request
+    gets the original answer instead of, say, leasing a second job.
+    """
+
+    allow_reuse_address = True
+    daemon_threads = True
+    METHODS = {'lease', 'heartbeat', 'complete', 'fail'}
+    REPLY_CACHE = 1024
+
+    def __init__(self, address, queue, token=None):
+        self.queue = queue
+        self.token = token or secrets.token_hex(16)
+        self._replies = OrderedDict()
+        self._replies_lock = threading.Lock()
+        super().__init__(address, _QueueRequestHandler)
+
+    def dispatch(self, request):
+        """Run one authenticated request, replaying the reply for a resent id"""
+        request_id = request.get('id')
+        with self._replies_lock:
+            if request_id is not None and request_id in self._replies:
+                return self._replies[request_id]
+            method = getattr(self.queue, request['method'])
+            reply = {'result': method(*request.get('args', []))}
+            if request_id is not None:
+                self._replies[request_id] = reply
+                while len(self._replies) > self.REPLY_CACHE:
+                    self._replies.popitem(last=False)
+        return reply
+
+
+class _QueueRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if not secrets.compare_digest(str(request.get('token', '')), self.server.token):
+                    reply = {'error': 'invalid token'}
+                elif request.get('method') not in QueueServer.METHODS:
+                    reply = {'error': 'unknown method'}
+                else:
+                    reply = self.server.dispatch(request)
+            except Exception as e:
+                reply = {'error': f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(reply).encode() + b"\n")
+
+
+class RemoteQueue:
+    """Client side of ``QueueServer`` with the worker-facing JobQueue API"""
+
+    def __init__(self, address, token, timeout=30):
+        host, _, port = address.rpartition(':')
+        self.address = (host or '127.0.0.1', int(port))
+        self.token = token
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock = None
+        self._file = None
+
+    def _call(self, method, *args):
+        # The id stays the same across the retry so the server can replay its reply
+        request = json.dumps({'token': self.token, 'id': secrets.token_hex(8),
+                              'method': method, 'args': args}).encode() + b"\n"
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._sock = socket.create_connection(self.address, timeout=self.timeout)
+                        self._file = self._sock.makefile('rwb')
+                    self._file.write(request)
+                    self._file.flush()
+                    reply = json.loads(self._file.readline())
+                    break
+                except (OSError, ValueError):
+                    self.close()
+                    if attempt:
+                        raise
+        if 'error' in reply:
+            raise RuntimeError(reply['error'])
+        return reply['result']
+
+    def close(self):
+        """Drop the connection; the next call reconnects"""
+        for handle in (self._file, self._sock):
+            if handle is not None:
+                try:
+                    handle.close()
+                except OSError:
+                    pass
+        self._sock = self._file = None
+
+    def lease(self, worker, lease_seconds=60):
+        return self._call('lease', worker, lease_seconds)
+
+    def heartbeat(self, job_id, worker, lease_seconds=60):
+        return self._call('heartbeat', job_id, worker, lease_seconds)
+
+    def complete(self, job_id, worker, result):
+        return self._call('complete', job_id, worker, result)
+
+    def fail(self, job_id, worker, error):
+        return self._call('fail', job_id, worker, error)
@@ -2,46 +2,14 @@
 Error Handler untuk Parameter Bug Hunter Pro
 """
 
-import sys
-import traceback
-from datetime import datetime
 from colorama import Fore, Style
+from scan_logger import ScanLogger
 
 class ErrorHandler:
     @staticmethod
     def handle_error(error, context=""):
-        """Handle and log errors gracefully"""
-        error_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        error_msg = f"""
-{Fore.RED}╔═══════════════════════════════════════════════════════════╗
-║                     ERROR DETECTED                          ║
-╚═══════════════════════════════════════════════════════════╝{Style.RESET_ALL}
-
-{Fore.YELLOW}Timestamp: {error_time}{Style.RESET_ALL}
-{Fore.YELLOW}Context: {context}{Style.RESET_ALL}
-{Fore.RED}Error Type: {type(error).__name__}{Style.RESET_ALL}
-{Fore.RED}Error Message: {str(error)}{Style.RESET_ALL}
-
-{Fore.CYAN}Traceback:{Style.RESET_ALL}
-{traceback.format_exc()}
-
-{Fore.GREEN}Suggested Actions:{Style.RESET_ALL}
-1. Check if all required tools are installed
-2. Verify internet connection
-3. Check API keys configuration
-4. Ensure sufficient permissions
-"""
-        print(error_msg)
-        
-        # Log to file
-        with open("error_log.txt", "a") as f:
-            f.write(f"\n{'='*60}\n")
-            f.write(f"Time: {error_time}\n")
-            f.write(f"Context: {context}\n")
-            f.write(f"Error: {type(error).__name__} - {str(error)}\n")
-            f.write(f"Traceback:\n{traceback.format_exc()}\n")
-        
+        """Log an error through the shared background logger"""
+        ScanLogger.default().error(error, context=context)
         return False
     
     @staticmethod
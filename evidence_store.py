@@ -0,0 +1,264 @@
+"""
+Content-addressed evidence storage for Parameter Bug Hunter Pro
+"""
+
+import os
+import json
+import zlib
+import queue
+import atexit
+import struct
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+from pathlib import Path
+
+
+class EvidenceStore:
+    """Deduplicated, compressed evidence packed into segment files
+
+    Every blob is addressed by its SHA-256 digest, so the same response body
+    captured by many findings is stored once. Blobs are zlib-compressed
+    (kept raw when that does not pay off, e.g. PNG screenshots) and appended
+    to ``pack_NNNNNNNN.dat`` files; ``index.db`` maps digests to their pack
+    and offset. ``put()`` returns the digest straight away (blocking only when
+    the writer is ``max_pending`` blobs behind) and a background thread
+    writes queued blobs in batches, one fsync and one index transaction per
+    batch.
+    """
+
+    RECORD = struct.Struct("<32sBII")   # digest, codec, stored length, original size
+    CODEC_RAW = 0
+    CODEC_ZLIB = 1
+
+    _open_stores = {}
+    _open_lock = threading.Lock()
+
+    def __init__(self, path, pack_size=64 * 1024 * 1024, batch_size=256, max_pending=4096):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.pack_size = pack_size
+        self.batch_size = batch_size
+        self.stats = {'stored': 0, 'deduplicated': 0, 'bytes_in': 0, 'bytes_stored': 0, 'failed': 0}
+        self._error = None
+
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute('''
+                CREATE TABLE IF NOT EXISTS blobs (
+                    digest TEXT PRIMARY KEY,
+                    pack INTEGER,
+                    offset INTEGER,
+                    length INTEGER,
+                    size INTEGER,
+                    codec INTEGER,
+                    media_type TEXT,
+                    created_at TIMESTAMP
+                ) WITHOUT ROWID
+            ''')
+            db.execute('''
+                CREATE TABLE IF NOT EXISTS names (
+                    name TEXT,
+                    digest TEXT,
+                    created_at TIMESTAMP
+                )
+            ''')
+            db.execute('CREATE INDEX IF NOT EXISTS idx_names_name ON names (name)')
+            # Digests are kept in memory so dedup checks never touch the disk
+            self._known = {row[0] for row in db.execute("SELECT digest FROM blobs")}
+
+        self._pending = {}
+        # Bounded, so a producer outrunning the disk waits instead of piling up blobs
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    @classmethod
+    def open(cls, path):
+        """Shared store per directory, so callers do not each start a writer"""
+        key = Path(path).resolve()
+        with cls._open_lock:
+            store = cls._open_stores.get(key)
+            if store is None or store._writer is None:
+                store = cls._open_stores[key] = cls(path)
+            return store
+
+    def _connect(self):
+        return sqlite3.connect(self.path / "index.db", timeout=30)
+
+    @staticmethod
+    def encode(data):
+        """Bytes for a dict/list (canonical JSON), str or bytes value"""
+        if isinstance(data, (dict, list)):
+            return json.dumps(data, sort_keys=True, separators=(',', ':'), default=str).encode(), 'application/json'
+        if isinstance(data, str):
+            return data.encode(), 'text/plain'
+        return bytes(data), 'application/octet-stream'
+
+    def put(self, data, media_type=None, name=None):
+        """Queue a blob for writing and return its digest"""
+        blob, default_type = self.encode(data)
+        digest = hashlib.sha256(blob).hexdigest()
+        self.stats['bytes_in'] += len(blob)
+        with self._lock:
+            if self.contains(digest):
+                self.stats['deduplicated'] += 1
+                blob = None
+            else:
+                self._pending[digest] = blob
+        self._queue.put((digest, blob, media_type or default_type, name))
+        return digest
+
+    def contains(self, digest):
+        return digest in self._known or digest in self._pending
+
+    def get(self, digest):
+        """Original bytes of a blob, or ``None`` when it is unknown"""
+        blob = self._pending.get(digest)
+        if blob is not None:
+            return blob
+        with self._connect() as db:
+            row = db.execute("SELECT pack, offset, length, codec FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        if row is None:
+            return None
+        pack, offset, length, codec = row
+        with open(self._pack_path(pack), 'rb') as f:
+            f.seek(offset)
+            data = f.read(length)
+        return zlib.decompress(data) if codec == self.CODEC_ZLIB else data
+
+    def get_json(self, digest):
+        blob = self.get(digest)
+        return json.loads(blob) if blob is not None else None
+
+    def find(self, name):
+        """Digests stored under a name, newest first"""
+        with self._connect() as db:
+            return [row[0] for row in db.execute(
+                "SELECT digest FROM names WHERE name = ? ORDER BY rowid DESC", (name,))]
+
+    def _pack_path(self, number):
+        return self.path / f"pack_{number:08d}.dat"
+
+    def _current_pack(self):
+        numbers = [int(p.stem.split('_')[1]) for p in self.path.glob("pack_*.dat")]
+        number = max(numbers, default=1)
+        if self._pack_path(number).exists() and self._pack_path(number).stat().st_size >= self.pack_size:
+            number += 1
+        return number
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            batch, stop = [item], False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.task_done()
+                    stop = True
+                    break
+                batch.append(item)
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                # Keep the writer alive so flush() returns; it raises this
+                self._error = e
+                self.stats['failed'] += len(batch)
+                with self._lock:
+                    for digest, _, _, _ in batch:
+                        self._pending.pop(digest, None)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _write_batch(self, batch):
+        now = datetime.now().isoformat()
+        rows, names = [], []
+        number = self._current_pack()
+        with open(self._pack_path(number), 'ab') as f:
+            for digest, blob, media_type, name in batch:
+                if name:
+                    names.append((name, digest, now))
+                if blob is None:
+                    continue
+                compressed = zlib.compress(blob, 6)
+                codec, stored = (self.CODEC_ZLIB, compressed) if len(compressed) < len(blob) * 0.9 else (self.CODEC_RAW, blob)
+                f.write(self.RECORD.pack(bytes.fromhex(digest), codec, len(stored), len(blob)))
+                rows.append((digest, number, f.tell(), len(stored), len(blob), codec, media_type, now))
+                f.write(stored)
+                self.stats['stored'] += 1
+                self.stats['bytes_stored'] += len(stored)
+            f.flush()
+            os.fsync(f.fileno())
+
+        with self._connect() as db:
+            db.executemany("INSERT OR IGNORE INTO blobs VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            db.executemany("INSERT INTO names (name, digest, created_at) VALUES (?, ?, ?)", names)
+        with self._lock:
+            for row in rows:
+                self._known.add(row[0])
+                self._pending.pop(row[0], None)
+
+    def flush(self):
+        """Block until every queued blob is on disk
+
+        Raises the last write error (disk full, permissions) since the
+        previous flush; the blobs of a failed batch are not stored.
+        """
+        self._queue.join()
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def close(self):
+        if self._writer is None:
+            return
+        self._queue.put(None)
+        self._writer.join()
+        self._writer = None
+
+    def rebuild_index(self):
+        """Recreate ``index.db`` rows by walking the pack files"""
+        self.flush()
+        count = 0
+        with self._connect() as db:
+            for pack_path in sorted(self.path.glob("pack_*.dat")):
+                number = int(pack_path.stem.split('_')[1])
+                pack_size = pack_path.stat().st_size
+                with open(pack_path, 'rb') as f:
+                    while True:
+                        header = f.read(self.RECORD.size)
+                        if len(header) < self.RECORD.size:
+                            break
+                        digest, codec, length, size = self.RECORD.unpack(header)
+                        offset = f.tell()
+                        if offset + length > pack_size:
+                            break   # torn write at the end of the pack
+                        f.seek(length, os.SEEK_CUR)
+                        db.execute(
+                            "INSERT OR IGNORE INTO blobs (digest, pack, offset, length, size, codec) "
+                            "VALUES (?, ?, ?, ?, ?, ?)", (digest.hex(), number, offset, length, size, codec)
+                        )
+                        self._known.add(digest.hex())
+                        count += 1
+        return count
+
+    def summary(self):
+        """Blob count and on-disk versus original size"""
+        with self._connect() as db:
+            count, stored, original = db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(length), 0), COALESCE(SUM(size), 0) FROM blobs"
+            ).fetchone()
+        return {'blobs': count, 'stored_bytes': stored, 'original_bytes': original,
+                'packs': len(list(self.path.glob("pack_*.dat")))}
@@ -0,0 +1,177 @@
+"""
+Parameter value fuzzing with ffuf for Parameter Bug Hunter Pro
+"""
+
+import json
+import base64
+import asyncio
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit, urlunsplit, parse_qsl, quote
+
+
+class FfufOrchestrator:
+    """Build, schedule and ingest ffuf value-fuzzing jobs
+
+    One job fuzzes one parameter of one endpoint with the wordlist chosen
+    for the parameter's classification. Jobs run through the shared
+    ToolRunner budget, and per-host lanes keep at most
+    ``host_concurrency`` ffuf processes on the same host, each capped at
+    ``host_rate / host_concurrency`` requests per second, so the whole
+    project can be fuzzed in one pass without hammering any single target.
+    ffuf's ``-json`` lines are ingested into ``fuzz_results`` in batches as
+    they stream in. Jobs are not cut off by the runner's timeout unless
+    ``timeout`` is set, since a wordlist's run time depends on its size.
+    """
+
+    def __init__(self, runner, db, payloads, wordlist_dir, host_rate=50, host_concurrency=1,
+                 threads=10, batch_size=500, wordlists=None, timeout=0):
+        self.runner = runner
+        self.db = db
+        self.payloads = payloads
+        self.wordlist_dir = Path(wordlist_dir)
+        # Config values; 0 or missing would divide by zero or start no lanes
+        self.host_rate = max(1, int(host_rate or 1))
+        self.host_concurrency = max(1, int(host_concurrency or 1))
+        self.timeout = timeout
+        self.threads = threads
+        self.batch_size = batch_size
+        # Optional {category: wordlist path} overrides from config
+        self.wordlists = wordlists or {}
+        self.stats = {'jobs': 0, 'results': 0, 'parse_errors': 0, 'failed_jobs': 0}
+        self._buffer = []
+        self._generated = {}
+
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS fuzz_results (
+                id INTEGER PRIMARY KEY,
+                parameter_id INTEGER,
+                url TEXT,
+                payload TEXT,
+                status INTEGER,
+                length INTEGER,
+                words INTEGER,
+                lines INTEGER,
+                content_type TEXT,
+                redirect TEXT,
+                duration_ms REAL,
+                discovered_at TIMESTAMP,
+                FOREIGN KEY (parameter_id) REFERENCES parameters (id)
+            )
+        ''')
+        self.db.commit()
+
+    def wordlist_for(self, category):
+        """Wordlist file for a classification category, generated on first use"""
+        if self.wordlists.get(category):
+            return Path(self.wordlists[category]).expanduser()
+        if category in self._generated:
+            return self._generated[category]
+
+        self.wordlist_dir.mkdir(parents=True, exist_ok=True)
+        path = self.wordlist_dir / f"{category.lower().replace('/', '_').replace(' ', '_')}.txt"
+        seen = set()
+        with open(path, 'w') as f:
+            for _, _, _, template in self.payloads.select(category):
+                # ffuf inserts words verbatim, so they go in URL-encoded
+                word = quote(self.payloads.render(template, "pbhfuzz"), safe='')
+                if word not in seen:
+                    seen.add(word)
+                    f.write(f"{word}\n")
+        self._generated[category] = path
+        return path
+
+    @staticmethod
+    def fuzz_url(endpoint, param):
+        """The endpoint with ``param`` set to ffuf's FUZZ keyword"""
+        parts = urlsplit(endpoint)
+        query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != param]
+        query_text = urlencode(query)
+        query_text = f"{query_text}&{quote(param)}=FUZZ" if query_text else f"{quote(param)}=FUZZ"
+        return urlunsplit(parts._replace(query=query_text))
+
+    def build_jobs(self, rows, classification):
+        """Jobs for ``(parameter_id, endpoint, param)`` rows"""
+        categories = {param: category for category, params in classification.items() for param in params}
+        for parameter_id, endpoint, param in rows:
+            category = categories.get(param, "Unknown")
+            yield {
+                'parameter_id': parameter_id,
+                'host': urlsplit(endpoint).netloc,
+                'category': category,
+                'url': self.fuzz_url(endpoint, param),
+                'wordlist': self.wordlist_for(category),
+            }
+
+    def build_args(self, job):
+        rate = max(1, self.host_rate // self.host_concurrency)
+        return ['-u', job['url'], '-w', job['wordlist'], '-json', '-s', '-mc', 'all', '-ac',
+                '-t', self.threads, '-rate', rate]
+
+    def _ingest(self, job, line):
+        line = line.strip()
+        if not line.startswith('{'):
+            return
+        try:
+            result = json.loads(line)
+        except ValueError:
+            self.stats['parse_errors'] += 1
+            return
+        payload = (result.get('input') or {}).get('FUZZ', '')
+        try:
+            # ffuf encodes input values as base64 byte strings
+            payload = base64.b64decode(payload, validate=True).decode('utf-8', 'replace')
+        except ValueError:
+            pass
+        self._buffer.append((
+            job['parameter_id'], result.get('url'), payload, result.get('status'), result.get('length'),
+            result.get('words'), result.get('lines'), result.get('content-type'),
+            result.get('redirectlocation'), (result.get('duration') or 0) / 1e6, datetime.now().isoformat()
+        ))
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        self.db.executemany(
+            "INSERT INTO fuzz_results (parameter_id, url, payload, status, length, words, lines, "
+            "content_type, redirect, duration_ms, discovered_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            self._buffer
+        )
+        self.db.commit()
+        self.stats['results'] += len(self._buffer)
+        self._buffer = []
+
+    async def _run(self, jobs, on_done=None):
+        # host_concurrency lanes per host, each working through that host's
+        # jobs in turn; the runner's budget bounds the total process count
+        by_host = {}
+        for job in jobs:
+            by_host.setdefault(job['host'], []).append(job)
+
+        results = []
+
+        async def lane(queue):
+            while queue:
+                job = queue.pop()
+                result = await self.runner.run('ffuf', *self.build_args(job), timeout=self.timeout,
+                                               on_stdout=lambda line, job=job: self._ingest(job, line))
+                if not result.ok:
+                    self.stats['failed_jobs'] += 1
+                results.append(result)
+                if on_done:
+                    on_done(job, result)
+
+        await asyncio.gather(*(lane(queue) for queue in by_host.values()
+                               for _ in range(self.host_concurrency)))
+        return results
+
+    def run(self, jobs, on_done=None):
+        """Run every job and ingest results, returns the ToolResults"""
+        jobs = list(jobs)
+        self.stats['jobs'] += len(jobs)
+        try:
+            return asyncio.run(self._run(jobs, on_done))
+        finally:
+            self.flush()
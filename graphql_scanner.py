@@ -0,0 +1,197 @@
+"""
+GraphQL endpoint and schema analysis for Parameter Bug Hunter Pro
+"""
+
+import re
+import json
+from pathlib import Path
+from urllib.parse import urlparse
+
+from utils import Utils
+
+
+INTROSPECTION_QUERY = """
+query IntrospectionQuery {
+  __schema {
+    queryType { name }
+    mutationType { name }
+    types {
+      kind
+      name
+      fields(includeDeprecated: true) {
+        name
+        args { name type { kind name ofType { kind name ofType { kind name } } } }
+        type { kind name ofType { kind name ofType { kind name } } }
+      }
+    }
+  }
+}
+"""
+
+ENDPOINT_PATTERN = re.compile(r"/(graphql|graphiql|gql|api/graphql|v\d+/graphql|query)/?$", re.I)
+UNKNOWN_FIELD = re.compile(r"""Cannot query field ["'`]([^"'`]+)["'`] on type""")
+UNKNOWN_ARGUMENT = re.compile(r"""Unknown argument ["'`]([^"'`]+)["'`] on field""")
+
+
+class GraphQLScanner:
+    """Detect GraphQL endpoints and map their fields and arguments
+
+    Introspection runs once per endpoint and the schema is cached on disk.
+    When introspection is disabled, fields and arguments are enumerated by
+    validation errors: each query carries hundreds of aliased probes and,
+    when the server accepts array batching, several queries share one POST.
+    """
+
+    def __init__(self, client, cache_dir, aliases_per_query=100, queries_per_batch=10):
+        self.client = client
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.aliases_per_query = aliases_per_query
+        self.queries_per_batch = queries_per_batch
+        self.requests_sent = 0
+        self._batching = {}
+
+    @staticmethod
+    def candidate_endpoints(urls):
+        """Pick likely GraphQL endpoints out of a URL corpus"""
+        endpoints = set()
+        for url in urls:
+            parsed = urlparse(url.strip())
+            if parsed.scheme in ('http', 'https') and ENDPOINT_PATTERN.search(parsed.path):
+                endpoints.add(f"{parsed.scheme}://{parsed.netloc}{parsed.path}")
+        return sorted(endpoints)
+
+    def _post(self, endpoint, payload):
+        """POST a query (or a batch of queries) and decode the JSON reply"""
+        self.requests_sent += 1
+        response = self.client.post(endpoint, json=payload)
+        if response is None:
+            return None
+        try:
+            return response.json()
+        except ValueError:
+            return None
+
+    def is_graphql(self, endpoint):
+        """Confirm an endpoint answers GraphQL queries"""
+        reply = self._post(endpoint, {'query': '{__typename}'})
+        return isinstance(reply, dict) and ('data' in reply or 'errors' in reply)
+
+    def supports_batching(self, endpoint):
+        """Check whether the server accepts a JSON array of operations"""
+        if endpoint not in self._batching:
+            reply = self._post(endpoint, [{'query': '{__typename}'}, {'query': '{__typename}'}])
+            self._batching[endpoint] = isinstance(reply, list) and len(reply) == 2
+        return self._batching[endpoint]
+
+    def cache_path(self, endpoint):
+        parsed = urlparse(endpoint)
+        return self.cache_dir / Utils.sanitize_filename(f"{parsed.netloc}{parsed.path}.json")
+
+    def introspect(self, endpoint, refresh=False):
+        """Return the endpoint's schema, from cache unless ``refresh``"""
+        cache_file = self.cache_path(endpoint)
+        if cache_file.exists() and not refresh:
+            cached = Utils.load_json_file(cache_file)
+            if cached:
+                return cached
+
+        reply = self._post(endpoint, {'query': INTROSPECTION_QUERY})
+        schema = (reply or {}).get('data', {}) if isinstance(reply, dict) else {}
+        schema = (schema or {}).get('__schema')
+        if not schema:
+            return None
+
+        with open(cache_file, 'w') as f:
+            json.dump(schema, f)
+        return schema
+
+    @staticmethod
+    def schema_arguments(schema):
+        """Flatten root fields and their arguments from an introspected schema"""
+        roots = {}
+        for key in ('queryType', 'mutationType'):
+            if schema.get(key):
+                roots[schema[key]['name']] = 'mutation' if key == 'mutationType' else 'query'
+
+        results = {}
+        for gql_type in schema.get('types', []):
+            if gql_type.get('name') in roots:
+                for field in gql_type.get('fields') or []:
+                    name = field['name'] if roots[gql_type['name']] == 'query' else f"mutation.{field['name']}"
+                    results[name] = [arg['name'] for arg in field.get('args', [])]
+        return results
+
+    def _run_queries(self, endpoint, queries):
+        """Send queries, array-batched where possible, yielding replies in order"""
+        if self.supports_batching(endpoint):
+            for i in range(0, len(queries), self.queries_per_batch):
+                chunk = queries[i:i + self.queries_per_batch]
+                replies = self._post(endpoint, [{'query': q} for q in chunk])
+                if not isinstance(replies, list):
+                    replies = [None] * len(chunk)
+                yield from replies
+        else:
+            for query in queries:
+                yield self._post(endpoint, {'query': query})
+
+    @staticmethod
+    def _errors(reply):
+        if not isinstance(reply, dict):
+            return None
+        return [e.get('message', '') for e in reply.get('errors') or []]
+
+    @staticmethod
+    def _usable(reply, errors):
+        """Only trust replies that were validated, not rejected outright"""
+        if errors is None:
+            return False
+        if 'data' in reply or not errors:
+            return True
+        return any('field' in e.lower() or 'argument' in e.lower() for e in errors)
+
+    def enumerate_fields(self, endpoint, candidates):
+        """Find root query fields among candidates via aliased probes"""
+        candidates = [c for c in dict.fromkeys(candidates) if re.fullmatch(r"[_A-Za-z][_0-9A-Za-z]*", c)]
+        chunks = [candidates[i:i + self.aliases_per_query]
+                  for i in range(0, len(candidates), self.aliases_per_query)]
+        queries = ["{ " + " ".join(f"a{n}: {name}" for n, name in enumerate(chunk)) + " }"
+                   for chunk in chunks]
+
+        found = []
+        for chunk, reply in zip(chunks, self._run_queries(endpoint, queries)):
+            errors = self._errors(reply)
+            if not self._usable(reply, errors):
+                continue
+            missing = {m.group(1) for e in errors for m in [UNKNOWN_FIELD.search(e)] if m}
+            found.extend(name for name in chunk if name not in missing)
+        return found
+
+    def enumerate_arguments(self, endpoint, field, candidates):
+        """Find arguments of a root field via aliased probes"""
+        candidates = [c for c in dict.fromkeys(candidates) if re.fullmatch(r"[_A-Za-z][_0-9A-Za-z]*", c)]
+        chunks = [candidates[i:i + self.aliases_per_query]
+                  for i in range(0, len(candidates), self.aliases_per_query)]
+        queries = ["{ " + " ".join(f"a{n}: {field}({name}: 1) {{ __typename }}" for n, name in enumerate(chunk)) + " }"
+                   for chunk in chunks]
+
+        found = []
+        for chunk, reply in zip(chunks, self._run_queries(endpoint, queries)):
+            errors = self._errors(reply)
+            if not self._usable(reply, errors):
+                continue
+            unknown = {m.group(1) for e in errors for m in [UNKNOWN_ARGUMENT.search(e)] if m}
+            found.extend(name for name in chunk if name not in unknown)
+        return found
+
+    def analyze(self, endpoint, candidates=()):
+        """Map an endpoint's fields to arguments, introspecting first"""
+        schema = self.introspect(endpoint)
+        if schema:
+            return {'introspection': True, 'fields': self.schema_arguments(schema)}
+
+        candidates = list(candidates)
+        fields = {}
+        for field in self.enumerate_fields(endpoint, candidates):
+            fields[field] = self.enumerate_arguments(endpoint, field, candidates)
+        return {'introspection': False, 'fields': fields}
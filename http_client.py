@@ -0,0 +1,97 @@
+"""
+Pooled, concurrent HTTP client for Parameter Bug Hunter Pro
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+import urllib3
+
+from scan_logger import ScanLogger
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+
+class HttpClient:
+    """Shared HTTP layer for the scanners
+
+    A single ``requests.Session`` with a connection pool sized to the worker
+    count, so concurrent scans reuse keep-alive connections per host instead
+    of opening one per request.
+    """
+
+    USER_AGENT = 'ParameterBugHunter/2.0'
+
+    def __init__(self, config=None, workers=None, timeout=None, headers=None):
+        config = config or {}
+        http_config = config.get('http') or {}
+        self.workers = workers or http_config.get('workers', 20)
+        self.timeout = timeout or http_config.get('timeout', 10)
+        self.verify = http_config.get('verify_tls', False)
+        self.stats = {'requests': 0, 'errors': 0}
+        # request() runs on map()'s pool threads
+        self._stats_lock = threading.Lock()
+        self.log = ScanLogger.default()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['User-Agent'] = self.USER_AGENT
+        if headers:
+            self.session.headers.update(headers)
+        if config.get('proxy'):
+            self.session.proxies = {'http': config['proxy'], 'https': config['proxy']}
+
+    def request(self, method, url, **kwargs):
+        """Send one request, returning ``None`` on transport errors"""
+        kwargs.setdefault('timeout', self.timeout)
+        kwargs.setdefault('verify', self.verify)
+        kwargs.setdefault('allow_redirects', False)
+        with self._stats_lock:
+            self.stats['requests'] += 1
+        try:
+            return self.session.request(method, url, **kwargs)
+        except requests.RequestException as e:
+            with self._stats_lock:
+                self.stats['errors'] += 1
+            self.log.error(e, host=urlsplit(url).hostname, url=url)
+            return None
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def map(self, jobs, send=None):
+        """Run jobs concurrently and yield ``(job, result)`` as they finish
+
+        ``jobs`` is consumed lazily with a bounded number in flight, so it can
+        be a generator over millions of requests. By default each job is a
+        dict of ``request()`` keyword arguments; pass ``send`` to customise.
+        """
+        if send is None:
+            send = lambda job: self.request(**job)
+
+        def call(job):
+            return job, send(job)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = set()
+            for job in jobs:
+                pending.add(pool.submit(call, job))
+                if len(pending) >= self.workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+    def close(self):
+        self.session.close()
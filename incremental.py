@@ -0,0 +1,125 @@
+"""
+Incremental stage tracking for Parameter Bug Hunter Pro
+"""
+
+import json
+import hashlib
+from datetime import datetime
+
+
+class StageState:
+    """Remembers which inputs a pipeline stage has already processed
+
+    Each input record is reduced to a 64-bit BLAKE2b digest and kept in the
+    project database, keyed by stage. ``new()`` streams only records whose
+    digest has not been seen; ``commit()`` records them once the stage has
+    stored its output, so an interrupted run is simply redone. ``version``
+    identifies the stage's own logic (e.g. its classification rules): when
+    it changes, everything is processed again.
+    """
+
+    BATCH = 10000
+
+    def __init__(self, db, stage, version=""):
+        self.db = db
+        self.stage = stage
+        self.version = version
+        self._pending = []
+        self.inputs = 0
+        self._started = datetime.now().isoformat()
+
+        cursor = self.db.cursor()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS stage_inputs (
+                stage TEXT,
+                digest INTEGER,
+                PRIMARY KEY (stage, digest)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS stage_runs (
+                id INTEGER PRIMARY KEY,
+                stage TEXT,
+                version TEXT,
+                started_at TIMESTAMP,
+                finished_at TIMESTAMP,
+                inputs INTEGER,
+                new_inputs INTEGER,
+                summary TEXT
+            )
+        ''')
+
+        last = self.last_run()
+        if last is not None and last['version'] != version:
+            self.reset()
+
+    @staticmethod
+    def digest(record):
+        """Signed 64-bit digest that fits an SQLite INTEGER"""
+        return int.from_bytes(hashlib.blake2b(record.encode(), digest_size=8).digest(), 'little', signed=True)
+
+    def new(self, records):
+        """Yield records not processed by an earlier run of this stage"""
+        self.inputs = 0
+        cursor = self.db.cursor()
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS stage_batch (digest INTEGER PRIMARY KEY)")
+
+        batch = {}
+        for record in records:
+            self.inputs += 1
+            batch.setdefault(self.digest(record), record)
+            if len(batch) >= self.BATCH:
+                yield from self._unseen(cursor, batch)
+                batch = {}
+        if batch:
+            yield from self._unseen(cursor, batch)
+
+    def _unseen(self, cursor, batch):
+        cursor.execute("DELETE FROM stage_batch")
+        cursor.executemany("INSERT INTO stage_batch (digest) VALUES (?)", ((d,) for d in batch))
+        cursor.execute(
+            "SELECT digest FROM stage_batch WHERE digest NOT IN "
+            "(SELECT digest FROM stage_inputs WHERE stage = ?)", (self.stage,)
+        )
+        for (digest,) in cursor.fetchall():
+            self._pending.append(digest)
+            yield batch[digest]
+
+    def commit(self, summary=None):
+        """Mark this run's new inputs as processed and log the run"""
+        cursor = self.db.cursor()
+        cursor.executemany(
+            "INSERT OR IGNORE INTO stage_inputs (stage, digest) VALUES (?, ?)",
+            ((self.stage, digest) for digest in self._pending)
+        )
+        cursor.execute(
+            "INSERT INTO stage_runs (stage, version, started_at, finished_at, inputs, new_inputs, summary) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (self.stage, self.version, self._started, datetime.now().isoformat(),
+             self.inputs, len(self._pending), json.dumps(summary or {}))
+        )
+        self.db.commit()
+        new_inputs = len(self._pending)
+        self._pending = []
+        return new_inputs
+
+    def reset(self):
+        """Forget every processed input so the next run starts from scratch"""
+        self.db.execute("DELETE FROM stage_inputs WHERE stage = ?", (self.stage,))
+        self.db.commit()
+
+    def last_run(self):
+        """The previous run of this stage, or ``None``"""
+        row = self.db.execute(
+            "SELECT version, finished_at, inputs, new_inputs, summary FROM stage_runs "
+            "WHERE stage = ? ORDER BY id DESC LIMIT 1", (self.stage,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {'version': row[0], 'finished_at': row[1], 'inputs': row[2],
+                'new_inputs': row[3], 'summary': json.loads(row[4] or '{}')}
+
+    @staticmethod
+    def rules_version(rules):
+        """Digest of a stage's configuration, for use as ``version``"""
+        return hashlib.blake2b(json.dumps(rules, sort_keys=True).encode(), digest_size=8).hexdigest()
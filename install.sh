@@ -55,6 +55,7 @@ wget -q https://raw.githubusercontent.com/danielmiessler/SecLists/master/Discove
 wget -q https://raw.githubusercontent.com/danielmiessler/SecLists/master/Discovery/DNS/subdomains-top1million-110000.txt -O subdomains.txt
 wget -q https://raw.githubusercontent.com/danielmiessler/SecLists/master/Fuzzing/GraphQL.txt -O graphql.txt
 wget -q https://raw.githubusercontent.com/danielmiessler/SecLists/master/Fuzzing/API/Common-API-parameters.txt -O api-params.txt
+wget -q https://raw.githubusercontent.com/danielmiessler/SecLists/master/Discovery/Web-Content/api/api-endpoints.txt -O api-endpoints.txt
 
 # Create config file
 cat > ~/.parameter_hunter/config.yaml << EOF
@@ -74,6 +75,7 @@ wordlists:
   subdomains: ~/.parameter_hunter/wordlists/subdomains.txt
   graphql: ~/.parameter_hunter/wordlists/graphql.txt
   api: ~/.parameter_hunter/wordlists/api-params.txt
+  content: ~/.parameter_hunter/wordlists/api-endpoints.txt
 
 api_keys:
   github: ""
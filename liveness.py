@@ -0,0 +1,340 @@
+"""
+DNS resolution and HTTP liveness probing for Parameter Bug Hunter Pro
+"""
+
+import re
+import ssl
+import html
+import socket
+import struct
+import asyncio
+import hashlib
+import secrets
+
+from http_client import HttpClient
+from oob_listener import OOBListener
+
+
+class LivenessProber:
+    """Resolve enumerated names and probe the live ones over HTTP/HTTPS
+
+    Resolution and probing run on one event loop, pipelined: a fixed pool
+    of worker coroutines takes the next name, resolves it, and probes it
+    straight away, so 100k names never become 100k pending tasks. ``A``
+    queries go out over a single UDP socket to the configured nameservers
+    (``/etc/resolv.conf`` by default) with retries, and answers are kept in
+    a cache. Before a name is accepted, its parent domain is checked once for
+    wildcard DNS by resolving random labels under it. A name that only
+    resolves to the wildcard's addresses is dropped.
+
+    Probes connect to the resolved address with the name as Host and SNI,
+    rather than going through ``HttpClient``, because ``requests`` would
+    resolve every name again through the system resolver. Schemes are tried
+    in ``ports`` order and the first answer wins. Only the head of each body
+    is read; the fingerprint hashes status, Server header, title and the
+    page's tag sequence, so default pages and parked domains group together
+    however their volatile parts differ.
+    """
+
+    HOSTNAME = re.compile(r"^(?=.{4,253}$)(?:[a-z0-9_](?:[a-z0-9_-]{0,61}[a-z0-9])?\.)+[a-z0-9-]{2,63}$")
+    TITLE = re.compile(rb"<title[^>]*>(.*?)</title", re.I | re.S)
+    TAG = re.compile(rb"<([a-zA-Z][\w-]*)")
+    MAX_BODY = 65536
+    MAX_HEAD = 16384
+
+    def __init__(self, nameservers=None, concurrency=500, probe_concurrency=200, dns_timeout=2.0,
+                 retries=2, timeout=5.0, ports=None, wildcard_probes=2, verify_tls=False):
+        self.nameservers = [self.parse_nameserver(ns) for ns in (nameservers or self.system_nameservers())]
+        self.concurrency = concurrency
+        self.probe_concurrency = probe_concurrency
+        self.dns_timeout = dns_timeout
+        self.retries = retries
+        self.timeout = timeout
+        self.ports = dict(ports or {'https': 443, 'http': 80})
+        self.wildcard_probes = wildcard_probes
+        self.cache = {}
+        self.wildcards = {}
+        self.stats = {'names': 0, 'queries': 0, 'timeouts': 0, 'resolved': 0, 'unresolved': 0,
+                      'wildcard': 0, 'probes': 0, 'live': 0, 'no_http': 0}
+        self._ssl = ssl.create_default_context()
+        if not verify_tls:
+            self._ssl.check_hostname = False
+            self._ssl.verify_mode = ssl.CERT_NONE
+        self._pending = {}
+        self._transport = None
+        self._next_server = 0
+
+    @classmethod
+    def from_config(cls, config):
+        """Prober configured from the ``liveness`` and ``http`` config sections"""
+        options = dict(config.get('liveness') or {})
+        options.setdefault('verify_tls', (config.get('http') or {}).get('verify_tls', False))
+        return cls(**options)
+
+    @staticmethod
+    def system_nameservers(path="/etc/resolv.conf"):
+        """IPv4 nameservers from resolv.conf, public resolvers if there are none"""
+        servers = []
+        try:
+            with open(path) as f:
+                for line in f:
+                    fields = line.split()
+                    if len(fields) >= 2 and fields[0] == "nameserver" and ':' not in fields[1]:
+                        servers.append(fields[1])
+        except OSError:
+            pass
+        return servers or ["8.8.8.8", "1.1.1.1"]
+
+    @staticmethod
+    def parse_nameserver(nameserver):
+        host, _, port = str(nameserver).partition(':')
+        return host, int(port or 53)
+
+    @classmethod
+    def normalize(cls, names):
+        """Lowercased, de-duplicated, syntactically valid host names"""
+        seen = set()
+        for name in names:
+            name = name.strip().lower().rstrip('.')
+            if '://' in name:
+                name = name.split('://', 1)[1].split('/', 1)[0].rsplit('@', 1)[-1].split(':', 1)[0]
+            if name.startswith('*.'):
+                name = name[2:]
+            if name not in seen and cls.HOSTNAME.match(name):
+                seen.add(name)
+                yield name
+
+    # DNS
+
+    class _DNSProtocol(asyncio.DatagramProtocol):
+        def __init__(self, prober):
+            self.prober = prober
+
+        def datagram_received(self, data, addr):
+            self.prober._answer(data)
+
+        def error_received(self, exc):
+            pass
+
+    @staticmethod
+    def build_query(query_id, name):
+        question = b"".join(bytes([len(label)]) + label for label in name.encode('ascii').split(b"."))
+        return struct.pack("!HHHHHH", query_id, 0x0100, 1, 0, 0, 0) + question + b"\x00" + struct.pack("!HH", 1, 1)
+
+    @staticmethod
+    def parse_answers(data, offset, count):
+        """IPv4 addresses of the ``A`` records in an answer section"""
+        addresses = []
+        for _ in range(count):
+            while True:
+                length = data[offset]
+                if length & 0xC0 == 0xC0:
+                    offset += 2
+                    break
+                offset += 1 + length
+                if length == 0:
+                    break
+            rtype, _, _, rdlength = struct.unpack("!HHIH", data[offset:offset + 10])
+            offset += 10
+            if rtype == 1 and rdlength == 4:
+                addresses.append(socket.inet_ntoa(data[offset:offset + 4]))
+            offset += rdlength
+        return addresses
+
+    def _answer(self, data):
+        question = OOBListener.parse_question(data)
+        if question is None:
+            return
+        query_id, flags, qname, _, raw_question = question
+        pending = self._pending.get(query_id)
+        if pending is None or pending[0] != qname or pending[1].done():
+            return
+        rcode = flags & 0x000F
+        if rcode == 3:
+            pending[1].set_result(())
+        elif rcode == 0:
+            try:
+                count = struct.unpack("!H", data[6:8])[0]
+                pending[1].set_result(tuple(self.parse_answers(data, 12 + len(raw_question), count)))
+            except (IndexError, struct.error):
+                pending[1].set_result(None)
+        else:
+            # SERVFAIL, REFUSED...: worth another attempt
+            pending[1].set_result(None)
+
+    async def _query(self, name):
+        """Addresses of ``name``, ``()`` for NXDOMAIN, ``None`` if no server answered"""
+        loop = asyncio.get_running_loop()
+        async with self._dns_slots:
+            for _ in range(self.retries + 1):
+                server = self.nameservers[self._next_server % len(self.nameservers)]
+                self._next_server += 1
+                query_id = secrets.randbelow(65536)
+                while query_id in self._pending:
+                    query_id = secrets.randbelow(65536)
+                future = loop.create_future()
+                self._pending[query_id] = (name, future)
+                self.stats['queries'] += 1
+                try:
+                    self._transport.sendto(self.build_query(query_id, name), server)
+                    result = await asyncio.wait_for(future, self.dns_timeout)
+                except asyncio.TimeoutError:
+                    self.stats['timeouts'] += 1
+                    result = None
+                finally:
+                    self._pending.pop(query_id, None)
+                if result is not None:
+                    return result
+        return None
+
+    async def resolve(self, name):
+        """Cached addresses of ``name``; failed lookups aren't cached"""
+        if name in self.cache:
+            return self.cache[name]
+        addresses = await self._query(name)
+        if addresses is None:
+            return ()
+        self.cache[name] = addresses
+        return addresses
+
+    async def _wildcard(self, parent):
+        task = self._wildcard_tasks.get(parent)
+        if task is None:
+            task = self._wildcard_tasks[parent] = asyncio.ensure_future(self._detect_wildcard(parent))
+        return await task
+
+    async def _detect_wildcard(self, parent):
+        results = await asyncio.gather(*(self._query(f"{secrets.token_hex(6)}.{parent}")
+                                         for _ in range(self.wildcard_probes)))
+        addresses = {address for result in results if result for address in result}
+        if addresses:
+            self.wildcards[parent] = sorted(addresses)
+        return addresses
+
+    # HTTP
+
+    async def _fetch(self, scheme, name, address, port):
+        tls = self._ssl if scheme == 'https' else None
+        reader, writer = await asyncio.open_connection(address, port, ssl=tls, server_hostname=name if tls else None,
+                                                       limit=self.MAX_HEAD)
+        try:
+            host = name if port == {'https': 443, 'http': 80}.get(scheme) else f"{name}:{port}"
+            writer.write((f"GET / HTTP/1.1\r\nHost: {host}\r\nUser-Agent: {HttpClient.USER_AGENT}\r\n"
+                          f"Accept: */*\r\nAccept-Encoding: identity\r\nConnection: close\r\n\r\n").encode())
+            head = await reader.readuntil(b"\r\n\r\n")
+            body = b""
+            while len(body) < self.MAX_BODY:
+                chunk = await reader.read(self.MAX_BODY - len(body))
+                if not chunk:
+                    break
+                body += chunk
+        finally:
+            writer.close()
+        return head, body
+
+    def fingerprint(self, status, headers, title, body):
+        """Stable hash of what a page looks like, not what it says"""
+        digest = hashlib.sha1(f"{status}|{headers.get('server', '')}|{title}|".encode())
+        digest.update(b",".join(tag.lower() for tag in self.TAG.findall(body)))
+        return digest.hexdigest()[:16]
+
+    def parse(self, url, name, address, head, body):
+        """Target record for one probe response"""
+        lines = head.decode('latin-1').split("\r\n")
+        status_line = lines[0].split(" ", 2)
+        status = int(status_line[1]) if len(status_line) > 1 and status_line[1].isdigit() else None
+        headers = {}
+        for line in lines[1:]:
+            header, sep, value = line.partition(":")
+            if sep:
+                headers[header.strip().lower()] = value.strip()
+        match = self.TITLE.search(body)
+        title = ' '.join(html.unescape(match.group(1).decode('utf-8', 'replace')).split())[:200] if match else ''
+        return {
+            'url': url, 'host': name, 'ip': address, 'status': status, 'title': title,
+            'server': headers.get('server', ''), 'location': headers.get('location'),
+            'fingerprint': self.fingerprint(status, headers, title, body),
+        }
+
+    async def probe(self, name, address):
+        """First scheme that answers on ``address`` for ``name``, ``None`` if none does"""
+        for scheme, port in self.ports.items():
+            default = {'https': 443, 'http': 80}.get(scheme)
+            url = f"{scheme}://{name}/" if port == default else f"{scheme}://{name}:{port}/"
+            self.stats['probes'] += 1
+            try:
+                head, body = await asyncio.wait_for(self._fetch(scheme, name, address, port), self.timeout)
+            except (OSError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError,
+                    asyncio.LimitOverrunError):
+                # Refused, reset, timed out or not TLS: try the next scheme
+                continue
+            return self.parse(url, name, address, head, body)
+        return None
+
+    # Pipeline
+
+    async def _check(self, name):
+        self.stats['names'] += 1
+        addresses = await self.resolve(name)
+        if not addresses:
+            self.stats['unresolved'] += 1
+            return None
+        self.stats['resolved'] += 1
+        parent = name.partition('.')[2]
+        if '.' in parent:
+            wildcard = await self._wildcard(parent)
+            if wildcard and set(addresses) <= wildcard:
+                self.stats['wildcard'] += 1
+                return None
+        async with self._http_slots:
+            record = await self.probe(name, addresses[0])
+        if record is None:
+            self.stats['no_http'] += 1
+            return None
+        record['addresses'] = list(addresses)
+        self.stats['live'] += 1
+        return record
+
+    async def _run(self, names, on_live):
+        loop = asyncio.get_running_loop()
+        self._dns_slots = asyncio.Semaphore(self.concurrency)
+        self._http_slots = asyncio.Semaphore(self.probe_concurrency)
+        self._wildcard_tasks = {}
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: self._DNSProtocol(self), local_addr=('0.0.0.0', 0))
+        # Answers to hundreds of queries in flight arrive in bursts
+        self._transport.get_extra_info('socket').setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 22)
+        names = self.normalize(names)
+        records = []
+
+        async def worker():
+            for name in names:
+                record = await self._check(name)
+                if record:
+                    records.append(record)
+                    if on_live:
+                        on_live(record)
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        finally:
+            self._transport.close()
+            self._transport = None
+        return records
+
+    def run(self, names, on_live=None):
+        """Resolve and probe ``names``, returns the live target records"""
+        return asyncio.run(self._run(names, on_live))
+
+    @staticmethod
+    def store_targets(db, records, discovered_at):
+        """Upsert live targets with their status, title, fingerprint and address"""
+        db.executemany(
+            "INSERT INTO targets (url, domain, discovered_at, status, title, fingerprint, ip) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (url) DO UPDATE SET status = excluded.status, title = excluded.title, "
+            "fingerprint = excluded.fingerprint, ip = excluded.ip",
+            ((r['url'], r['host'], discovered_at, r['status'], r['title'], r['fingerprint'], r['ip'])
+             for r in records)
+        )
+        db.commit()
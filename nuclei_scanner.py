@@ -0,0 +1,173 @@
+"""
+Bulk nuclei execution for Parameter Bug Hunter Pro
+"""
+
+import os
+import json
+import zlib
+import hashlib
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlsplit
+
+
+class NucleiScanner:
+    """Shard a project's URLs across nuclei processes and ingest as they report
+
+    URLs are scope-filtered while streaming into shard files, with every
+    host pinned to one shard so nuclei's per-host rate limiting still
+    holds. Duplicates always land in the same shard, so each shard is
+    deduplicated on its own afterwards and memory stays bounded by the
+    largest shard rather than the whole URL set. Each process writes JSONL to stdout, and every
+    line is parsed as it arrives and buffered into batched inserts into the
+    ``vulnerabilities`` table, so neither the input nor the output is ever
+    held in memory.
+    """
+
+    SEVERITIES = {'critical': 'Critical', 'high': 'High', 'medium': 'Medium',
+                  'low': 'Low', 'info': 'Informational', 'unknown': 'Informational'}
+
+    def __init__(self, runner, db, evidence=None, batch_size=500):
+        self.runner = runner
+        self.db = db
+        self.evidence = evidence
+        self.batch_size = batch_size
+        self.stats = {'urls': 0, 'duplicates': 0, 'out_of_scope': 0, 'lines': 0,
+                      'findings': 0, 'known': 0, 'linked': 0, 'parse_errors': 0, 'by_severity': {}}
+        self._buffer = []
+
+    def export_targets(self, urls, directory, shards, scope=None):
+        """Write unique, in-scope URLs into ``shards`` files, returns their paths"""
+        shards = max(1, int(shards))
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        paths = [directory / f"targets_{i:03d}.txt" for i in range(shards)]
+        files = [open(path, 'w') for path in paths]
+        try:
+            for url in urls:
+                url = url.strip()
+                if not url:
+                    continue
+                if scope and not scope.allows_url(url):
+                    self.stats['out_of_scope'] += 1
+                    continue
+                host = urlsplit(url).netloc
+                files[zlib.crc32(host.encode()) % shards].write(f"{url}\n")
+        finally:
+            for f in files:
+                f.close()
+        for path in paths:
+            self._dedupe_shard(path)
+        return [path for path in paths if path.stat().st_size]
+
+    def _dedupe_shard(self, path):
+        """Drop repeated URLs from one shard file in place"""
+        seen = set()
+        temp = path.with_suffix('.tmp')
+        with open(path, 'r') as src, open(temp, 'w') as dst:
+            for line in src:
+                digest = hashlib.blake2b(line.encode(), digest_size=8).digest()
+                if digest in seen:
+                    self.stats['duplicates'] += 1
+                    continue
+                seen.add(digest)
+                dst.write(line)
+                self.stats['urls'] += 1
+        os.replace(temp, path)
+
+    @staticmethod
+    def build_args(targets_file, templates=None, tags=None, severity=None,
+                   exclude_tags=None, rate_limit=None):
+        args = ['-l', targets_file, '-jsonl', '-silent', '-nc']
+        for template in templates or []:
+            args += ['-t', template]
+        if tags:
+            args += ['-tags', ','.join(tags)]
+        if exclude_tags:
+            args += ['-etags', ','.join(exclude_tags)]
+        if severity:
+            args += ['-severity', ','.join(severity)]
+        if rate_limit:
+            args += ['-rl', rate_limit]
+        return args
+
+    def parse(self, line):
+        """Turn one nuclei JSONL result into a ``vulnerabilities`` row"""
+        result = json.loads(line)
+        info = result.get('info') or {}
+        matched = result.get('matched-at') or result.get('url') or result.get('host', '')
+        severity = self.SEVERITIES.get(str(info.get('severity', 'unknown')).lower(), 'Informational')
+
+        parameter_id = None
+        parameter = result.get('fuzzing_parameter')
+        if parameter and matched.startswith('http'):
+            parts = urlsplit(matched)
+            endpoint = f"{parts.scheme}://{parts.netloc}{parts.path}"
+            row = self.db.execute("SELECT id FROM parameters WHERE url = ? AND parameter = ?",
+                                  (endpoint, parameter)).fetchone()
+            if row:
+                parameter_id = row[0]
+                self.stats['linked'] += 1
+
+        digest = None
+        if self.evidence is not None:
+            digest = self.evidence.put(line.encode(), 'application/json',
+                                       name=f"nuclei:{result.get('template-id')}:{matched}")
+
+        name = info.get('name') or result.get('template-id', 'nuclei')
+        matcher = result.get('matcher-name')
+        template = result.get('template-id', '') + (f"/{matcher}" if matcher else "")
+        poc = result.get('curl-command') or matched
+        return (parameter_id, f"nuclei:{template} {name}", severity, poc,
+                False, result.get('timestamp') or datetime.now().isoformat(), digest)
+
+    def on_line(self, line):
+        """stdout callback: parse, count and buffer one result"""
+        line = line.strip()
+        if not line.startswith('{'):
+            return
+        self.stats['lines'] += 1
+        try:
+            row = self.parse(line)
+        except (ValueError, AttributeError):
+            self.stats['parse_errors'] += 1
+            return
+        severity = row[2]
+        self.stats['by_severity'][severity] = self.stats['by_severity'].get(severity, 0) + 1
+        self._buffer.append(row)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Insert buffered results, skipping ones already stored"""
+        if not self._buffer:
+            return
+        before = self.db.total_changes
+        self.db.executemany(
+            "INSERT INTO vulnerabilities (parameter_id, vulnerability_type, severity, poc, verified, discovered_at, evidence) "
+            "SELECT ?, ?, ?, ?, ?, ?, ? WHERE NOT EXISTS "
+            "(SELECT 1 FROM vulnerabilities WHERE vulnerability_type = ? AND poc = ?)",
+            (row + (row[1], row[3]) for row in self._buffer)
+        )
+        self.db.commit()
+        added = self.db.total_changes - before
+        self.stats['findings'] += added
+        self.stats['known'] += len(self._buffer) - added
+        self._buffer = []
+
+    def scan(self, shard_files, templates=None, tags=None, severity=None,
+             exclude_tags=None, rate_limit=None, on_stderr=None, timeout=0):
+        """Run one nuclei process per shard and ingest their output
+
+        A shard's run time grows with its URL count, so by default
+        (``timeout=0``) shards are not cut off by the runner's timeout.
+        """
+        jobs = [{'tool': 'nuclei',
+                 'args': self.build_args(path, templates, tags, severity, exclude_tags, rate_limit),
+                 'options': {'on_stdout': self.on_line, 'on_stderr': on_stderr, 'timeout': timeout}}
+                for path in shard_files]
+        try:
+            results = self.runner.run_all_sync(jobs)
+        finally:
+            self.flush()
+        return results
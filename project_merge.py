@@ -0,0 +1,220 @@
+"""
+Project database merging and export for Parameter Bug Hunter Pro
+"""
+
+import csv
+import json
+import sqlite3
+from pathlib import Path
+
+from evidence_store import EvidenceStore
+
+
+class ProjectMerger:
+    """Merge other projects' ``results.db`` into one, and stream exports
+
+    Sources are ATTACHed to the target connection and copied with one
+    ``INSERT ... SELECT`` per table, all in a single transaction, so SQLite
+    does the deduplication through the target's indexes instead of Python
+    looping over rows: targets by URL, parameters by (url, parameter),
+    findings by (type, poc) and fuzz results by (url, payload). Parameter
+    ids differ between projects, so a temporary id map remaps every
+    ``parameter_id`` on the way in. Up to nine sources go in one
+    transaction. Evidence blobs referenced by merged
+    findings are copied into the target's evidence store.
+    """
+
+    EXPORTS = {
+        'targets': "SELECT id, url, domain, status, title, fingerprint, ip, discovered_at FROM targets ORDER BY id",
+        'parameters': "SELECT id, url, parameter, parameter_type, risk_level, discovered_at "
+                      "FROM parameters ORDER BY id",
+        'findings': "SELECT v.id, p.url, p.parameter, v.vulnerability_type, v.severity, v.poc, v.verified, "
+                    "v.discovered_at, v.evidence FROM vulnerabilities v "
+                    "LEFT JOIN parameters p ON p.id = v.parameter_id ORDER BY v.id",
+        'fuzz_results': "SELECT f.id, f.url, p.parameter, f.payload, f.status, f.length, f.words, f.lines, "
+                        "f.content_type, f.redirect, f.duration_ms, f.discovered_at FROM fuzz_results f "
+                        "LEFT JOIN parameters p ON p.id = f.parameter_id ORDER BY f.id",
+    }
+
+    def __init__(self, db, evidence=None):
+        self.db = db
+        self.evidence = evidence
+        self.stats = {}
+
+    def _columns(self, schema, table):
+        return [row[1] for row in self.db.execute(f"PRAGMA {schema}.table_info({table})")]
+
+    def _count(self, table):
+        return self.db.execute(f"SELECT COUNT(*) FROM main.{table}").fetchone()[0]
+
+    def _insert(self, table, sql):
+        before = self._count(table)
+        self.db.execute(sql)
+        added = self._count(table) - before
+        self.stats[table] = self.stats.get(table, 0) + added
+        return added
+
+    def _merge_source(self, schema):
+        tables = {row[0] for row in self.db.execute(f"SELECT name FROM {schema}.sqlite_master WHERE type = 'table'")}
+
+        if 'targets' in tables:
+            probed = [column for column in ('status', 'title', 'fingerprint', 'ip')
+                      if column in self._columns(schema, 'targets')]
+            self._insert('targets', f'''
+                INSERT INTO main.targets (url, domain, discovered_at{''.join(f", {c}" for c in probed)})
+                SELECT url, domain, MIN(discovered_at){''.join(f", MAX({c})" for c in probed)}
+                FROM {schema}.targets WHERE url IS NOT NULL GROUP BY url
+                ON CONFLICT (url) DO UPDATE SET discovered_at = MIN(COALESCE(discovered_at, excluded.discovered_at),
+                                                     COALESCE(excluded.discovered_at, discovered_at))
+                    {''.join(f", {c} = COALESCE({c}, excluded.{c})" for c in probed)}
+            ''')
+
+        self.db.execute("DELETE FROM temp.parameter_map")
+        if 'parameters' in tables:
+            self._insert('parameters', f'''
+                INSERT INTO main.parameters (url, parameter, parameter_type, risk_level, discovered_at)
+                SELECT s.url, s.parameter, s.parameter_type, s.risk_level, MIN(s.discovered_at)
+                FROM {schema}.parameters s
+                WHERE NOT EXISTS (SELECT 1 FROM main.parameters p WHERE p.url = s.url AND p.parameter = s.parameter)
+                GROUP BY s.url, s.parameter
+            ''')
+            self.db.execute(f'''
+                INSERT INTO temp.parameter_map (source_id, target_id)
+                SELECT s.id, (SELECT MIN(p.id) FROM main.parameters p WHERE p.url = s.url AND p.parameter = s.parameter)
+                FROM {schema}.parameters s
+            ''')
+
+        if 'vulnerabilities' in tables:
+            evidence = 'MAX(v.evidence)' if 'evidence' in self._columns(schema, 'vulnerabilities') else 'NULL'
+            self._insert('vulnerabilities', f'''
+                INSERT INTO main.vulnerabilities
+                    (parameter_id, vulnerability_type, severity, poc, verified, discovered_at, evidence)
+                SELECT m.target_id, v.vulnerability_type, v.severity, v.poc, MAX(v.verified), MIN(v.discovered_at),
+                       {evidence}
+                FROM {schema}.vulnerabilities v
+                LEFT JOIN temp.parameter_map m ON m.source_id = v.parameter_id
+                WHERE NOT EXISTS (SELECT 1 FROM main.vulnerabilities x
+                                  WHERE x.vulnerability_type = v.vulnerability_type AND x.poc IS v.poc)
+                GROUP BY v.vulnerability_type, v.poc
+            ''')
+
+        if 'fuzz_results' in tables:
+            if 'fuzz_results' not in {row[0] for row in self.db.execute(
+                    "SELECT name FROM main.sqlite_master WHERE type = 'table'")}:
+                sql = self.db.execute(f"SELECT sql FROM {schema}.sqlite_master WHERE name = 'fuzz_results'").fetchone()[0]
+                self.db.execute(sql)
+            self.db.execute("CREATE INDEX IF NOT EXISTS main.idx_fuzz_results_url ON fuzz_results (url, payload)")
+            self._insert('fuzz_results', f'''
+                INSERT INTO main.fuzz_results (parameter_id, url, payload, status, length, words, lines,
+                                               content_type, redirect, duration_ms, discovered_at)
+                SELECT m.target_id, f.url, f.payload, f.status, f.length, f.words, f.lines,
+                       f.content_type, f.redirect, f.duration_ms, MIN(f.discovered_at)
+                FROM {schema}.fuzz_results f
+                LEFT JOIN temp.parameter_map m ON m.source_id = f.parameter_id
+                WHERE NOT EXISTS (SELECT 1 FROM main.fuzz_results x WHERE x.url = f.url AND x.payload IS f.payload)
+                GROUP BY f.url, f.payload
+            ''')
+
+        if 'vulnerabilities' in tables and 'evidence' in self._columns(schema, 'vulnerabilities'):
+            return [row[0] for row in self.db.execute(
+                f"SELECT DISTINCT evidence FROM {schema}.vulnerabilities WHERE evidence IS NOT NULL")]
+        return []
+
+    def merge(self, sources):
+        """Merge every source ``results.db`` into the target, returns ``{table: rows added}``
+
+        Sources are attached in groups as large as SQLite's attachment
+        limit allows (9 by default) and each group is merged in one
+        transaction; a source can't be detached mid-transaction once read.
+        """
+        sources = [Path(source) for source in sources]
+        self.stats = {}
+        limit = self.db.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED) - 1 if hasattr(self.db, 'getlimit') else 9
+        self.db.commit()
+        self.db.execute("PRAGMA temp_store = MEMORY")
+        self.db.execute("CREATE TEMP TABLE IF NOT EXISTS parameter_map (source_id INTEGER PRIMARY KEY, target_id INTEGER)")
+        copies = []
+        for start in range(0, len(sources), limit):
+            group = sources[start:start + limit]
+            schemas = []
+            try:
+                for i, source in enumerate(group):
+                    self.db.execute("ATTACH DATABASE ? AS ?", (str(source), f"source{i}"))
+                    schemas.append(f"source{i}")
+                self.db.execute("BEGIN IMMEDIATE")
+                try:
+                    for source, schema in zip(group, schemas):
+                        copies.append((source, self._merge_source(schema)))
+                    self.db.commit()
+                except sqlite3.Error:
+                    self.db.rollback()
+                    raise
+            finally:
+                for schema in schemas:
+                    self.db.execute(f"DETACH DATABASE {schema}")
+        self.stats['sources'] = len(sources)
+
+        if self.evidence is not None:
+            copied = 0
+            for source, digests in copies:
+                missing = [digest for digest in digests if not self.evidence.contains(digest)]
+                if not missing:
+                    continue
+                store = EvidenceStore.open(source.parent / "evidence")
+                for digest in missing:
+                    data = store.get(digest)
+                    if data is not None:
+                        self.evidence.put(data)
+                        copied += 1
+            self.evidence.flush()
+            self.stats['evidence'] = copied
+        return self.stats
+
+    def export(self, kind, output, fmt='jsonl', chunk_rows=0, batch_size=10000):
+        """Stream one export to ``output``, returns ``(rows, files)``
+
+        With ``chunk_rows`` the export is split into numbered part files
+        of that many rows each, ready for parallel downstream loading.
+        """
+        if kind not in self.EXPORTS:
+            raise ValueError(f"Unknown export: {kind}")
+        if fmt not in ('jsonl', 'csv'):
+            raise ValueError(f"Unknown format: {fmt}")
+        output = Path(output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        cursor = self.db.execute(self.EXPORTS[kind])
+        columns = [description[0] for description in cursor.description]
+
+        files, rows, handle, writer, in_file = [], 0, None, None, 0
+
+        def open_part():
+            path = output.with_name(f"{output.stem}-{len(files) + 1:05d}{output.suffix}") if chunk_rows else output
+            files.append(path)
+            f = open(path, 'w', newline='')
+            w = None
+            if fmt == 'csv':
+                w = csv.writer(f)
+                w.writerow(columns)
+            return f, w
+
+        try:
+            handle, writer = open_part()
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                for row in batch:
+                    if chunk_rows and in_file >= chunk_rows:
+                        handle.close()
+                        handle, writer = open_part()
+                        in_file = 0
+                    if writer:
+                        writer.writerow(row)
+                    else:
+                        handle.write(json.dumps(dict(zip(columns, row)), default=str) + "\n")
+                    in_file += 1
+                rows += len(batch)
+        finally:
+            if handle:
+                handle.close()
+        return rows, files
@@ -0,0 +1,249 @@
+"""
+Full-text query index over project results for Parameter Bug Hunter Pro
+"""
+
+import re
+import sqlite3
+from urllib.parse import urlsplit
+
+from artifact_store import artifact_records
+from incremental import StageState
+from utils import Utils
+
+
+class ResultIndex:
+    """FTS5 index over URLs, parameters, findings and evidence snippets
+
+    Rows are copied into one ``search_index`` virtual table with a trigram
+    tokenizer, so a term matches anywhere inside a word (``redirect`` finds
+    ``redirect_uri`` and ``postRedirectUrl``). Filters are FTS column
+    filters, so host, category, severity and risk narrow the search inside
+    the index instead of scanning rows, and pages are walked by rowid
+    rather than ranked. ``sync()`` is incremental: table rows are tracked
+    by a rowid watermark and artifact URLs by digest.
+    """
+
+    COLUMNS = ('kind', 'ref', 'host', 'url', 'parameter', 'category', 'severity', 'text')
+    FILTERS = ('kind', 'host', 'category', 'severity')
+    SNIPPET = 500
+
+    def __init__(self, db, project_path=None, evidence=None):
+        self.db = db
+        self.project_path = project_path
+        self.evidence = evidence
+        self.tokenizer = 'trigram'
+        try:
+            self._create('trigram')
+        except sqlite3.OperationalError:
+            # SQLite before 3.34 has no trigram tokenizer
+            self.tokenizer = 'unicode61'
+            self._create('unicode61')
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS search_state (
+                source TEXT PRIMARY KEY,
+                last_id INTEGER
+            )
+        ''')
+        self.db.execute('''
+            CREATE TABLE IF NOT EXISTS search_targets (
+                id INTEGER PRIMARY KEY,
+                entry INTEGER,
+                title TEXT
+            )
+        ''')
+        if self._watermark('targets'):
+            # Indexes from before targets were tracked by title
+            self.db.execute("DELETE FROM search_index WHERE kind = 'target'")
+            self.db.execute("DELETE FROM search_state WHERE source = 'targets'")
+        self.db.commit()
+
+    def _create(self, tokenizer):
+        self.db.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+            f"kind, ref UNINDEXED, host, url, parameter, category, severity, text, tokenize='{tokenizer}')"
+        )
+
+    @staticmethod
+    def host_of(url):
+        try:
+            return urlsplit(url).hostname or ''
+        except ValueError:
+            return ''
+
+    def _watermark(self, source):
+        row = self.db.execute("SELECT last_id FROM search_state WHERE source = ?", (source,)).fetchone()
+        return row[0] if row else 0
+
+    def _advance(self, source, last_id):
+        self.db.execute("INSERT OR REPLACE INTO search_state (source, last_id) VALUES (?, ?)", (source, last_id))
+
+    def _insert(self, rows):
+        self.db.executemany(
+            "INSERT INTO search_index (kind, ref, host, url, parameter, category, severity, text) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+        )
+
+    def _snippet(self, digest):
+        if not digest or self.evidence is None:
+            return ''
+        blob = self.evidence.get(digest)
+        return blob[:self.SNIPPET].decode('utf-8', 'replace') if blob else ''
+
+    def sync(self, batch_size=5000):
+        """Index rows added since the last sync, returns how many were added"""
+        added = 0
+        categories = {}
+        if self.project_path:
+            classification = Utils.load_json_file(self.project_path / "parameters" / "classification.json")
+            categories = {param: category for category, params in classification.items() for param in params}
+
+        # Parameters
+        last_id = self._watermark('parameters')
+        while True:
+            rows = self.db.execute(
+                "SELECT id, url, parameter, parameter_type, risk_level FROM parameters WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, batch_size)
+            ).fetchall()
+            if not rows:
+                break
+            self._insert(('parameter', row_id, self.host_of(url), url, param,
+                          categories.get(param, param_type or ''), risk or '', '')
+                         for row_id, url, param, param_type, risk in rows)
+            last_id = rows[-1][0]
+            added += len(rows)
+        self._advance('parameters', last_id)
+
+        # Findings, with the start of their evidence
+        last_id = self._watermark('vulnerabilities')
+        rows = self.db.execute(
+            "SELECT v.id, p.url, p.parameter, v.vulnerability_type, v.severity, v.poc, v.evidence "
+            "FROM vulnerabilities v LEFT JOIN parameters p ON p.id = v.parameter_id WHERE v.id > ? ORDER BY v.id",
+            (last_id,)
+        )
+        batch = []
+        for row_id, url, param, vuln_type, severity, poc, digest in rows:
+            url = url or (poc if (poc or '').startswith('http') else '')
+            batch.append(('finding', row_id, self.host_of(url), url, param or '', vuln_type or '',
+                          severity or '', f"{poc or ''}\n{self._snippet(digest)}"))
+            last_id = row_id
+            if len(batch) >= batch_size:
+                self._insert(batch)
+                added += len(batch)
+                batch = []
+        self._insert(batch)
+        added += len(batch)
+        self._advance('vulnerabilities', last_id)
+
+        # Live targets, new ones and ones whose title changed
+        title = 't.title' if 'title' in {row[1] for row in self.db.execute("PRAGMA table_info(targets)")} else "NULL"
+        rows = self.db.execute(
+            f"SELECT t.id, t.url, t.domain, {title}, s.entry FROM targets t LEFT JOIN search_targets s ON s.id = t.id "
+            f"WHERE s.id IS NULL OR s.title IS NOT {title}"
+        ).fetchall()
+        for row_id, url, domain, text, entry in rows:
+            if entry is not None:
+                self.db.execute("DELETE FROM search_index WHERE rowid = ?", (entry,))
+            self._insert([('target', row_id, (domain or self.host_of(url)).lower(), url, '', '', '', text or '')])
+            entry = self.db.execute("SELECT last_insert_rowid()").fetchone()[0]
+            self.db.execute("INSERT OR REPLACE INTO search_targets (id, entry, title) VALUES (?, ?, ?)",
+                            (row_id, entry, text))
+        added += len(rows)
+
+        # Collected URLs from the artifact store, new ones only
+        if self.project_path:
+            state = StageState(self.db, "search_urls")
+            batch = []
+            for url in state.new(artifact_records(self.project_path / "reconnaissance" / "urls.txt")):
+                query = urlsplit(url).query
+                params = ' '.join(pair.split('=')[0] for pair in query.split('&') if pair)
+                batch.append(('url', None, self.host_of(url), url, params, '', '', ''))
+                if len(batch) >= batch_size:
+                    self._insert(batch)
+                    added += len(batch)
+                    batch = []
+            self._insert(batch)
+            added += len(batch)
+            state.commit({'indexed': added})
+
+        self.db.commit()
+        return added
+
+    @staticmethod
+    def phrase(text):
+        """Quote a term as an FTS5 string"""
+        return '"' + text.replace('"', '""') + '"'
+
+    def build_query(self, text="", **filters):
+        """WHERE clauses and parameters for free text plus column filters
+
+        Everything trigrams can match goes into one FTS5 expression; the
+        rest becomes plain conditions evaluated on the rows it selects.
+        """
+        # Parameter risk levels share the severity column with findings
+        if filters.get('risk') and not filters.get('severity'):
+            filters['severity'] = filters['risk']
+        clauses, conditions, params = [], [], []
+        searchable = lambda value: len(value) >= 3 or self.tokenizer != 'trigram'
+        for term in re.findall(r'"[^"]+"|\S+', text or ""):
+            term = term.strip('"')
+            if not term:
+                continue
+            if searchable(term):
+                clauses.append(f"{{url parameter category text}} : {self.phrase(term)}")
+            else:
+                # Trigrams can't match anything shorter than three characters
+                conditions.append("parameter = ? COLLATE NOCASE")
+                params.append(term)
+        for column in self.FILTERS:
+            value = filters.get(column)
+            if not value:
+                continue
+            if column == 'host':
+                value = value.lower().strip('.')
+                escaped = value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+                conditions.append("(lower(host) = ? OR lower(host) LIKE ? ESCAPE '\\')")
+                params += [value, f"%.{escaped}"]
+                if not searchable(value):
+                    continue
+            elif not searchable(value):
+                conditions.append(f"{column} = ? COLLATE NOCASE")
+                params.append(value)
+                continue
+            clauses.append(f"{column} : {self.phrase(value)}")
+        where = []
+        if clauses:
+            where.append("search_index MATCH ?")
+            params.insert(0, " AND ".join(clauses))
+        return where + conditions, params
+
+    def search(self, text="", limit=50, before=None, offset=0, **filters):
+        """One page of matches as dicts, newest first
+
+        Pass the ``rowid`` of the last row seen as ``before`` to fetch the
+        next page; the walk stops after ``limit`` matches instead of
+        ranking every hit, which keeps broad terms fast on large projects.
+        """
+        where, params = self.build_query(text, **filters)
+        if before is not None:
+            where.append("rowid < ?")
+            params.append(before)
+        sql = f"SELECT rowid, {', '.join(self.COLUMNS)} FROM search_index"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        cursor = self.db.execute(sql + " ORDER BY rowid DESC LIMIT ? OFFSET ?", params + [limit, offset])
+        return [dict(zip(('rowid',) + self.COLUMNS, row)) for row in cursor]
+
+    def count(self, text="", cap=10000, **filters):
+        """Number of matches, counted up to ``cap``"""
+        where, params = self.build_query(text, **filters)
+        sql = "SELECT 1 FROM search_index" + (" WHERE " + " AND ".join(where) if where else "")
+        return self.db.execute(f"SELECT COUNT(*) FROM ({sql} LIMIT ?)", params + [cap]).fetchone()[0]
+
+    def rebuild(self):
+        """Drop and re-index everything"""
+        self.db.execute("DELETE FROM search_index")
+        self.db.execute("DELETE FROM search_state")
+        self.db.execute("DELETE FROM search_targets")
+        StageState(self.db, "search_urls").reset()
+        self.db.commit()
+        return self.sync()
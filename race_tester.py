@@ -0,0 +1,154 @@
+"""
+Race condition testing for Parameter Bug Hunter Pro
+"""
+
+import ssl
+import time
+import socket
+import selectors
+import hashlib
+import statistics
+from urllib.parse import urlparse
+
+
+class RaceTester:
+    """Synchronized-burst race condition tester
+
+    N connections are opened up front and each receives its whole request
+    except the final byte. The final bytes are then released back to back
+    from one thread, so every request completes within a few microseconds
+    of the others, far tighter than starting N independent requests.
+    """
+
+    def __init__(self, timeout=15, verify_tls=False, user_agent='ParameterBugHunter/2.0'):
+        self.timeout = timeout
+        self.verify_tls = verify_tls
+        self.user_agent = user_agent
+
+    def build_request(self, url, method="GET", headers=None, body=b""):
+        """Serialise an HTTP/1.1 request to bytes"""
+        parsed = urlparse(url)
+        path = parsed.path or "/"
+        if parsed.query:
+            path += "?" + parsed.query
+        if isinstance(body, str):
+            body = body.encode()
+
+        lines = [f"{method.upper()} {path} HTTP/1.1", f"Host: {parsed.netloc}",
+                 f"User-Agent: {self.user_agent}", "Connection: close"]
+        for name, value in (headers or {}).items():
+            lines.append(f"{name}: {value}")
+        if body or method.upper() in ("POST", "PUT", "PATCH"):
+            lines.append(f"Content-Length: {len(body)}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode() + body
+
+    def _connect(self, parsed):
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        sock = socket.create_connection((parsed.hostname, port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if parsed.scheme == "https":
+            context = ssl.create_default_context()
+            if not self.verify_tls:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            sock = context.wrap_socket(sock, server_hostname=parsed.hostname)
+        return sock
+
+    @staticmethod
+    def _parse(raw, first_byte):
+        head, _, body = raw.partition(b"\r\n\r\n")
+        status_line = head.split(b"\r\n", 1)[0].split(b" ")
+        status = int(status_line[1]) if len(status_line) > 1 and status_line[1].isdigit() else None
+        return status, body, first_byte
+
+    def _read_responses(self, sockets):
+        """Read every ``Connection: close`` response to EOF at once
+
+        All sockets are polled together, so each first-byte time is when
+        that response arrived rather than when its turn to be read came.
+        """
+        chunks = {sock: [] for sock in sockets}
+        first_byte = {sock: None for sock in sockets}
+        selector = selectors.DefaultSelector()
+        for sock in sockets:
+            sock.setblocking(False)
+            selector.register(sock, selectors.EVENT_READ)
+        deadline = time.monotonic() + self.timeout
+        try:
+            while selector.get_map():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                for key, _ in selector.select(remaining):
+                    sock = key.fileobj
+                    now = time.perf_counter()
+                    finished = False
+                    try:
+                        # Drain everything buffered, TLS records included
+                        while True:
+                            data = sock.recv(65536)
+                            if not data:
+                                finished = True
+                                break
+                            if first_byte[sock] is None:
+                                first_byte[sock] = now
+                            chunks[sock].append(data)
+                    except (BlockingIOError, ssl.SSLWantReadError, ssl.SSLWantWriteError):
+                        pass
+                    except OSError:
+                        finished = True
+                    if finished:
+                        selector.unregister(sock)
+        finally:
+            selector.close()
+        return [self._parse(b"".join(chunks[sock]), first_byte[sock]) for sock in sockets]
+
+    def run(self, url, count=20, method="GET", headers=None, body=b"", requests=None):
+        """Fire ``count`` copies of a request (or the given ``requests``) at once"""
+        parsed = urlparse(url)
+        if requests is None:
+            requests = [self.build_request(url, method, headers, body)] * count
+
+        sockets = [self._connect(parsed) for _ in requests]
+        try:
+            # Stage everything but the last byte on every connection
+            for sock, request in zip(sockets, requests):
+                sock.sendall(request[:-1])
+
+            released = []
+            for sock, request in zip(sockets, requests):
+                sock.send(request[-1:])
+                released.append(time.perf_counter())
+
+            responses = self._read_responses(sockets)
+        finally:
+            for sock in sockets:
+                sock.close()
+
+        return self.summarize(released, responses)
+
+    @staticmethod
+    def summarize(released, responses):
+        """Timing spread and response clusters for one burst"""
+        clusters = {}
+        for index, (status, body, _) in enumerate(responses):
+            key = (status, hashlib.sha1(body).hexdigest())
+            cluster = clusters.setdefault(key, {'status': status, 'length': len(body),
+                                                'sample': body[:200].decode('utf-8', 'replace'),
+                                                'requests': []})
+            cluster['requests'].append(index)
+
+        arrivals = [r[2] for r in responses if r[2] is not None]
+        return {
+            'requests': len(released),
+            'release_spread_us': (max(released) - min(released)) * 1e6 if released else 0.0,
+            'response_spread_ms': (max(arrivals) - min(arrivals)) * 1e3 if arrivals else 0.0,
+            'response_median_ms': (statistics.median(arrivals) - min(released)) * 1e3 if arrivals else 0.0,
+            'successes': sum(1 for status, _, _ in responses if status and 200 <= status < 300),
+            'clusters': sorted(clusters.values(), key=lambda c: -len(c['requests'])),
+        }
+
+    @staticmethod
+    def is_suspicious(summary, expected_successes=1):
+        """A burst is suspicious when more requests succeed than the limit allows"""
+        return summary['successes'] > expected_successes
@@ -0,0 +1,195 @@
+"""
+Batched reflection scanner for Parameter Bug Hunter Pro
+"""
+
+import re
+import bisect
+import secrets
+import itertools
+import threading
+from urllib.parse import urlencode, urlparse, urlunparse, parse_qsl
+
+from payloads import PayloadLibrary
+
+
+class ReflectionScanner:
+    """Find reflected parameters with canaries, then test only those
+
+    Every parameter of an endpoint gets its own canary in a single request.
+    All canaries share a random prefix, so one regex pass over the response
+    finds every reflection, and a dict maps each hit back to its parameter.
+    Context-specific payloads are then batched the same way, one payload per
+    reflecting parameter per request.
+    """
+
+    # Request failures that usually mean the batch was too large
+    SPLIT_STATUSES = {400, 413, 414, 431}
+
+    def __init__(self, client, params_per_request=40, max_url_length=6000, payloads=None, max_payloads=12):
+        self.client = client
+        self.payloads = payloads or PayloadLibrary()
+        self.max_payloads = max_payloads
+        self.params_per_request = params_per_request
+        self.max_url_length = max_url_length
+        self.prefix = "pbh" + secrets.token_hex(3)
+        self.pattern = re.compile(re.escape(self.prefix) + r"[0-9a-f]{6}")
+        self._counter = itertools.count(1)
+        self.requests_sent = 0
+        self._lock = threading.Lock()
+
+    def new_canary(self):
+        return f"{self.prefix}{next(self._counter):06x}"
+
+    def build_url(self, endpoint, values):
+        """Attach parameter values to an endpoint, keeping its other query"""
+        parsed = urlparse(endpoint)
+        query = [(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True) if k not in values]
+        query.extend(values.items())
+        return urlunparse(parsed._replace(query=urlencode(query)))
+
+    def _batches(self, endpoint, params):
+        """Split parameters into batches bounded by count and URL length"""
+        batch = []
+        length = len(endpoint) + 1
+        for param in params:
+            # name=, canary and separator; payloads are checked separately
+            cost = len(param) + 32
+            if batch and (len(batch) >= self.params_per_request or length + cost > self.max_url_length):
+                yield batch
+                batch = []
+                length = len(endpoint) + 1
+            batch.append(param)
+            length += cost
+        if batch:
+            yield batch
+
+    def _send(self, endpoint, values):
+        """Send one batched request, splitting the batch if it is rejected"""
+        with self._lock:
+            self.requests_sent += 1
+        response = self.client.get(self.build_url(endpoint, values))
+        if (response is None or response.status_code in self.SPLIT_STATUSES) and len(values) > 1:
+            items = list(values.items())
+            half = len(items) // 2
+            first = self._send(endpoint, dict(items[:half]))
+            second = self._send(endpoint, dict(items[half:]))
+            return first + second
+        return [(values, response)]
+
+    @staticmethod
+    def _script_ranges(body):
+        """Start/end offsets of inline script blocks, for context lookups"""
+        starts, ends = [], []
+        for match in re.finditer(r"<script\b[^>]*>(.*?)</script\s*>", body, re.I | re.S):
+            starts.append(match.start(1))
+            ends.append(match.end(1))
+        return starts, ends
+
+    @staticmethod
+    def classify_context(body, position, content_type, script_ranges):
+        """Classify where a reflection landed in the response"""
+        if 'json' in content_type:
+            return 'json'
+
+        starts, ends = script_ranges
+        i = bisect.bisect_right(starts, position) - 1
+        if i >= 0 and position < ends[i]:
+            return 'script'
+
+        # Inside a tag when the nearest '<' is after the nearest '>'
+        window_start = max(0, position - 4096)
+        if body.rfind('<', window_start, position) > body.rfind('>', window_start, position):
+            return 'attribute'
+        return 'html'
+
+    def find_reflections(self, response, canaries):
+        """Single pass over a response mapping canary hits to parameters"""
+        if response is None:
+            return {}
+        body = response.text
+        content_type = response.headers.get('Content-Type', '').lower()
+        script_ranges = self._script_ranges(body) if '<script' in body.lower() else ([], [])
+
+        found = {}
+        for match in self.pattern.finditer(body):
+            param = canaries.get(match.group(0))
+            if param is not None:
+                context = self.classify_context(body, match.start(), content_type, script_ranges)
+                found.setdefault(param, set()).add(context)
+        return found
+
+    def discover(self, endpoint, params):
+        """Return ``{param: contexts}`` for every parameter that reflects"""
+        reflections = {}
+        for batch in self._batches(endpoint, params):
+            values = {param: self.new_canary() for param in batch}
+            for sent, response in self._send(endpoint, values):
+                canaries = {canary: param for param, canary in sent.items()}
+                reflections.update(self.find_reflections(response, canaries))
+        return reflections
+
+    def confirm(self, endpoint, reflections):
+        """Send context payloads only to reflecting parameters
+
+        Each reflecting parameter streams payloads for its own contexts from
+        the payload library, base payloads before encoded variants. Round
+        ``k`` sends the k-th payload of every parameter in one batched
+        request. A payload that comes back in its decoded form is a finding,
+        and that parameter's stream is dropped.
+        """
+        queues = {param: self.payloads.stream('xss', contexts, self.max_payloads)
+                  for param, contexts in reflections.items()}
+
+        findings = []
+        while queues:
+            round_payloads = {}
+            for param, stream in list(queues.items()):
+                item = next(stream, None)
+                if item is None:
+                    del queues[param]
+                    continue
+                context, mutation, template = item
+                round_payloads[param] = (context, mutation, self.payloads.render(template, self.new_canary()))
+
+            for batch in self._batches(endpoint, list(round_payloads)):
+                values = {param: round_payloads[param][2] for param in batch}
+                for sent, response in self._send(endpoint, values):
+                    if response is None:
+                        continue
+                    body = response.text
+                    for param, payload in sent.items():
+                        if self.payloads.decode(payload) in body:
+                            findings.append({
+                                'endpoint': endpoint,
+                                'parameter': param,
+                                'context': round_payloads[param][0],
+                                'encoding': round_payloads[param][1],
+                                'payload': payload,
+                                'url': self.build_url(endpoint, {param: payload}),
+                            })
+                            # One confirmed payload per parameter is enough
+                            queues.pop(param, None)
+        return findings
+
+    def scan(self, targets):
+        """Scan ``{endpoint: [params]}`` and return reflections and findings
+
+        Endpoints are scanned concurrently through the shared client.
+        """
+        def scan_endpoint(job):
+            endpoint, params = job
+            reflections = self.discover(endpoint, params)
+            findings = self.confirm(endpoint, reflections) if reflections else []
+            return reflections, findings
+
+        results = {'reflections': {}, 'findings': []}
+        for (endpoint, _), (reflections, findings) in self.client.map(targets.items(), send=scan_endpoint):
+            if reflections:
+                results['reflections'][endpoint] = {p: sorted(c) for p, c in reflections.items()}
+            results['findings'].extend(findings)
+        return results
+
+    def naive_request_count(self, targets):
+        """Requests a one-payload-per-parameter scan would need"""
+        payloads = sum(1 for _ in self.payloads.stream('xss'))
+        return sum(len(params) for params in targets.values()) * payloads
@@ -0,0 +1,202 @@
+"""
+Structural response diffing for Parameter Bug Hunter Pro
+"""
+
+import re
+import itertools
+from collections import Counter
+
+
+class ResponseDiff:
+    """Calibrated "did this response change?" check for one endpoint
+
+    Bodies are cut into segments (lines, with long minified lines split
+    after tags and delimiters) and every segment is hashed, so comparing
+    two responses is a multiset comparison of hashes, linear in the body
+    size instead of a full text diff. Values that always vary (timestamps,
+    UUIDs, long hex/base64 tokens) are masked up front. ``calibrate()``
+    sends nothing itself: it takes a few responses to the *same* request,
+    finds the segments that still differ between them (CSRF tokens, nonces,
+    rotating ads) and learns which words in those segments are volatile, so
+    they are masked in every later comparison too.
+    """
+
+    MAX_LINE = 256
+    SPLIT = re.compile(r"(?<=>)|(?<=[,;{}])")
+    WORD = re.compile(r"(\W+)")
+    VOLATILE = re.compile(
+        r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+        r"|\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?"
+        r"|\b\d{1,2}:\d{2}:\d{2}\b"
+        r"|\b1\d{9}(?:\d{3})?\b"
+        r"|\b[0-9a-fA-F]{16,}\b"
+        r"|[A-Za-z0-9+/_-]{24,}={0,2}"
+    )
+    # Runs of characters that can hold a volatile value; VOLATILE only runs
+    # inside these, which is several times faster than scanning the body
+    CANDIDATE = re.compile(r"[\w+/=:.-]{7,}")
+    MASK = "\x00"
+    PREFIX = 8
+
+    def __init__(self, margin=0.02, max_delta=10):
+        self.margin = margin
+        self.max_delta = max_delta
+        self._prefixes = {}
+        self.status = None
+        self.threshold = 1.0 - margin
+        self.noise = 0.0
+        self._baseline = Counter()
+        self._lengths = {}
+        self._texts = {}
+
+    @classmethod
+    def segments(cls, text):
+        """Lines of a body, long lines cut after tags and delimiters"""
+        for line in text.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if len(line) <= cls.MAX_LINE:
+                yield line
+            else:
+                for part in cls.SPLIT.split(line):
+                    part = part.strip()
+                    if part:
+                        yield part
+
+    def _split(self, segment):
+        parts = self.WORD.split(segment)
+        words, separators = parts[0::2], tuple(parts[1::2])
+        return (separators, words[0]), words
+
+    def mask(self, text):
+        """Segments of ``text`` with generic and learned volatile parts masked"""
+        text = self.CANDIDATE.sub(lambda m: self.VOLATILE.sub(self.MASK, m.group(0)), text)
+        if not self._prefixes:
+            return list(self.segments(text))
+        masked = []
+        for segment in self.segments(text):
+            # Only segments starting like a learned template get tokenised
+            for length, table in self._prefixes.items():
+                candidates = table.get(segment[:length])
+                if candidates:
+                    segment = self._apply(segment, candidates)
+                    break
+            masked.append(segment)
+        return masked
+
+    def _apply(self, segment, candidates):
+        frame, words = self._split(segment)
+        for template_frame, template in candidates:
+            if template_frame == frame and all(t is None or t == w for t, w in zip(template, words)):
+                parts = self.WORD.split(segment)
+                for i, t in enumerate(template):
+                    if t is None:
+                        parts[2 * i] = self.MASK
+                return ''.join(parts)
+        return segment
+
+    def _learn(self, frame, template):
+        # Index by the literal text before the first volatile word
+        prefix = ''
+        for word, separator in itertools.zip_longest(template, frame[0], fillvalue=''):
+            if word is None:
+                break
+            prefix += word + separator
+        prefix = prefix[:self.PREFIX]
+        table = self._prefixes.setdefault(len(prefix), {})
+        table.setdefault(prefix, []).append((frame, template))
+        self._prefixes = dict(sorted(self._prefixes.items(), reverse=True))
+
+    @staticmethod
+    def _unpack(response):
+        if isinstance(response, str):
+            return None, response
+        if isinstance(response, tuple):
+            return response
+        return response.status_code, response.text
+
+    def calibrate(self, responses):
+        """Learn volatile regions and the baseline from repeats of one request
+
+        Takes responses, bodies, or ``(status, text)`` tuples like ``compare()``.
+        """
+        samples = [self._unpack(response) for response in responses if response is not None]
+        if not samples:
+            raise ValueError("Calibration needs at least one response")
+
+        # Segments present in every sample are stable; the rest are grouped
+        # by shape so the words that vary between samples can be found
+        masked = [self.mask(text) for _, text in samples]
+        stable = Counter(masked[0])
+        for segments in masked[1:]:
+            stable &= Counter(segments)
+        groups = {}
+        for segments in masked:
+            for segment in (Counter(segments) - stable).elements():
+                frame, words = self._split(segment)
+                groups.setdefault(frame, []).append(words)
+        for frame, members in groups.items():
+            if len(members) == 1:
+                # Seen in one sample only, e.g. a rotating block: mask it whole
+                template = (members[0][0],) + tuple(None for _ in members[0][1:])
+            else:
+                template = tuple(column[0] if len(set(column)) == 1 else None for column in zip(*members))
+            self._learn(frame, template)
+
+        self.status = samples[0][0]
+        self._set_baseline(self.mask(samples[0][1]))
+        similarities = [self.compare(sample)['similarity'] for sample in samples[1:]]
+        self.noise = 1.0 - min(similarities, default=1.0)
+        self.threshold = max(0.0, min(1.0, 1.0 - self.noise) - self.margin)
+        return self
+
+    def _set_baseline(self, segments):
+        self._baseline = Counter()
+        self._lengths = {}
+        self._texts = {}
+        for segment in segments:
+            key = hash(segment)
+            self._baseline[key] += 1
+            self._lengths[key] = len(segment)
+            self._texts[key] = segment
+
+    def compare(self, response):
+        """Similarity to the baseline, whether it changed, and a compact delta
+
+        ``similarity`` is the length-weighted Dice coefficient of the two
+        segment multisets. ``changed`` applies the calibrated threshold and
+        suits "is this a different page?"; ``identical`` means nothing but
+        masked volatile parts differ, for "is this the same content?".
+        """
+        status, text = self._unpack(response)
+        candidate = Counter()
+        lengths = {}
+        texts = {}
+        for segment in self.mask(text):
+            key = hash(segment)
+            candidate[key] += 1
+            lengths[key] = len(segment)
+            texts[key] = segment
+
+        common = candidate & self._baseline
+        shared = sum(count * lengths[key] for key, count in common.items())
+        total = (sum(count * lengths[key] for key, count in candidate.items())
+                 + sum(count * self._lengths[key] for key, count in self._baseline.items()))
+        similarity = 1.0 if not total else 2.0 * shared / total
+
+        added = candidate - common
+        removed = self._baseline - common
+        delta = [('+', texts[key][:120]) for key in itertools.islice(added, self.max_delta)]
+        delta += [('-', self._texts[key][:120]) for key in itertools.islice(removed, self.max_delta)]
+        status_changed = self.status is not None and status is not None and status != self.status
+        return {
+            'similarity': round(similarity, 4),
+            'changed': status_changed or similarity < self.threshold,
+            'identical': not (status_changed or added or removed),
+            'status': status,
+            'status_changed': status_changed,
+            'added': sum(added.values()),
+            'removed': sum(removed.values()),
+            'delta': delta,
+        }
@@ -0,0 +1,202 @@
+"""
+Structured, non-blocking logging for Parameter Bug Hunter Pro
+"""
+
+import re
+import json
+import time
+import queue
+import atexit
+import threading
+import traceback
+from datetime import datetime
+from pathlib import Path
+from contextlib import contextmanager
+from colorama import Fore, Style
+
+
+_URL = re.compile(r"\w+://[^\s'\")]+")
+_NUMBER = re.compile(r"0x[0-9a-fA-F]+|\d+")
+
+
+class ScanLogger:
+    """JSON-lines logger that never blocks the scan
+
+    Calls only update counters and push a dict onto a bounded queue; a
+    background thread serialises, writes and flushes in batches. Errors are
+    grouped by stage, type, host and a normalised message (URLs and numbers
+    masked): the first one in each ``repeat_window`` is logged in full and
+    printed once, the rest are only counted and written out as a single
+    ``repeated`` record when the window closes. A dead target producing
+    thousands of identical timeouts therefore costs a dict lookup each.
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, path="error_log.jsonl", repeat_window=10.0, flush_interval=0.5,
+                 max_queue=100000, console=True):
+        self.path = Path(path)
+        self.repeat_window = repeat_window
+        self.flush_interval = flush_interval
+        self.console = console
+        self.current_stage = "general"
+        self.counters = {}
+        self.dropped = 0
+        self._groups = {}
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    @classmethod
+    def default(cls):
+        """Process-wide logger shared by the scanners"""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    def set_path(self, path):
+        """Send further records to another file (e.g. the project's logs/)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+
+    @contextmanager
+    def stage(self, name):
+        """Attribute errors raised by any thread to ``name`` while active
+
+        Entering a stage starts its error counts afresh, so ``summary()``
+        describes the latest run of a stage rather than every run so far.
+        """
+        if name != self.current_stage:
+            with self._lock:
+                self.counters.pop(name, None)
+        previous, self.current_stage = self.current_stage, name
+        try:
+            yield self
+        finally:
+            self.current_stage = previous
+            self._close_groups(force=True)
+
+    def log(self, level, message, stage=None, **fields):
+        record = {'time': time.time(), 'level': level, 'stage': stage or self.current_stage,
+                  'message': str(message)}
+        record.update(fields)
+        self._enqueue(record)
+
+    def info(self, message, stage=None, **fields):
+        self.log('info', message, stage, **fields)
+
+    def error(self, error, stage=None, host=None, **fields):
+        """Count an error and log it unless an identical one was just logged"""
+        stage = stage or self.current_stage
+        error_type = type(error).__name__ if isinstance(error, BaseException) else 'error'
+        message = str(error)
+        key = (stage, error_type, host, _NUMBER.sub('#', _URL.sub('<url>', message)))
+        now = time.monotonic()
+
+        with self._lock:
+            stage_counts = self.counters.setdefault(stage, {})
+            stage_counts[error_type] = stage_counts.get(error_type, 0) + 1
+            group = self._groups.get(key)
+            if group is not None and now - group['since'] < self.repeat_window:
+                group['suppressed'] += 1
+                return False
+            if group is not None and group['suppressed']:
+                self._enqueue(self._repeated_record(key, group))
+            self._groups[key] = {'since': now, 'suppressed': 0, 'first': message}
+
+        record = {'time': time.time(), 'level': 'error', 'stage': stage, 'type': error_type,
+                  'message': message}
+        if host:
+            record['host'] = host
+        record.update(fields)
+        if isinstance(error, BaseException) and error.__traceback__ is not None:
+            # Formatted on the writer thread
+            record['_exception'] = error
+        self._enqueue(record)
+
+        if self.console:
+            print(f"{Fore.RED}[{stage}] {error_type}: {message[:160]}{Style.RESET_ALL}")
+        return True
+
+    def _enqueue(self, record):
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    @staticmethod
+    def _repeated_record(key, group):
+        stage, error_type, host, pattern = key
+        return {'time': time.time(), 'level': 'error', 'stage': stage, 'type': error_type,
+                'event': 'repeated', 'host': host, 'pattern': pattern, 'count': group['suppressed']}
+
+    def _close_groups(self, force=False):
+        """Emit ``repeated`` records for windows that have ended"""
+        now = time.monotonic()
+        with self._lock:
+            for key, group in list(self._groups.items()):
+                if force or now - group['since'] >= self.repeat_window:
+                    if group['suppressed']:
+                        self._enqueue(self._repeated_record(key, group))
+                    del self._groups[key]
+
+    def _write_loop(self):
+        while True:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                self._close_groups()
+                continue
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in batch
+            lines = []
+            for record in batch:
+                if record is None:
+                    continue
+                error = record.pop('_exception', None)
+                if error is not None:
+                    record['traceback'] = ''.join(traceback.format_exception(type(error), error, error.__traceback__))
+                record['time'] = datetime.fromtimestamp(record['time']).isoformat()
+                lines.append(json.dumps(record, default=str))
+            try:
+                if lines:
+                    with open(self.path, 'a') as f:
+                        f.write('\n'.join(lines) + '\n')
+            except OSError:
+                self.dropped += len(lines)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                return
+            self._close_groups()
+
+    def summary(self, stage=None):
+        """Error counts per type for one stage, or for every stage"""
+        with self._lock:
+            if stage is not None:
+                return dict(self.counters.get(stage, {}))
+            return {name: dict(counts) for name, counts in self.counters.items()}
+
+    def flush(self):
+        """Block until every queued record is written"""
+        self._close_groups(force=True)
+        self._queue.join()
+
+    def close(self):
+        if self._writer is None:
+            return
+        self._close_groups(force=True)
+        self._queue.put(None)
+        self._writer.join()
+        self._writer = None
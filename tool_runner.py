@@ -0,0 +1,255 @@
+"""
+External tool runner for Parameter Bug Hunter Pro
+"""
+
+import os
+import time
+import signal
+import shutil
+import asyncio
+import resource
+
+
+class ToolNotFoundError(Exception):
+    """Raised when a tool is neither configured nor on PATH"""
+
+
+class ToolResult:
+    """Outcome and resource accounting for one tool invocation"""
+
+    def __init__(self, tool, argv):
+        self.tool = tool
+        self.argv = argv
+        self.returncode = None
+        self.stdout_lines = 0
+        self.stderr_lines = 0
+        self.bytes_read = 0
+        self.started = None
+        self.duration = 0.0
+        self.timed_out = False
+        self.cancelled = False
+        self.error = None
+        self.oversized_lines = 0
+
+    @property
+    def ok(self):
+        return self.returncode == 0 and not self.timed_out and not self.cancelled
+
+    def __repr__(self):
+        return (f"ToolResult({self.tool}, rc={self.returncode}, lines={self.stdout_lines}, "
+                f"{self.duration:.1f}s{', timed out' if self.timed_out else ''}"
+                f"{', cancelled' if self.cancelled else ''}{f', {self.error}' if self.error else ''})")
+
+
+class ToolRunner:
+    """Asyncio process pool for the external tools in ``config['tools']``
+
+    Commands are always built as argv lists (never split from strings), run
+    under a shared concurrency budget and streamed line by line to callbacks
+    so callers can parse output incrementally.
+    """
+
+    def __init__(self, config, max_concurrent=None, timeout=None):
+        runner_config = config.get('runner') or {}
+        self.tools = config.get('tools') or {}
+        self.max_concurrent = max_concurrent or runner_config.get('max_concurrent', 4)
+        self.timeout = timeout if timeout is not None else runner_config.get('timeout')
+        self.kill_grace = runner_config.get('kill_grace', 5)
+        self.stats = {
+            'runs': 0,
+            'failed': 0,
+            'timed_out': 0,
+            'cancelled': 0,
+            'wall_time': 0.0,
+            'cpu_user': 0.0,
+            'cpu_system': 0.0,
+        }
+        self._semaphore = None
+        self._loop = None
+        self._tasks = set()
+
+    def resolve(self, tool):
+        """Return the executable for a tool, preferring the configured path"""
+        configured = self.tools.get(tool)
+        if configured and os.path.exists(os.path.expanduser(configured)):
+            return os.path.expanduser(configured)
+        return shutil.which(configured or tool) or shutil.which(tool)
+
+    def available(self, tool):
+        """Check whether a tool can be run"""
+        return self.resolve(tool) is not None
+
+    def build_command(self, tool, *args):
+        """Build an argv list for a tool, dropping empty arguments"""
+        executable = self.resolve(tool)
+        if not executable:
+            raise ToolNotFoundError(f"{tool} not found")
+        return [executable] + [str(arg) for arg in args if arg is not None and arg != ""]
+
+    def _budget(self):
+        """Concurrency semaphore bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+            self._loop = loop
+        return self._semaphore
+
+    async def run(self, tool, *args, on_stdout=None, on_stderr=None, stdin=None,
+                  timeout=None, cwd=None):
+        """Run one tool, streaming decoded output lines to the callbacks
+
+        ``stdin`` may be an iterable of lines that is fed to the process while
+        its output is being read. ``timeout`` defaults to the runner's; 0
+        means no limit, for runs whose length grows with the input.
+        """
+        argv = self.build_command(tool, *args)
+        result = ToolResult(tool, argv)
+        timeout = self.timeout if timeout is None else timeout or None
+
+        async with self._budget():
+            usage_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+            result.started = time.monotonic()
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *argv,
+                    stdin=asyncio.subprocess.PIPE if stdin is not None else asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=cwd,
+                    start_new_session=True,
+                    limit=1024 * 1024
+                )
+            except OSError as e:
+                # Not executable, bad cwd, out of file descriptors...
+                result.error = f"{type(e).__name__}: {e}"
+                self._account(result, usage_before)
+                return result
+            task = asyncio.current_task()
+            self._tasks.add(task)
+
+            try:
+                streams = [
+                    self._pump(process.stdout, on_stdout, result, 'stdout_lines'),
+                    self._pump(process.stderr, on_stderr, result, 'stderr_lines'),
+                ]
+                if stdin is not None:
+                    streams.append(self._feed(process.stdin, stdin))
+                await asyncio.wait_for(asyncio.gather(*streams, process.wait()), timeout)
+            except asyncio.TimeoutError:
+                result.timed_out = True
+                await self._terminate(process)
+            except asyncio.CancelledError:
+                result.cancelled = True
+                await self._terminate(process)
+                raise
+            except Exception:
+                await self._terminate(process)
+                raise
+            finally:
+                self._tasks.discard(task)
+                result.returncode = process.returncode
+                result.duration = time.monotonic() - result.started
+                self._account(result, usage_before)
+
+        return result
+
+    async def _pump(self, stream, callback, result, counter):
+        """Read a stream line by line and hand each line to the callback
+
+        A line longer than the stream limit (a nuclei result embedding a
+        whole response, a minified URL dump) is skipped and counted in
+        ``oversized_lines`` instead of aborting the read.
+        """
+        skipping = False
+        while True:
+            try:
+                raw = await stream.readuntil(b"\n")
+            except asyncio.IncompleteReadError as e:
+                raw = e.partial
+                if not raw:
+                    return
+            except asyncio.LimitOverrunError as e:
+                # Drop what is buffered and keep dropping up to the newline
+                result.bytes_read += len(await stream.read(e.consumed))
+                if not skipping:
+                    skipping = True
+                    result.oversized_lines += 1
+                continue
+            result.bytes_read += len(raw)
+            if skipping:
+                skipping = False
+                continue
+            setattr(result, counter, getattr(result, counter) + 1)
+            if callback:
+                callback(raw.decode('utf-8', 'replace').rstrip('\r\n'))
+            if not raw.endswith(b"\n"):
+                return
+
+    async def _feed(self, writer, lines):
+        """Write lines to the process stdin with backpressure"""
+        try:
+            for line in lines:
+                writer.write(f"{line}\n".encode())
+                await writer.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def _terminate(self, process):
+        """Stop a process group, escalating to SIGKILL after the grace period"""
+        if process.returncode is not None:
+            return
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+            await asyncio.wait_for(process.wait(), self.kill_grace)
+        except asyncio.TimeoutError:
+            os.killpg(process.pid, signal.SIGKILL)
+            await process.wait()
+        except ProcessLookupError:
+            await process.wait()
+
+    def _account(self, result, usage_before):
+        """Fold a finished run into the runner's resource counters
+
+        Child CPU time is only reported per reaped process group, so under
+        concurrency it is attributed to the pool as a whole, not per run.
+        """
+        usage_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+        self.stats['runs'] += 1
+        self.stats['wall_time'] += result.duration
+        self.stats['cpu_user'] += max(0.0, usage_after.ru_utime - usage_before.ru_utime)
+        self.stats['cpu_system'] += max(0.0, usage_after.ru_stime - usage_before.ru_stime)
+        if result.timed_out:
+            self.stats['timed_out'] += 1
+        elif result.cancelled:
+            self.stats['cancelled'] += 1
+        elif result.error or result.returncode != 0:
+            self.stats['failed'] += 1
+
+    async def run_all(self, jobs):
+        """Run several jobs concurrently within the budget
+
+        Each job is a dict with ``tool``, ``args`` and optional ``run()``
+        keyword arguments. Missing tools yield ``None`` in the results.
+        """
+        async def run_job(job):
+            try:
+                return await self.run(job['tool'], *job.get('args', []), **job.get('options', {}))
+            except ToolNotFoundError:
+                return None
+
+        return await asyncio.gather(*(run_job(job) for job in jobs))
+
+    def cancel_all(self):
+        """Cancel every tool currently running"""
+        for task in list(self._tasks):
+            task.cancel()
+
+    def run_sync(self, tool, *args, **options):
+        """Blocking wrapper around ``run`` for menu handlers"""
+        return asyncio.run(self.run(tool, *args, **options))
+
+    def run_all_sync(self, jobs):
+        """Blocking wrapper around ``run_all`` for menu handlers"""
+        return asyncio.run(self.run_all(jobs))
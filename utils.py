@@ -8,9 +8,11 @@ import hashlib
 import random
 import string
 from datetime import datetime
+from urllib.parse import urlparse
 from pathlib import Path
 import requests
 from colorama import Fore, Style
+from evidence_store import EvidenceStore
 
 class Utils:
     @staticmethod
@@ -27,19 +29,23 @@ class Utils:
     
     @staticmethod
     def save_evidence(data, filename, directory="evidence"):
-        """Save evidence to file"""
-        Path(directory).mkdir(exist_ok=True)
-        
-        filepath = Path(directory) / filename
-        
-        if isinstance(data, dict) or isinstance(data, list):
-            with open(filepath, 'w') as f:
-                json.dump(data, f, indent=2)
-        else:
-            with open(filepath, 'w') as f:
-                f.write(str(data))
-        
-        return filepath
+        """Save evidence to the directory's evidence store, returns its digest"""
+        if not isinstance(data, (dict, list, bytes, bytearray)):
+            data = str(data)
+        return EvidenceStore.open(directory).put(data, name=filename)
+    
+    @staticmethod
+    def extract_parameters(urls):
+        """Extract (endpoint, parameter) pairs from URL query strings"""
+        pairs = set()
+        for url in urls:
+            parsed = urlparse(url)
+            if parsed.query:
+                endpoint = f"{parsed.scheme}://{parsed.netloc}{parsed.path}"
+                for param in parsed.query.split('&'):
+                    if '=' in param:
+                        pairs.add((endpoint, param.split('=')[0]))
+        return pairs
     
     @staticmethod
     def load_json_file(filepath):
@@ -0,0 +1,531 @@
+"""
+WebSocket endpoint discovery and message fuzzing for Parameter Bug Hunter Pro
+"""
+
+import re
+import ssl
+import json
+import base64
+import struct
+import asyncio
+import hashlib
+import secrets
+from urllib.parse import urlsplit, urljoin
+
+from http_client import HttpClient
+from payloads import PayloadLibrary
+
+
+class WebSocketScanner:
+    """Find WebSocket endpoints, learn their message shapes and fuzz the fields
+
+    Speaks RFC 6455 directly over asyncio streams, so hundreds of upgrade
+    handshakes run concurrently on one event loop. Candidates come from
+    ``ws(s)://`` URLs in the corpus, paths that look like socket endpoints,
+    ``new WebSocket(...)`` calls and ``.send(JSON.stringify({...}))`` messages
+    in JavaScript, and a few common paths on every origin. A confirmed
+    endpoint is listened to for a moment, and any messages from its scripts
+    are sent as seeds. Every JSON message seen is reduced to a shape of
+    field paths and types.
+
+    Fuzzing treats every leaf field of those messages as a parameter. Each
+    endpoint gets a few long-lived connections that work through a shared
+    queue of mutated messages, one send and its replies at a time, and
+    reconnect only when the server drops them. Payloads carry a per-message
+    canary, so a reply is tied to the message that caused it. Error
+    signatures only count when the unmodified message doesn't produce them.
+    """
+
+    GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+    PATH_HINT = re.compile(r"/(ws|wss|websockets?|sockets?|socket\.io|sockjs|cable|realtime|live|hubs?|signalr|"
+                           r"graphql-ws|subscriptions?)(/|$)", re.I)
+    COMMON_PATHS = ["/ws", "/websocket", "/socket", "/socket.io/", "/cable", "/realtime", "/graphql"]
+    JS_SOCKET = re.compile(r"""new\s+WebSocket\s*\(\s*["'`]([^"'`]+)["'`]|["'`](wss?://[^"'`\s]+)["'`]""")
+    JS_MESSAGE = re.compile(r"""\.send\(\s*JSON\.stringify\(\s*(\{[^;]*?\})\s*\)\s*\)""")
+    ENGINE_IO = re.compile(r"^(\d+)(?=[\[{])")
+    ERRORS = re.compile(
+        r"SQL syntax|mysql_fetch|ORA-\d{5}|PostgreSQL.{0,40}ERROR|syntax error at or near|SQLite3?::|"
+        r"sqlite3\.\w*Error|Unclosed quotation mark|Traceback \(most recent call last\)|"
+        r"at [\w$.]+\([\w]+\.java:\d+\)|System\.\w+Exception|Fatal error:|Unhandled exception"
+    )
+    CLASSES = ('xss', 'sqli', 'ssti', 'command_injection')
+
+    def __init__(self, concurrency=100, connections=4, timeout=10.0, listen=1.0, reply_timeout=1.0,
+                 settle=0.05, max_message=1 << 20, payloads=None, per_class=4, verify_tls=False):
+        self.concurrency = concurrency
+        self.connections = connections
+        self.timeout = timeout
+        self.listen = listen
+        self.reply_timeout = reply_timeout
+        self.settle = settle
+        self.max_message = max_message
+        self.payloads = payloads or PayloadLibrary()
+        self.per_class = per_class
+        self.seeds = {}
+        self.schemas = {}
+        self.stats = {'handshakes': 0, 'confirmed': 0, 'connections': 0, 'reconnects': 0,
+                      'messages': 0, 'replies': 0, 'dropped': 0, 'findings': 0}
+        self._ssl = ssl.create_default_context()
+        if not verify_tls:
+            self._ssl.check_hostname = False
+            self._ssl.verify_mode = ssl.CERT_NONE
+
+    # Discovery
+
+    @staticmethod
+    def to_ws(url):
+        """``ws(s)://`` form of an http(s) URL, socket.io endpoints completed"""
+        parts = urlsplit(url)
+        scheme = {'http': 'ws', 'https': 'wss'}.get(parts.scheme, parts.scheme)
+        if scheme not in ('ws', 'wss') or not parts.netloc:
+            return None
+        query = parts.query
+        if 'socket.io' in parts.path and 'transport=' not in query:
+            query = "EIO=4&transport=websocket"
+        return f"{scheme}://{parts.netloc}{parts.path or '/'}" + (f"?{query}" if query else "")
+
+    @classmethod
+    def candidate_endpoints(cls, urls, common=True):
+        """Likely WebSocket endpoints in a URL corpus"""
+        endpoints, origins = set(), set()
+        for url in urls:
+            url = url.strip()
+            parts = urlsplit(url)
+            if parts.scheme in ('ws', 'wss'):
+                endpoints.add(cls.to_ws(url))
+            elif parts.scheme in ('http', 'https') and parts.netloc:
+                origins.add(f"{parts.scheme}://{parts.netloc}")
+                if cls.PATH_HINT.search(parts.path):
+                    endpoints.add(cls.to_ws(f"{parts.scheme}://{parts.netloc}{parts.path}"))
+        if common:
+            for origin in origins:
+                for path in cls.COMMON_PATHS:
+                    endpoints.add(cls.to_ws(origin + path))
+        endpoints.discard(None)
+        return sorted(endpoints)
+
+    @staticmethod
+    def js_object(literal):
+        """Parse a simple JS object literal, ``None`` when it isn't plain data"""
+        text = re.sub(r"([{,]\s*)([A-Za-z_$][\w$]*)\s*:", r'\1"\2":', literal)
+        text = re.sub(r"'([^'\\]*)'", r'"\1"', text)
+        text = re.sub(r",\s*}", "}", text)
+        try:
+            value = json.loads(text)
+        except ValueError:
+            return None
+        return value if isinstance(value, dict) else None
+
+    def scan_script(self, script_url, source):
+        """WebSocket URLs and seed messages found in one script"""
+        parts = urlsplit(script_url)
+        endpoints = set()
+        for match in self.JS_SOCKET.finditer(source):
+            found = match.group(1) or match.group(2)
+            found = re.sub(r"^(wss?://)\$\{[^}]*\}", lambda m: m.group(1) + parts.netloc, found)
+            if '${' in found or '" +' in found:
+                continue
+            url = self.to_ws(urljoin(f"{parts.scheme}://{parts.netloc}/", found))
+            if url:
+                endpoints.add(url)
+        messages = [message for message in (self.js_object(m.group(1)) for m in self.JS_MESSAGE.finditer(source))
+                    if message]
+        for endpoint in endpoints:
+            self.add_seeds(endpoint, messages)
+        return sorted(endpoints), messages
+
+    def add_seeds(self, endpoint, messages):
+        """Messages to send to an endpoint while confirming it"""
+        seeds = self.seeds.setdefault(endpoint, [])
+        for message in messages:
+            if message not in seeds:
+                seeds.append(message)
+
+    def discover_scripts(self, client, script_urls):
+        """Fetch scripts concurrently through ``client`` and scan them"""
+        endpoints = set()
+        jobs = ({'method': 'GET', 'url': url} for url in script_urls)
+        for job, response in client.map(jobs):
+            if response is None or response.status_code != 200:
+                continue
+            found, messages = self.scan_script(job['url'], response.text)
+            endpoints.update(found)
+            if messages and not found:
+                # Messages without a socket URL in the same file belong to
+                # whatever endpoint the host turns out to have
+                self.add_seeds(urlsplit(job['url']).netloc, messages)
+        return sorted(endpoints)
+
+    # Protocol
+
+    class _Connection:
+        def __init__(self, scanner, reader, writer, info):
+            self.scanner = scanner
+            self.reader = reader
+            self.writer = writer
+            self.info = info
+            self.fresh = True
+
+        @staticmethod
+        def frame(opcode, payload):
+            length = len(payload)
+            if length < 126:
+                header = struct.pack("!BB", 0x80 | opcode, 0x80 | length)
+            elif length < 65536:
+                header = struct.pack("!BBH", 0x80 | opcode, 0x80 | 126, length)
+            else:
+                header = struct.pack("!BBQ", 0x80 | opcode, 0x80 | 127, length)
+            mask = secrets.token_bytes(4)
+            if length:
+                key = (mask * (length // 4 + 1))[:length]
+                payload = (int.from_bytes(payload, 'big') ^ int.from_bytes(key, 'big')).to_bytes(length, 'big')
+            return header + mask + payload
+
+        async def send(self, text, opcode=1):
+            self.writer.write(self.frame(opcode, text.encode() if isinstance(text, str) else text))
+            await self.writer.drain()
+
+        async def _read_frame(self):
+            first, second = await self.reader.readexactly(2)
+            length = second & 0x7F
+            if length == 126:
+                length = struct.unpack("!H", await self.reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack("!Q", await self.reader.readexactly(8))[0]
+            if length > self.scanner.max_message:
+                raise ConnectionResetError(f"frame of {length} bytes")
+            mask = await self.reader.readexactly(4) if second & 0x80 else None
+            data = await self.reader.readexactly(length)
+            if mask and length:
+                key = (mask * (length // 4 + 1))[:length]
+                data = (int.from_bytes(data, 'big') ^ int.from_bytes(key, 'big')).to_bytes(length, 'big')
+            return bool(first & 0x80), first & 0x0F, data
+
+        async def recv(self):
+            """Next text (``str``) or binary (``bytes``) message"""
+            opcode, parts = None, []
+            while True:
+                fin, frame_opcode, data = await self._read_frame()
+                if frame_opcode == 8:
+                    await self.close()
+                    raise ConnectionResetError("closed by server")
+                if frame_opcode == 9:
+                    await self.send(data, opcode=10)
+                    continue
+                if frame_opcode == 10:
+                    continue
+                if frame_opcode:
+                    opcode, parts = frame_opcode, []
+                parts.append(data)
+                if fin:
+                    data = b"".join(parts)
+                    return data.decode('utf-8', 'replace') if opcode == 1 else data
+
+        async def close(self):
+            try:
+                if not self.writer.is_closing():
+                    self.writer.write(self.frame(8, struct.pack("!H", 1000)))
+                    await self.writer.drain()
+            except (ConnectionError, OSError):
+                pass
+            self.writer.close()
+
+    async def connect(self, url, headers=None):
+        """Upgrade handshake, returns a connection or ``None`` if it isn't accepted"""
+        parts = urlsplit(url)
+        secure = parts.scheme == 'wss'
+        port = parts.port or (443 if secure else 80)
+        self.stats['handshakes'] += 1
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(
+                parts.hostname, port, ssl=self._ssl if secure else None,
+                server_hostname=parts.hostname if secure else None, limit=self.max_message), self.timeout)
+        except (OSError, asyncio.TimeoutError):
+            return None
+        key = base64.b64encode(secrets.token_bytes(16)).decode()
+        path = (parts.path or '/') + (f"?{parts.query}" if parts.query else "")
+        lines = [f"GET {path} HTTP/1.1", f"Host: {parts.netloc}", "Upgrade: websocket", "Connection: Upgrade",
+                 f"Sec-WebSocket-Key: {key}", "Sec-WebSocket-Version: 13",
+                 f"Origin: {'https' if secure else 'http'}://{parts.netloc}", f"User-Agent: {HttpClient.USER_AGENT}"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        try:
+            writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.timeout)
+        except (OSError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            writer.close()
+            return None
+        status_line, *header_lines = head.decode('latin-1').split("\r\n")
+        response_headers = {}
+        for line in header_lines:
+            name, sep, value = line.partition(":")
+            if sep:
+                response_headers[name.strip().lower()] = value.strip()
+        expected = base64.b64encode(hashlib.sha1((key + self.GUID).encode()).digest()).decode()
+        status = status_line.split(" ", 2)[1] if status_line.count(" ") else ""
+        if status != "101" or response_headers.get('sec-websocket-accept') != expected:
+            writer.close()
+            return None
+        info = {'url': url, 'server': response_headers.get('server', ''),
+                'protocol': response_headers.get('sec-websocket-protocol'),
+                'extensions': response_headers.get('sec-websocket-extensions')}
+        return self._Connection(self, reader, writer, info)
+
+    # Schemas
+
+    @classmethod
+    def decode(cls, message):
+        """``(prefix, value)`` of a JSON message, socket.io packet prefixes split off"""
+        if not isinstance(message, str):
+            return None
+        prefix = ''
+        match = cls.ENGINE_IO.match(message)
+        if match:
+            prefix = match.group(1)
+        try:
+            return prefix, json.loads(message[len(prefix):])
+        except ValueError:
+            return None
+
+    @staticmethod
+    def encode(prefix, value):
+        return prefix + json.dumps(value, separators=(',', ':'))
+
+    @classmethod
+    def leaves(cls, value, path=()):
+        """``(path, type)`` of every scalar in a JSON value, first list item only"""
+        if isinstance(value, dict):
+            for key, item in value.items():
+                yield from cls.leaves(item, path + (key,))
+        elif isinstance(value, list):
+            if value:
+                yield from cls.leaves(value[0], path + (0,))
+        else:
+            yield path, type(value).__name__ if value is not None else 'null'
+
+    @staticmethod
+    def path_name(path):
+        return '.'.join('[]' if isinstance(part, int) else str(part) for part in path).replace('.[]', '[]') or '$'
+
+    def record(self, url, direction, message):
+        """Add a message to the endpoint's shapes, returns the decoded message"""
+        decoded = self.decode(message)
+        shapes = self.schemas.setdefault(url, {})
+        if decoded is None:
+            key = (direction, 'text' if isinstance(message, str) else 'binary')
+            shape = shapes.setdefault(key, {'direction': direction, 'format': key[1], 'fields': {}, 'count': 0,
+                                            'example': message[:200] if isinstance(message, str) else None})
+            shape['count'] += 1
+            return None
+        prefix, value = decoded
+        fields = {self.path_name(path): kind for path, kind in self.leaves(value)}
+        key = (direction, prefix, tuple(sorted(fields)))
+        shape = shapes.get(key)
+        if shape is None:
+            shape = shapes[key] = {'direction': direction, 'format': 'json', 'prefix': prefix, 'fields': fields,
+                                   'count': 0, 'example': value}
+        shape['count'] += 1
+        return decoded
+
+    def schema_report(self):
+        """``{url: [shapes]}`` in a JSON-friendly form"""
+        return {url: list(shapes.values()) for url, shapes in self.schemas.items()}
+
+    def fields(self, url):
+        """Field names seen in JSON messages on an endpoint"""
+        return sorted({name for shape in self.schemas.get(url, {}).values() for name in shape['fields']})
+
+    # Confirmation
+
+    async def _confirm_one(self, url, slots, headers):
+        async with slots:
+            conn = await self.connect(url, headers)
+            if conn is None:
+                return None
+            self.stats['confirmed'] += 1
+            seeds = self.seeds.get(url, []) + self.seeds.get(urlsplit(url).netloc, [])
+            try:
+                for seed in seeds:
+                    message = self.encode('42' if 'socket.io' in url and isinstance(seed, list) else '', seed)
+                    self.record(url, 'sent', message)
+                    await conn.send(message)
+                loop = asyncio.get_running_loop()
+                deadline = loop.time() + self.listen
+                while loop.time() < deadline:
+                    message = await asyncio.wait_for(conn.recv(), deadline - loop.time())
+                    self.stats['replies'] += 1
+                    self.record(url, 'received', message)
+            except (asyncio.TimeoutError, ConnectionError, OSError, asyncio.IncompleteReadError):
+                pass
+            await conn.close()
+            return conn.info
+
+    async def _confirm(self, endpoints, headers):
+        slots = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(*(self._confirm_one(url, slots, headers) for url in endpoints))
+        return [info for info in results if info]
+
+    def confirm(self, endpoints, headers=None):
+        """Handshake with every candidate concurrently, returns the confirmed endpoints"""
+        return asyncio.run(self._confirm(list(dict.fromkeys(endpoints)), headers))
+
+    # Fuzzing
+
+    def templates(self, url, limit=5):
+        """Distinct JSON messages to mutate: seeds first, then received messages"""
+        templates, seen = [], set()
+        # Engine.IO open/ping and socket.io connect packets aren't application messages
+        candidates = [(direction, shape) for (direction, *_), shape in self.schemas.get(url, {}).items()
+                      if shape['format'] == 'json' and shape['prefix'] in ('', '42', '43')]
+        candidates.sort(key=lambda item: item[0] != 'sent')
+        for _, shape in candidates:
+            key = tuple(sorted(shape['fields']))
+            if key not in seen and shape['fields']:
+                seen.add(key)
+                templates.append((shape['prefix'], shape['example']))
+        return templates[:limit]
+
+    @staticmethod
+    def set_path(value, path, new):
+        value = json.loads(json.dumps(value))
+        target = value
+        for part in path[:-1]:
+            target = target[part]
+        if path:
+            target[path[-1]] = new
+            return value
+        return new
+
+    def jobs(self, url):
+        """Mutated messages for every leaf field of every template"""
+        for index, (prefix, template) in enumerate(self.templates(url)):
+            for path, _ in self.leaves(template):
+                for vuln_class in self.CLASSES:
+                    for context, mutation, payload in self.payloads.stream(vuln_class, limit=self.per_class):
+                        canary = "pbh" + secrets.token_hex(4)
+                        rendered = self.payloads.render(payload, canary)
+                        yield {'template': index, 'field': self.path_name(path), 'class': vuln_class,
+                               'payload': rendered, 'canary': canary,
+                               'message': self.encode(prefix, self.set_path(template, path, rendered))}
+
+    async def _exchange(self, conn, message, expect=None):
+        """Send one message and collect the replies that follow it
+
+        With ``expect`` the exchange ends as soon as that many replies are
+        in, instead of waiting ``settle`` seconds for more.
+        """
+        await conn.send(message)
+        self.stats['messages'] += 1
+        replies = []
+        try:
+            while not expect or len(replies) < expect:
+                reply = await asyncio.wait_for(conn.recv(), self.settle if replies else self.reply_timeout)
+                replies.append(reply if isinstance(reply, str) else reply.decode('latin-1'))
+        except asyncio.TimeoutError:
+            pass
+        self.stats['replies'] += len(replies)
+        return replies
+
+    async def _drain(self, conn):
+        """Skip greetings a server pushes right after the handshake"""
+        try:
+            while True:
+                await asyncio.wait_for(conn.recv(), self.settle)
+        except asyncio.TimeoutError:
+            pass
+
+    def inspect(self, job, replies, baseline_errors):
+        """Issue a reply set shows for one mutated message, or ``None``"""
+        text = "\n".join(replies)
+        payload, canary = job['payload'], job['canary']
+        if job['class'] == 'ssti' and f"49{canary}" in text:
+            return "Server-Side Template Injection", "High"
+        if job['class'] == 'command_injection':
+            rest = text.replace(payload, '').replace(json.dumps(payload)[1:-1], '')
+            rest = re.sub(r"echo(?:\s|%20|\+|\$\{IFS\})+" + canary, '', rest)
+            if canary in rest:
+                return "Command Injection", "Critical"
+        if job['class'] == 'xss' and (payload in text or json.dumps(payload)[1:-1] in text):
+            return "Reflected Payload", "Low"
+        for match in self.ERRORS.finditer(text):
+            if match.group(0) not in baseline_errors:
+                return ("Possible SQL Injection" if job['class'] == 'sqli' else "Error Disclosure"), "Medium"
+        return None
+
+    async def _fuzz_endpoint(self, url, headers, slots, findings):
+        templates = self.templates(url)
+        if not templates:
+            return
+        async with slots:
+            conn = await self.connect(url, headers)
+            if conn is None:
+                return
+            baseline_errors, counts = set(), set()
+            try:
+                await self._drain(conn)
+                for prefix, template in templates:
+                    replies = await self._exchange(conn, self.encode(prefix, template))
+                    counts.add(len(replies))
+                    for reply in replies:
+                        baseline_errors.update(match.group(0) for match in self.ERRORS.finditer(reply))
+            except (ConnectionError, OSError, asyncio.IncompleteReadError):
+                counts.add(None)
+            await conn.close()
+        # A server that always answers every message with the same number
+        # of replies doesn't need the settle wait after each one
+        expect = counts.pop() if len(counts) == 1 else None
+
+        jobs = self.jobs(url)
+        reported = set()
+
+        async def worker():
+            conn = None
+            for job in jobs:
+                replies = None
+                for _ in range(2):
+                    if conn is None:
+                        conn = await self.connect(url, headers)
+                        if conn is None:
+                            return
+                        self.stats['connections'] += 1
+                    try:
+                        if conn.fresh:
+                            conn.fresh = False
+                            await self._drain(conn)
+                        replies = await self._exchange(conn, job['message'], expect)
+                        break
+                    except (ConnectionError, OSError, asyncio.IncompleteReadError):
+                        await conn.close()
+                        conn = None
+                        self.stats['reconnects'] += 1
+                if replies is None:
+                    # Dropped twice in a row by this very message
+                    self.stats['dropped'] += 1
+                    continue
+                issue = self.inspect(job, replies, baseline_errors)
+                key = issue and (issue[0], job['field'], job['class'])
+                if issue and key not in reported:
+                    reported.add(key)
+                    self.stats['findings'] += 1
+                    findings.append({'url': url, 'field': job['field'], 'type': issue[0], 'severity': issue[1],
+                                     'class': job['class'], 'payload': job['payload'], 'message': job['message'],
+                                     'replies': [reply[:500] for reply in replies[:5]]})
+            if conn is not None:
+                await conn.close()
+
+        async with slots:
+            await asyncio.gather(*(worker() for _ in range(self.connections)))
+
+    async def _fuzz(self, endpoints, headers):
+        # One slot per endpoint; its connections share it
+        slots = asyncio.Semaphore(max(1, self.concurrency // max(1, self.connections)))
+        findings = []
+        await asyncio.gather(*(self._fuzz_endpoint(url, headers, slots, findings) for url in endpoints))
+        return findings
+
+    def fuzz(self, endpoints, headers=None):
+        """Fuzz every JSON field of the confirmed endpoints, returns the findings"""
+        return asyncio.run(self._fuzz(list(endpoints), headers))
+
+    def planned(self, endpoints):
+        """Messages ``fuzz()`` will send"""
+        return sum(1 for url in endpoints for _ in self.jobs(url))
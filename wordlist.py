@@ -0,0 +1,278 @@
+"""
+Indexed wordlist access for Parameter Bug Hunter Pro
+"""
+
+import os
+import mmap
+import heapq
+import struct
+import tempfile
+from array import array
+from pathlib import Path
+
+
+class Wordlist:
+    """Memory-mapped wordlist with a sidecar line-offset index.
+
+    The index (``<wordlist>.idx``) stores the byte offset of every line start
+    followed by the file size, so line ``i`` is ``data[off[i]:off[i + 1]]``.
+    Both files are mapped read-only, which lets any number of worker
+    processes share the same pages without loading the list into memory.
+    """
+
+    INDEX_SUFFIX = ".idx"
+    INDEX_MAGIC = b"PBHIDX01"
+    # magic, source size, source mtime_ns, line count
+    HEADER = struct.Struct("<8sQQQ")
+
+    def __init__(self, path):
+        self.path = Path(path).expanduser()
+        self.index_path = self.index_path_for(self.path)
+        self._file = open(self.path, 'rb')
+        self._index_file = None
+        self._data = self._map(self._file)
+
+        if not self._index_is_fresh():
+            self.build_index(self.path)
+        self._index_file = open(self.index_path, 'rb')
+        self._index = self._map(self._index_file)
+        self._count = self.HEADER.unpack_from(self._index)[3]
+        self._index_view = memoryview(self._index)[self.HEADER.size:]
+        self._offsets = self._index_view.cast('Q')
+
+    @classmethod
+    def index_path_for(cls, path):
+        """Sidecar index path, falling back to the user cache for read-only dirs"""
+        path = Path(path).expanduser()
+        if os.access(path.parent, os.W_OK):
+            return path.with_name(path.name + cls.INDEX_SUFFIX)
+
+        cache_dir = Path.home() / ".parameter_hunter" / "wordlists"
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        name = str(path.resolve()).strip(os.sep).replace(os.sep, "_")
+        return cache_dir / (name + cls.INDEX_SUFFIX)
+
+    @staticmethod
+    def _map(handle):
+        """Map a file read-only, empty files map to an empty buffer"""
+        if os.fstat(handle.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _index_is_fresh(self):
+        """Check that the sidecar index matches the current wordlist"""
+        try:
+            with open(self.index_path, 'rb') as f:
+                header = f.read(self.HEADER.size)
+        except FileNotFoundError:
+            return False
+
+        if len(header) != self.HEADER.size:
+            return False
+
+        magic, size, mtime_ns, _ = self.HEADER.unpack(header)
+        stat = self.path.stat()
+        return (magic == self.INDEX_MAGIC and size == stat.st_size
+                and mtime_ns == stat.st_mtime_ns)
+
+    @classmethod
+    def build_index(cls, path):
+        """Scan a wordlist once and write its line-offset index atomically"""
+        path = Path(path).expanduser()
+        index_path = cls.index_path_for(path)
+        stat = path.stat()
+
+        offsets = array('Q')
+        with open(path, 'rb') as f:
+            data = cls._map(f)
+            size = len(data)
+            position = 0
+            while position < size:
+                offsets.append(position)
+                newline = data.find(b"\n", position)
+                if newline == -1:
+                    break
+                position = newline + 1
+            offsets.append(size)
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+        # Write to a temp file and rename so concurrent readers never see a
+        # half-written index
+        fd, tmp_path = tempfile.mkstemp(dir=index_path.parent, prefix=index_path.name)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(cls.HEADER.pack(cls.INDEX_MAGIC, stat.st_size,
+                                        stat.st_mtime_ns, len(offsets) - 1))
+                offsets.tofile(f)
+            os.replace(tmp_path, index_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        return index_path
+
+    def __len__(self):
+        return self._count
+
+    def raw(self, i):
+        """Return line ``i`` as a zero-copy memoryview without the newline"""
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("wordlist index out of range")
+
+        start, end = self._offsets[i], self._offsets[i + 1]
+        view = memoryview(self._data)[start:end]
+        if view[-1:] == b"\n":
+            view = view[:-1]
+        if view[-1:] == b"\r":
+            view = view[:-1]
+        return view
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(self._count)
+            if step != 1:
+                raise ValueError("wordlist slices do not support a step")
+            return WordlistShard(self, start, stop)
+        return str(self.raw(i), 'utf-8', 'replace')
+
+    def __iter__(self):
+        return iter(WordlistShard(self, 0, self._count))
+
+    def shard(self, index, count):
+        """Return shard ``index`` of ``count`` near-equal contiguous shards"""
+        if not 0 <= index < count:
+            raise ValueError("shard index must be in range(count)")
+        size, extra = divmod(self._count, count)
+        start = index * size + min(index, extra)
+        stop = start + size + (1 if index < extra else 0)
+        return WordlistShard(self, start, stop)
+
+    def shards(self, count):
+        """Split the wordlist into ``count`` shards for parallel workers"""
+        return [self.shard(i, count) for i in range(count)]
+
+    def close(self):
+        """Release the memory maps and file handles"""
+        self._offsets.release()
+        self._index_view.release()
+        for mapped in (self._data, getattr(self, '_index', b"")):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+        for handle in (self._file, self._index_file):
+            if handle:
+                handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def merge(paths, output, chunk_lines=500000):
+        """Merge and dedupe several wordlists without loading them into RAM
+
+        Lines keep the order of their first occurrence. Both passes are
+        external sorts over temporary runs of at most ``chunk_lines`` lines.
+        Returns the number of unique lines written.
+        """
+        with tempfile.TemporaryDirectory(prefix="pbh_merge_") as tmp_dir:
+            def write_runs(records, prefix):
+                runs = []
+                chunk = []
+                for record in records:
+                    chunk.append(record)
+                    if len(chunk) >= chunk_lines:
+                        chunk.sort()
+                        runs.append(_write_run(tmp_dir, f"{prefix}_{len(runs)}", chunk))
+                        chunk = []
+                if chunk:
+                    chunk.sort()
+                    runs.append(_write_run(tmp_dir, f"{prefix}_{len(runs)}", chunk))
+                return runs
+
+            def numbered_lines():
+                seq = 0
+                for path in paths:
+                    with open(Path(path).expanduser(), 'rb') as f:
+                        for line in f:
+                            line = line.rstrip(b"\r\n")
+                            if line:
+                                yield line, seq
+                                seq += 1
+
+            # Pass 1: sort by line, keep the first sequence number of each
+            by_line = write_runs(numbered_lines(), "line")
+
+            def first_occurrences():
+                previous = None
+                for line, seq in heapq.merge(*[_read_run(run) for run in by_line]):
+                    if line != previous:
+                        yield seq, line
+                        previous = line
+
+            # Pass 2: restore the original order of the unique lines
+            by_seq = write_runs(first_occurrences(), "seq")
+
+            written = 0
+            with open(Path(output).expanduser(), 'wb') as out:
+                for _, line in heapq.merge(*[_read_run(run, seq_first=True) for run in by_seq]):
+                    out.write(line + b"\n")
+                    written += 1
+
+        return written
+
+
+class WordlistShard:
+    """Contiguous, zero-copy range of lines from a ``Wordlist``"""
+
+    def __init__(self, wordlist, start, stop):
+        self.wordlist = wordlist
+        self.start = start
+        self.stop = stop
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("shard index out of range")
+        return self.wordlist[self.start + i]
+
+    def __iter__(self):
+        for i in range(self.start, self.stop):
+            yield str(self.wordlist.raw(i), 'utf-8', 'replace')
+
+    def __repr__(self):
+        return f"WordlistShard({self.wordlist.path.name}, {self.start}:{self.stop})"
+
+
+def _write_run(directory, name, records):
+    """Write sorted (a, b) records as a temporary run file"""
+    path = os.path.join(directory, f"run_{name}")
+    with open(path, 'wb') as f:
+        for first, second in records:
+            if isinstance(first, int):
+                f.write(b"%d\t%s\n" % (first, second))
+            else:
+                f.write(b"%s\t%d\n" % (first, second))
+    return path
+
+
+def _read_run(path, seq_first=False):
+    """Stream records back from a run file"""
+    with open(path, 'rb') as f:
+        for record in f:
+            record = record[:-1]
+            if seq_first:
+                seq, line = record.split(b"\t", 1)
+                yield int(seq), line
+            else:
+                line, seq = record.rsplit(b"\t", 1)
+                yield line, int(seq)